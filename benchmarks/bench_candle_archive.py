@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark do arquivo histórico memory-mapped
+Grava anos de M15 sintético para um universo de símbolos num
+CandleArchive temporário e mede: tempo para abrir todas as séries,
+memória residente após abrir, fatia de um mês como DataFrame e a
+mesma leitura a partir do .npz do CandleStore. A fatia precisa ser
+uma view dos arquivos (sem cópia) com valores idênticos aos gravados.
+
+Uso: python benchmarks/bench_candle_archive.py [--symbols 100] [--years 10]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.candle_archive import CandleArchive
+from modules.candle_store import CandleStore
+
+BARS_PER_YEAR = 252 * 96  # M15, dias úteis
+
+def rss_mib():
+    """Memória residente do processo (Linux)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+def make_history(rng, rows):
+    """Random walk M15 (5 casas) sem fins de semana"""
+    close = np.round(1.1 * np.exp(np.cumsum(rng.normal(0, 0.0008, rows))), 5)
+    spread = np.round(np.abs(rng.normal(0, 0.0004, rows)) * close, 5)
+    stamps = pd.date_range(end='2024-06-28 23:45', periods=rows * 7 // 5 + 96 * 7, freq='15min', name='datetime')
+    index = stamps[stamps.dayofweek < 5][-rows:]
+
+    return pd.DataFrame({
+        'Open': close, 'High': close + spread, 'Low': close - spread, 'Close': close,
+        'Volume': np.full(rows, 1000.0)
+    }, index=index)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--years', type=float, default=10)
+    args = parser.parse_args()
+
+    rows = int(args.years * BARS_PER_YEAR)
+    base_dir = tempfile.mkdtemp(prefix='archive-bench-')
+    rng = np.random.default_rng(9)
+
+    try:
+        writer = CandleArchive(base_dir)
+        sample = None
+        start = time.perf_counter()
+        for i in range(args.symbols):
+            df = make_history(rng, rows)
+            writer.append(f'S{i:03d}USD', '15m', df)
+            if i == 0:
+                sample = df
+                CandleStore(base_dir=base_dir, max_bars=rows).save('S000USD', '15m', df)
+        written = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(base_dir) for name in names)
+
+        # Leitura num objeto novo: nada mapeado ainda
+        archive = CandleArchive(base_dir)
+        rss_before = rss_mib()
+        start = time.perf_counter()
+        opened = [archive.open(symbol, interval) for symbol, interval in archive.series('15m')]
+        open_ms = (time.perf_counter() - start) * 1000
+        rss_open = rss_mib() - rss_before
+
+        month_start, month_end = sample.index[-rows // 2], sample.index[-rows // 2] + pd.Timedelta(days=30)
+        start = time.perf_counter()
+        window = archive.frame('S000USD', '15m', month_start, month_end)
+        slice_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        stored = CandleStore(base_dir=base_dir).load('S000USD', '15m')
+        stored_window = stored.loc[month_start:month_end]
+        npz_ms = (time.perf_counter() - start) * 1000
+
+        expected = sample.loc[month_start:month_end]
+        times, columns = archive.open('S000USD', '15m')
+        zero_copy = all(np.shares_memory(window[col].to_numpy(), columns[col]) for col in columns)
+        identical = window.equals(expected) and stored_window.equals(expected)
+
+        print(f"Arquivo: {args.symbols} símbolos x {rows:,} velas M15 ({args.years:g} anos) | "
+              f"{size / 2 ** 30:.2f} GiB, gravado em {written:.1f} s")
+        print(f"  abrir {len(opened)} séries:  {open_ms:8.2f} ms | RSS +{rss_open:.1f} MiB")
+        print(f"  fatia de 30 dias:      {slice_ms:8.2f} ms ({len(window)} velas, sem cópia: {zero_copy})")
+        print(f"  mesma fatia via .npz:  {npz_ms:8.2f} ms ({npz_ms / slice_ms:.0f}x)")
+
+        if not (zero_copy and identical):
+            print("❌ Fatia do arquivo copiada ou diferente do histórico gravado")
+            return 1
+        print("✅ Fatia sem cópia e idêntica ao histórico gravado")
+        return 0
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    sys.exit(main())
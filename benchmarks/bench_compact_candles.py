@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória e precisão das velas compactas
+Gera um universo sintético com a precisão de cada classe de
+instrumento (forex 5 casas, JPY 3, ouro e BTC 2; forex com volume
+sintético), analisa todos os pares nos modos normal e COMPACT_CANDLES
+e mede a memória retida por (par, timeframe) ao fim da passada: velas
++ indicadores que continuam vivos (cache de features e, no modo
+compacto, o bloco compartilhado, contado uma vez). A expansão precisa
+devolver o float64 original bit a bit; indicadores, VTI, direção e
+SL/TP precisam ser idênticos entre os modos.
+
+Uso: python benchmarks/bench_compact_candles.py [--symbols 100] [--bars 3000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+# Mesmo backend nos dois modos; sem store local
+config.INDICATOR_BACKEND = 'numpy'
+config.CANDLE_STORE_ENABLED = False
+
+from modules.compact_candles import compact_frame, expand_frame, frame_nbytes
+from modules.data_fetcher import DataFetcher
+from modules.feature_cache import get_feature_cache
+from modules.indicators_numpy import shared_block
+from modules.ohlcv_decoder import SYNTHETIC_VOLUME
+from modules.signal_generator import SignalGenerator
+from modules.technical_analysis import INDICATOR_COLUMNS
+
+# (sufixo, preço inicial, casas decimais, volume real)
+INSTRUMENTS = [
+    ('EURUSD', 1.1, 5, False),
+    ('USDJPY', 150.0, 3, False),
+    ('XAUUSD', 2300.0, 2, True),
+    ('BTCUSD', 60000.0, 2, True)
+]
+
+def make_m15(rng, rows, price, decimals, real_volume):
+    """Random walk M15 arredondado na precisão do instrumento"""
+    close = price * np.exp(np.cumsum(rng.normal(rng.choice([-1, 1]) * 0.00005, 0.0008, rows)))
+    spread = np.abs(rng.normal(0, 0.0004, rows)) * close
+    index = pd.date_range(end='2024-06-28 21:00', periods=rows, freq='15min', name='datetime')
+    volume = rng.integers(100, 50000, rows).astype(np.float64) if real_volume else np.full(rows, float(SYNTHETIC_VOLUME))
+
+    return pd.DataFrame({
+        'Open': np.round(close * (1 + rng.normal(0, 0.0002, rows)), decimals),
+        'High': np.round(close + spread, decimals),
+        'Low': np.round(close - spread, decimals),
+        'Close': np.round(close, decimals),
+        'Volume': volume
+    }, index=index)
+
+def make_universe(symbols, bars, seed=11):
+    """{símbolo: {tf: df}} com H1/H4 derivados do M15"""
+    rng = np.random.default_rng(seed)
+    fetcher = DataFetcher()
+    universe = {}
+
+    for i in range(symbols):
+        suffix, price, decimals, real_volume = INSTRUMENTS[i % len(INSTRUMENTS)]
+        df = make_m15(rng, bars, price * rng.uniform(0.8, 1.2), decimals, real_volume)
+        universe[f'{suffix}{i:03d}'] = {
+            '15m': df,
+            '1h': fetcher.resample_ohlcv(df, '1h'),
+            '4h': fetcher.resample_ohlcv(df, '4h')
+        }
+
+    return universe
+
+def cached_nbytes(cache):
+    """Bytes dos valores guardados no cache de features"""
+    total = 0
+    for _, features in cache.entries.values():
+        for value in features.values():
+            total += int(value.memory_usage(index=False, deep=True)) if hasattr(value, 'memory_usage') else np.asarray(value).nbytes
+    return total
+
+def analyse(universe, compact):
+    """
+    Sinal forçado (BUY) e VTI/direção reais de cada par
+
+    Returns:
+        ({par: (vti, direção, SL, TPs)}, {par: indicadores}, bytes das
+        velas, bytes dos indicadores retidos)
+    """
+    config.COMPACT_CANDLES = compact
+    results = {}
+    indicators = {}
+    candle_bytes = 0
+    cache = get_feature_cache()
+    cache.invalidate()
+
+    for symbol, data in universe.items():
+        data = {tf: compact_frame(df) for tf, df in data.items()} if compact else data
+        candle_bytes += sum(frame_nbytes(df) for df in data.values())
+
+        generator = SignalGenerator(symbol, symbol, data)
+        score = generator.vti.calculate_vti_score()
+        direction = generator._determine_direction()
+
+        generator.vti.calculate_vti_score = lambda: 3
+        generator._determine_direction = lambda: 'BUY'
+        signal = generator.generate_signal()
+
+        # Cópia antes do próximo par (no modo compacto o bloco é reaproveitado)
+        indicators[symbol] = generator.tech.df[INDICATOR_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+        results[symbol] = (
+            score, direction,
+            signal and signal['stop_loss'],
+            signal and tuple(sorted(signal['take_profits'].items()))
+        )
+
+    # O que segue vivo depois da passada: cache de features (+ bloco compartilhado)
+    indicator_bytes = cached_nbytes(cache) + (shared_block(0).base.nbytes if compact else 0)
+    cache.invalidate()
+
+    config.COMPACT_CANDLES = False
+    return results, indicators, candle_bytes, indicator_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--bars', type=int, default=3000)
+    args = parser.parse_args()
+
+    universe = make_universe(args.symbols, args.bars)
+
+    # Ida e volta: expand(compact(df)) == df bit a bit
+    lossy = [
+        f'{symbol}/{tf}' for symbol, data in universe.items() for tf, df in data.items()
+        if not expand_frame(compact_frame(df)).equals(df)
+    ]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        normal, normal_ind, normal_candles, normal_retained = analyse(universe, compact=False)
+        compact, compact_ind, compact_candles, compact_retained = analyse(universe, compact=True)
+
+    mismatches = [
+        symbol for symbol in universe
+        if normal[symbol] != compact[symbol] or not np.array_equal(normal_ind[symbol], compact_ind[symbol], equal_nan=True)
+    ]
+
+    pairs_tf = args.symbols * 3
+    normal_bytes = normal_candles + normal_retained
+    compact_bytes = compact_candles + compact_retained
+    print(f"Universo: {args.symbols} pares x {args.bars} velas M15 (+ H1/H4 derivados)")
+    for label, candles, retained in (('normal', normal_candles, normal_retained),
+                                     ('compacto', compact_candles, compact_retained)):
+        print(f"  {label + ':':<10} {(candles + retained) / pairs_tf / 1024:8.1f} KiB por (par, timeframe)"
+              f" | velas {candles / pairs_tf / 1024:6.1f} + indicadores {retained / pairs_tf / 1024:6.1f}")
+    print(f"  redução:    {normal_bytes / compact_bytes:.1f}x ({1 - compact_bytes / normal_bytes:.0%} a menos)")
+
+    if lossy or mismatches:
+        print(f"❌ {len(lossy)} frame(s) sem ida e volta exata {lossy[:3]}"
+              f" | {len(mismatches)} par(es) com indicadores/sinal divergentes {mismatches[:3]}")
+        return 1
+    print("✅ Velas idênticas após expansão; indicadores, VTI, direção e SL/TP idênticos")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do decoder OHLCV
+Compara decode_time_series (NumPy) com o decoder pandas genérico
+sobre payloads sintéticos no formato do Twelve Data.
+
+Uso: python benchmarks/bench_decode.py [--rows 5000] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ohlcv_decoder import decode_time_series, decode_time_series_pandas
+
+def make_payload(rows, with_volume=False, seed=42):
+    """Gera 'values' no formato do Twelve Data (mais recente primeiro)"""
+    rng = np.random.default_rng(seed)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.0005, rows))
+    end = datetime(2024, 1, 1)
+
+    values = []
+    for i in range(rows):
+        close = closes[rows - 1 - i]
+        item = {
+            'datetime': (end - timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+            'open': f"{close - 0.0001:.5f}",
+            'high': f"{close + 0.0004:.5f}",
+            'low': f"{close - 0.0004:.5f}",
+            'close': f"{close:.5f}"
+        }
+        if with_volume:
+            item['volume'] = str(int(rng.integers(100, 5000)))
+        values.append(item)
+
+    return values
+
+def best_ms(func, repeat):
+    """Melhor tempo médio (ms) entre 3 rodadas"""
+    return min(timeit.repeat(func, number=repeat, repeat=3)) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for with_volume in (False, True):
+        values = make_payload(args.rows, with_volume=with_volume)
+
+        fast = decode_time_series(values)
+        slow = decode_time_series_pandas(values)
+        assert fast.index.equals(slow.index), "índices divergentes"
+        assert np.allclose(fast.to_numpy(), slow.to_numpy(dtype=np.float64)), "valores divergentes"
+
+        t_fast = best_ms(lambda: decode_time_series(values), args.repeat)
+        t_slow = best_ms(lambda: decode_time_series_pandas(values), args.repeat)
+
+        label = 'com volume' if with_volume else 'sem volume'
+        print(f"{args.rows} velas ({label}): pandas {t_slow:.2f} ms | numpy {t_fast:.2f} ms | {t_slow / t_fast:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de import de cada modo do main.py
+Mede com python -X importtime o custo de import (soma dos imports de
+nível superior, sem os da inicialização do interpretador) do entry
+point e dos módulos que cada modo carrega, em processos novos (melhor
+de N). Confere que os caminhos leves não puxam pandas/numpy/ta e
+compara com a referência versionada em
+benchmarks/import_time_baseline.json.
+
+Uso:
+  python benchmarks/bench_import_time.py [--repeat 7] [--threshold 0.25]
+  python benchmarks/bench_import_time.py --update   (regrava a referência)
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_FILE = os.path.join(BENCH_DIR, 'import_time_baseline.json')
+
+HEAVY = ['pandas', 'numpy', 'requests', 'ta']
+NOISE_FLOOR_MS = 5.0  # Diferenças abaixo disso não contam como regressão
+
+# modo: (imports do caminho, módulos pesados que não podem carregar)
+SCENARIOS = {
+    'entry': ('main', ['pandas', 'numpy', 'requests', 'ta']),
+    'calendar': ('main, modules.calendar_store', ['pandas', 'numpy', 'requests', 'ta']),
+    'resend': ('main, modules.telegram_notifier, modules.telegram_outbox', ['pandas', 'numpy', 'ta']),
+    'calendar-refresh': ('main, modules.data_fetcher', ['pandas', 'numpy', 'ta']),
+    'batch': ('main, modules.data_fetcher, modules.signal_generator, modules.notification_bus, '
+              'modules.signal_store, modules.portfolio_risk, modules.telegram_notifier', ['ta'])
+}
+
+def parse_importtime(stderr):
+    """{módulo de nível superior: cumulativo em µs} da saída do -X importtime"""
+    top = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            top[name.strip()] = int(cumulative)
+    return top
+
+def run_once(code):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr), result.stdout
+
+def measure(imports, repeat, startup):
+    """Melhor tempo (ms) de import e módulos pesados carregados"""
+    code = f"import {imports}; import sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    best = float('inf')
+    loaded = []
+
+    for _ in range(repeat):
+        top, stdout = run_once(code)
+        total = sum(us for name, us in top.items() if name not in startup)
+        best = min(best, total / 1000)
+        loaded = [m for m in stdout.strip().split(',') if m]
+
+    return {'ms': round(best, 2), 'heavy': loaded}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--threshold', type=float, default=0.25, help='piora relativa tolerada (0.25 = 25%%)')
+    parser.add_argument('--update', action='store_true', help='regrava benchmarks/import_time_baseline.json')
+    args = parser.parse_args()
+
+    # Imports da inicialização do interpretador (site, encodings...) ficam de fora
+    startup = set(run_once('pass')[0])
+
+    results = {}
+    failures = []
+    for name, (imports, forbidden) in SCENARIOS.items():
+        results[name] = measure(imports, args.repeat, startup)
+        leaked = [m for m in forbidden if m in results[name]['heavy']]
+        heavy = ', '.join(results[name]['heavy']) or '-'
+        print(f"  {'❌' if leaked else '✅'} {name:<17} {results[name]['ms']:8.1f} ms | pesados: {heavy}")
+        if leaked:
+            failures.append(f"{name} carrega {', '.join(leaked)}")
+
+    document = {
+        'meta': {
+            'date': datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'),
+            'python': platform.python_version(),
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+
+    if args.update:
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"\n💾 Referência: {BASELINE_FILE}")
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            base = json.load(f)
+
+        print(f"\n📊 Comparação com a referência de {base['meta']['date']} (limite {args.threshold:.0%})")
+        for name, now in results.items():
+            before = base['results'].get(name)
+            if before is None:
+                continue
+            ratio = now['ms'] / before['ms'] if before['ms'] else 1.0
+            slower = ratio > 1 + args.threshold and now['ms'] - before['ms'] > NOISE_FLOOR_MS
+            print(f"  {'❌' if slower else '✅'} {name:<17} {before['ms']:8.1f} → {now['ms']:8.1f} ms ({ratio:5.2f}x)")
+            if slower:
+                failures.append(f"{name} mais lento")
+
+    if failures:
+        print(f"\n❌ {'; '.join(failures)}")
+        return 1
+    print("\n✅ Imports dentro da referência")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Paridade e custo do motor incremental de indicadores do modo daemon
+Compara o IncrementalIndicators com o TechnicalAnalyzer (backend ta)
+sobre a mesma série: warm_up do histórico inteiro, warm_up da metade
+seguido de update vela a vela, peek de cada vela antes do update (sem
+alterar o estado) e estado gravado/relido em JSON no meio da série
+pelo IndicatorStateStore. NaN precisa coincidir e o erro, relativo à
+escala de cada coluna, fica abaixo de TOLERANCE.
+
+Uso: python benchmarks/bench_incremental_indicators.py [--sizes 500 5000]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from bench_indicators import make_ohlcv
+from modules.incremental_indicators import IncrementalIndicators, IndicatorStateStore
+from modules.technical_analysis import TechnicalAnalyzer, INDICATOR_COLUMNS
+
+TOLERANCE = 1e-9  # Erro máximo aceito contra o ta (relativo à escala da coluna)
+
+def as_row(values):
+    return [values[col] for col in INDICATOR_COLUMNS]
+
+def max_error(reference, candidate):
+    """Erro máximo relativo à escala de cada coluna (None se os NaN não coincidem)"""
+    candidate = np.asarray(candidate, dtype=np.float64)
+    if not (np.isnan(reference) == np.isnan(candidate)).all():
+        return None
+
+    scale = np.maximum(np.nanmax(np.abs(reference), axis=0), 1e-12)
+    diff = np.abs(candidate - reference) / scale
+    return float(np.nanmax(diff)) if not np.isnan(diff).all() else 0.0
+
+def bars(df):
+    """(timestamp, high, low, close, volume) de cada vela"""
+    return zip(df.index, df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy(), df['Volume'].to_numpy())
+
+def check_series(df, state_dir):
+    """
+    Returns:
+        ({cenário: erro máximo ou None}, µs por update)
+    """
+    reference = TechnicalAnalyzer(df).df[INDICATOR_COLUMNS].to_numpy(dtype=np.float64)
+    half = len(df) // 2
+    errors = {}
+
+    # Histórico inteiro de uma vez
+    errors['warm_up'] = max_error(reference, IncrementalIndicators().warm_up(df).to_numpy())
+
+    # Metade no warm_up, resto vela a vela (peek antes de cada update)
+    engine = IncrementalIndicators()
+    rows = engine.warm_up(df.iloc[:half]).to_numpy().tolist()
+    peeked = []
+    elapsed = 0.0
+    for ts, high, low, close, volume in bars(df.iloc[half:]):
+        peeked.append(as_row(engine.peek(ts, high, low, close, volume)))
+        start = time.perf_counter()
+        values = engine.update(ts, high, low, close, volume)
+        elapsed += time.perf_counter() - start
+        rows.append(as_row(values))
+    update_us = elapsed / (len(df) - half) * 1e6
+    errors['update'] = max_error(reference, rows)
+    errors['peek'] = max_error(reference[half:], peeked)
+
+    # Estado gravado no meio da série e relido num motor novo
+    store = IndicatorStateStore(base_dir=state_dir)
+    engine = IncrementalIndicators()
+    rows = engine.warm_up(df.iloc[:half]).to_numpy().tolist()
+    store.save('BENCH', '15m', engine)
+    restored = store.load('BENCH', '15m')
+    for ts, high, low, close, volume in bars(df.iloc[half:]):
+        rows.append(as_row(restored.update(ts, high, low, close, volume)))
+    errors['save/load'] = max_error(reference, rows)
+
+    return errors, update_us
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000])
+    args = parser.parse_args()
+
+    backend = config.INDICATOR_BACKEND
+    config.INDICATOR_BACKEND = 'ta'
+    state_dir = tempfile.mkdtemp(prefix='incremental-bench-')
+    failures = []
+
+    try:
+        for rows in args.sizes:
+            df = make_ohlcv(rows)
+            errors, update_us = check_series(df, state_dir)
+
+            start = time.perf_counter()
+            TechnicalAnalyzer(df)
+            ta_ms = (time.perf_counter() - start) * 1000
+
+            report = ' | '.join(
+                f"{name} {'NaN divergente' if error is None else f'{error:.1e}'}" for name, error in errors.items()
+            )
+            print(f"{rows:>6} velas | update {update_us:7.1f} µs/vela | ta (série inteira) {ta_ms:8.2f} ms | erro: {report}")
+
+            failures += [f"{rows} velas/{name}" for name, error in errors.items() if error is None or error >= TOLERANCE]
+    finally:
+        config.INDICATOR_BACKEND = backend
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    if failures:
+        print(f"❌ Motor incremental diverge do ta (tolerância {TOLERANCE:.0e}): {', '.join(failures)}")
+        return 1
+    print(f"✅ warm_up, update, peek e estado em JSON idênticos ao ta (tolerância {TOLERANCE:.0e})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark e paridade dos backends de indicadores
+Compara o backend 'ta' do TechnicalAnalyzer com o backend NumPy
+(modules.indicators_numpy) em séries sintéticas de vários tamanhos.
+
+Uso: python benchmarks/bench_indicators.py [--sizes 500 5000 50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from modules.indicators_numpy import compute_indicators
+from modules.technical_analysis import TechnicalAnalyzer, INDICATOR_COLUMNS
+
+TOLERANCE = 1e-8  # Erro máximo aceito contra o ta (relativo à escala da coluna)
+
+def make_ohlcv(rows, seed=7):
+    """Random walk OHLCV M15"""
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0005, rows))
+    spread = np.abs(rng.normal(0, 0.0003, rows))
+    index = pd.date_range('2020-01-01', periods=rows, freq='15min', name='datetime')
+
+    return pd.DataFrame({
+        'Open': close - rng.normal(0, 0.0002, rows),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100, 5000, rows).astype(np.float64)
+    }, index=index)
+
+def timed(func, repeat):
+    """Melhor tempo (ms) entre repeat execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def check_parity(df):
+    """
+    Erro máximo entre os backends, relativo à escala de cada coluna
+
+    (MACD cruza zero, então erro relativo ponto a ponto não serve.)
+    NaN precisa coincidir.
+    """
+    config.INDICATOR_BACKEND = 'ta'
+    reference = TechnicalAnalyzer(df).df[INDICATOR_COLUMNS].to_numpy()
+
+    arrays = compute_indicators(df['High'], df['Low'], df['Close'], df['Volume'])
+    candidate = np.column_stack(arrays)
+
+    assert (np.isnan(reference) == np.isnan(candidate)).all(), "NaN em posições diferentes"
+
+    scale = np.maximum(np.nanmax(np.abs(reference), axis=0), 1e-12)
+    return float(np.nanmax(np.abs(candidate - reference) / scale))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backend = config.INDICATOR_BACKEND
+
+    for rows in args.sizes:
+        df = make_ohlcv(rows)
+
+        error = check_parity(df)
+        assert error < TOLERANCE, f"paridade falhou: erro relativo {error:.2e}"
+
+        config.INDICATOR_BACKEND = 'ta'
+        t_ta = timed(lambda: TechnicalAnalyzer(df), args.repeat)
+
+        config.INDICATOR_BACKEND = 'numpy'
+        t_analyzer = timed(lambda: TechnicalAnalyzer(df), args.repeat)
+
+        high, low = df['High'].to_numpy(), df['Low'].to_numpy()
+        close, volume = df['Close'].to_numpy(), df['Volume'].to_numpy()
+        t_arrays = timed(lambda: compute_indicators(high, low, close, volume), args.repeat)
+
+        print(
+            f"{rows:>6} velas | ta {t_ta:9.2f} ms | numpy (TechnicalAnalyzer) {t_analyzer:7.2f} ms"
+            f" | numpy (arrays) {t_arrays:7.2f} ms | {t_ta / t_arrays:6.1f}x | erro máx {error:.1e}"
+        )
+
+    config.INDICATOR_BACKEND = backend
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark da covariância incremental do risco de portfólio
+Simula execuções sucessivas (uma vela M15 nova por execução) sobre
+um universo de retornos correlacionados e compara a atualização
+incremental do ReturnCovariance com a reconstrução sobre a janela
+buscada. A matriz incremental precisa coincidir com a EWMA de todo o
+histórico.
+
+Uso: python benchmarks/bench_portfolio_risk.py [--symbols 300] [--bars 480] [--runs 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.portfolio_risk import PortfolioRisk, ReturnCovariance
+
+TOLERANCE = 1e-9  # Erro máximo relativo à maior variância
+
+def make_closes(symbols, bars, seed=5):
+    """Closes com fator comum (USD) + ruído próprio, índice M15"""
+    rng = np.random.default_rng(seed)
+    factor = rng.normal(0, 0.0006, bars)
+    loadings = rng.uniform(-1, 1, symbols)
+    returns = factor[:, None] * loadings + rng.normal(0, 0.0004, (bars, symbols))
+    index = pd.date_range('2024-01-01', periods=bars, freq='15min')
+    names = [f'C{i:03d}USD' for i in range(symbols)]
+    return pd.DataFrame(1.1 * np.exp(np.cumsum(returns, axis=0)), index=index, columns=names)
+
+def full_ewma(prices, decay):
+    """Referência: EWMA de todos os retornos do histórico"""
+    returns = np.diff(np.log(prices.to_numpy()), axis=0)
+    weights = (1 - decay) * decay ** np.arange(len(returns) - 1, -1, -1)
+    return returns.T @ (returns * weights[:, None])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--bars', type=int, default=480, help='histórico buscado por execução')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    prices = make_closes(args.symbols, args.bars + args.runs)
+    covariance = ReturnCovariance(path='')
+
+    start = time.perf_counter()
+    covariance.update({name: prices[name].iloc[:args.bars] for name in prices.columns})
+    bootstrap = time.perf_counter() - start
+
+    incremental = 0.0
+    recompute = 0.0
+    for run in range(1, args.runs + 1):
+        # Cada execução busca a mesma janela, deslocada de uma vela
+        window = prices.iloc[run:args.bars + run]
+        closes = {name: window[name] for name in window.columns}
+
+        start = time.perf_counter()
+        covariance.update(closes)
+        incremental += time.perf_counter() - start
+
+        # Sem estado salvo: reconstrói a matriz sobre toda a janela buscada
+        start = time.perf_counter()
+        ReturnCovariance(path='').update(closes)
+        recompute += time.perf_counter() - start
+
+    reference = full_ewma(prices.iloc[:args.bars + args.runs], covariance.decay)
+    error = float(np.abs(covariance.cov - reference).max() / np.abs(np.diag(reference)).max())
+
+    print(f"Universo: {args.symbols} pares | histórico {args.bars} velas | {args.runs} execuções")
+    print(f"  bootstrap:    {bootstrap * 1000:.1f} ms")
+    print(f"  incremental:  {incremental / args.runs * 1000:.2f} ms/execução")
+    print(f"  recálculo:    {recompute / args.runs * 1000:.2f} ms/execução ({recompute / incremental:.0f}x)")
+
+    # Sanidade do orçamento: sinais BUY nos pares mais correlacionados
+    corr = covariance.correlation(list(prices.columns))
+    pair = np.unravel_index(np.argmax(corr - np.eye(len(corr))), corr.shape)
+    signals = [
+        {'pair': prices.columns[i], 'direction': 'BUY', 'vti_score': '3/3', 'confidence': 85,
+         'position': {'position_size': 1000.0, 'position_value': 1100.0, 'risk_amount': 150.0, 'risk_percentage': 1.5}}
+        for i in pair
+    ]
+    portfolio = PortfolioRisk(covariance, budget=2.5, currency_cap=100)
+    accepted, _ = portfolio.apply(signals)
+    print(f"  correlação {corr[pair]:.2f}: risco combinado {portfolio.last_risk:.2f}% (orçamento 2.5%)")
+
+    if error > TOLERANCE or portfolio.last_risk > 2.5 + 1e-9:
+        print(f"❌ Covariância incremental diverge do recálculo (erro {error:.2e}) ou orçamento excedido")
+        return 1
+    print(f"✅ Covariância idêntica ao recálculo (erro {error:.1e})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark do acompanhamento de posições
+Abre posições em muitos símbolos, alimenta cotações do RandomWalkSource
+e compara o PositionTracker (níveis ordenados + busca binária) com a
+varredura de todas as posições a cada tick. Os eventos das duas
+implementações precisam ser idênticos. No fim, as posições ainda
+abertas saem a mercado (como numa reversão do sinal) e o R realizado
+total precisa bater com o calculado a partir da varredura.
+
+Uso: python benchmarks/bench_position_tracker.py [--symbols 20] [--positions 250] [--ticks 200000]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from modules.position_tracker import PositionTracker
+from modules.price_feed import RandomWalkSource
+
+def make_positions(symbols, per_symbol, seed=7):
+    """(id, par, direção, entrada, stop, (tp1, tp2, tp3)) com risco de 0.2% a 1%"""
+    rng = random.Random(seed)
+    positions = []
+
+    for i in range(symbols):
+        for j in range(per_symbol):
+            direction = 'BUY' if j % 2 == 0 else 'SELL'
+            sign = 1 if direction == 'BUY' else -1
+            entry = rng.uniform(0.99, 1.01)
+            risk = entry * rng.uniform(0.002, 0.01)
+            positions.append((
+                f'SYM{i}#{j}', f'SYM{i}', direction, entry, entry - sign * risk,
+                tuple(entry + sign * rr * risk for rr in (1.5, 2.5, 4.0))
+            ))
+
+    return positions
+
+def naive_run(positions, ticks):
+    """Referência: a cada tick, varre todos os níveis pendentes do símbolo"""
+    open_levels = {}
+    for position_id, pair, direction, entry, stop_loss, tps in positions:
+        buy = direction == 'BUY'
+        levels = [('tp1', tps[0]), ('tp2', tps[1]), ('tp3', tps[2]), ('sl', stop_loss)]
+        open_levels.setdefault(pair, []).append((position_id, buy, levels))
+
+    events = []
+    for pair, _, price in ticks:
+        for position_id, buy, levels in open_levels.get(pair, []):
+            if not levels:
+                continue
+
+            # TPs de BUY e stop de SELL disparam acima; os demais abaixo
+            hit = [
+                (kind, level) for kind, level in levels
+                if ((kind == 'sl') != buy and price >= level) or ((kind == 'sl') == buy and price <= level)
+            ]
+            for kind, level in sorted(hit):
+                events.append((position_id, kind))
+                if kind in ('sl', 'tp3'):
+                    levels.clear()
+                    break
+                levels.remove((kind, level))
+
+    return events
+
+def naive_r(positions, events, last_prices):
+    """R total da referência: TPs/SL disparados + fração restante a mercado no último preço"""
+    hits = {}
+    for position_id, kind in events:
+        hits.setdefault(position_id, []).append(kind)
+
+    total = 0.0
+    for position_id, pair, direction, entry, stop_loss, tps in positions:
+        sign = 1 if direction == 'BUY' else -1
+        risk = abs(entry - stop_loss)
+        remaining = 1.0
+        for kind in hits.get(position_id, []):
+            if kind == 'sl':
+                total -= remaining
+                remaining = 0.0
+            else:
+                weight = config.TP_WEIGHTS[int(kind[2]) - 1]
+                total += weight * abs(tps[int(kind[2]) - 1] - entry) / risk
+                remaining -= weight
+        if remaining > 1e-12:
+            total += remaining * sign * (last_prices[pair] - entry) / risk
+
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--positions', type=int, default=250, help='posições por símbolo')
+    parser.add_argument('--ticks', type=int, default=200000)
+    args = parser.parse_args()
+
+    positions = make_positions(args.symbols, args.positions)
+    pairs = sorted({position[1] for position in positions})
+    source = RandomWalkSource({pair: 1.0 for pair in pairs}, args.ticks, volatility=0.0005, seed=11)
+    ticks = list(source.ticks())
+
+    events = []
+    tracker = PositionTracker(on_event=events.append, closed_file='')
+    for position_id, pair, direction, entry, stop_loss, tps in positions:
+        tracker.open(pair, direction, entry, stop_loss, tps, position_id=position_id)
+
+    start = time.perf_counter()
+    for pair, timestamp, price in ticks:
+        tracker.on_price(pair, price, timestamp)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = naive_run(positions, ticks)
+    naive_elapsed = time.perf_counter() - start
+
+    # Saída a mercado das posições restantes no último preço de cada símbolo
+    # (o resultado gravado é arredondado em 4 casas por posição)
+    last_prices = {pair: price for pair, _, price in ticks}
+    for position_id, pair, direction, _, _, _ in positions:
+        tracker.close(pair, direction, last_prices[pair], ticks[-1][1], position_id=position_id)
+
+    got = [(e['position']['id'], e['type']) for e in events]
+    realized = sum(r['r_multiple'] for r in tracker.realized)
+    expected_r = naive_r(positions, reference, last_prices)
+    print(f"Posições: {len(positions)} ({len(positions) * 4} níveis) em {len(pairs)} símbolos | Ticks: {len(ticks)}")
+    print(f"  tracker:   {elapsed:.3f}s ({len(ticks) / elapsed:,.0f} ticks/s) | {len(events)} eventos")
+    print(f"  varredura: {naive_elapsed:.3f}s ({len(ticks) / naive_elapsed:,.0f} ticks/s)")
+    print(f"  R realizado: {realized:+.2f} em {len(tracker.realized)} posições encerradas"
+          f" (referência {expected_r:+.2f})")
+
+    # A ordem entre posições diferentes num mesmo tick pode variar
+    if len(got) != len(reference) or set(got) != set(reference):
+        print("❌ Eventos divergem da varredura")
+        return 1
+    if len(tracker.realized) != len(positions) or not math.isclose(realized, expected_r, abs_tol=5e-5 * len(positions)):
+        print("❌ R realizado diverge da referência")
+        return 1
+    print("✅ Eventos e R realizado idênticos")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
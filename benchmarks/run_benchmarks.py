@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do caminho de análise
+Cronometra cada etapa (busca, decode, resampling, indicadores, VTI,
+direção, risco, formatação da mensagem e o sinal completo) e o pico de
+memória de cada uma, sobre fixtures sintéticas de vários tamanhos, um
+conjunto fixo de respostas geradas de forma determinística com o
+formato e a precisão de cada classe de instrumento (forex, JPY, ouro
+com volume) e, se existirem, respostas gravadas do Twelve Data
+(benchmarks/fixtures). Roda offline: o HTTP do DataFetcher é
+substituído pelas fixtures e o store local fica desligado.
+
+Uso:
+  python benchmarks/run_benchmarks.py [--sizes 500 3000 20000] [--output FILE]
+  python benchmarks/run_benchmarks.py --compare BASE.json [--threshold 0.15]
+  python benchmarks/run_benchmarks.py --record EURUSD GBPUSD   (requer rede e TWELVE_DATA_KEY)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+sys.path.insert(0, ROOT_DIR)
+
+import config
+from bench_decode import make_payload
+from modules.data_fetcher import DataFetcher
+from modules.feature_cache import get_feature_cache
+from modules.ohlcv_decoder import decode_time_series
+from modules.rate_limiter import TokenBucket
+from modules.risk_manager import RiskManager
+from modules.signal_generator import SignalGenerator
+from modules.technical_analysis import TechnicalAnalyzer
+from modules.telegram_notifier import TelegramNotifier
+from modules.vti_analyzer import VTIAnalyzer
+
+STAGES = ['fetch', 'decode', 'resample', 'indicators', 'vti', 'direction', 'risk', 'format', 'signal']
+NOISE_FLOOR_MS = 0.05  # Diferenças abaixo disso não contam como regressão
+
+# Fixtures de mercado: (símbolo, preço inicial, casas decimais, volume real, velas)
+MARKET_FIXTURES = [
+    ('EURUSD', 1.0850, 5, False, 5000),
+    ('USDJPY', 151.20, 3, False, 5000),
+    ('XAUUSD', 2330.0, 2, True, 5000)
+]
+
+
+class FixtureResponse:
+    """Resposta HTTP mínima (status_code + json())"""
+
+    def __init__(self, body):
+        self.status_code = 200
+        self.text = body
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FixtureHTTP:
+    """
+    Substitui o HTTPClient do DataFetcher
+
+    Responde o endpoint time_series com os payloads carregados
+    ({(td_symbol, td_interval): resposta}), cortados em outputsize. O
+    corpo JSON é serializado uma vez por pedido distinto, então a
+    medida inclui o json.loads como numa resposta real.
+    """
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.bodies = {}
+
+    def get(self, url, params=None, **kwargs):
+        key = (params['symbol'], params['interval'], int(params['outputsize']))
+
+        if key not in self.bodies:
+            symbols = params['symbol'].split(',')
+            entries = {}
+            for symbol in symbols:
+                payload = self.payloads.get((symbol, params['interval']))
+                if payload is None:
+                    entries[symbol] = {'status': 'error', 'message': 'fixture ausente'}
+                else:
+                    entries[symbol] = dict(payload, values=payload['values'][:key[2]])
+            self.bodies[key] = json.dumps(entries[symbols[0]] if len(symbols) == 1 else entries)
+
+        return FixtureResponse(self.bodies[key])
+
+
+def make_market_payload(symbol, price, decimals, real_volume, rows, seed):
+    """
+    Resposta time_series M15 determinística no formato do Twelve Data
+
+    Random walk com tendência e volatilidade por regime, sem fins de
+    semana, preços na precisão do instrumento e volume só onde a API
+    o envia (mais recente primeiro).
+    """
+    rng = np.random.default_rng(seed)
+    regimes = np.repeat(rng.choice([-1, 0, 1], rows // 250 + 1), 250)[:rows]
+    vol = np.repeat(rng.uniform(0.0004, 0.0012, rows // 500 + 1), 500)[:rows]
+    close = price * np.exp(np.cumsum(regimes * 0.00006 + rng.normal(0, 1, rows) * vol))
+    open_ = np.concatenate([[price], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.5, (2, rows))) * vol * close
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+
+    stamps = pd.date_range(end='2024-06-28 20:45', periods=rows * 7 // 5 + 96 * 7, freq='15min')
+    stamps = stamps[stamps.dayofweek < 5][-rows:]
+
+    values = []
+    for i in range(rows - 1, -1, -1):
+        item = {
+            'datetime': stamps[i].strftime('%Y-%m-%d %H:%M:%S'),
+            'open': f"{open_[i]:.{decimals}f}",
+            'high': f"{high[i]:.{decimals}f}",
+            'low': f"{low[i]:.{decimals}f}",
+            'close': f"{close[i]:.{decimals}f}"
+        }
+        if real_volume:
+            item['volume'] = str(int(rng.integers(100, 50000)))
+        values.append(item)
+
+    return {
+        'meta': {'symbol': f"{symbol[:3]}/{symbol[3:]}", 'interval': '15min'},
+        'values': values,
+        'status': 'ok'
+    }
+
+def load_fixtures(sizes):
+    """
+    Fixtures {nome: (símbolo, resposta time_series M15)}
+
+    Sintéticas para cada tamanho + as de mercado (MARKET_FIXTURES,
+    sempre as mesmas) + toda resposta gravada em
+    benchmarks/fixtures/<SÍMBOLO>_15min.json.
+    """
+    fixtures = {}
+
+    for rows in sizes:
+        fixtures[f'synthetic-{rows}'] = ('EURUSD', {
+            'meta': {'symbol': 'EUR/USD', 'interval': '15min'},
+            'values': make_payload(rows),
+            'status': 'ok'
+        })
+
+    for seed, (symbol, price, decimals, real_volume, rows) in enumerate(MARKET_FIXTURES):
+        fixtures[f'market-{symbol}'] = (symbol, make_market_payload(symbol, price, decimals, real_volume, rows, seed))
+
+    if os.path.isdir(FIXTURES_DIR):
+        for filename in sorted(os.listdir(FIXTURES_DIR)):
+            if filename.endswith('_15min.json'):
+                symbol = filename.split('_')[0]
+                with open(os.path.join(FIXTURES_DIR, filename)) as f:
+                    fixtures[f'recorded-{symbol}'] = (symbol, json.load(f))
+
+    return fixtures
+
+def record_fixtures(symbols, outputsize):
+    """Grava respostas reais do Twelve Data como fixtures"""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    fetcher = DataFetcher()
+
+    for symbol in symbols:
+        td_symbol = fetcher.symbol_map.get(symbol, symbol)
+        data = fetcher._request_time_series(td_symbol, '15min', outputsize)
+
+        if not data or 'values' not in data:
+            print(f"❌ {symbol}: resposta sem dados, fixture não gravada")
+            continue
+
+        path = os.path.join(FIXTURES_DIR, f"{symbol}_15min.json")
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        print(f"💾 {symbol}: {len(data['values'])} velas em {path}")
+
+def quiet(func):
+    """Executa func descartando os prints"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func()
+
+def measure(func, repeat):
+    """
+    Melhor tempo (ms) entre repeat execuções e pico de memória (KiB)
+
+    O pico vem de uma execução separada sob tracemalloc, que distorce
+    o tempo.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        quiet(func)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    quiet(func)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'ms': round(best * 1000, 4), 'peak_kib': round(peak / 1024, 1)}
+
+def forced_signal(pair, data):
+    """Sinal BUY completo (a estratégia pode não gerar sinal na fixture)"""
+    generator = SignalGenerator(pair, pair, data)
+    generator.vti.calculate_vti_score = lambda: 3
+    generator._determine_direction = lambda: 'BUY'
+    return generator.generate_signal()
+
+def bench_fixture(symbol, payload, repeat):
+    """Mede todas as etapas sobre uma fixture"""
+    # Sem store local nem espera de rate limit: só o custo de CPU entra na medida
+    fetcher = DataFetcher(use_store=False)
+    fetcher.http = FixtureHTTP({(fetcher.symbol_map.get(symbol, symbol), '15min'): payload})
+    fetcher.rate_limiter = TokenBucket(10 ** 9, 10 ** 9)
+    rows = len(payload['values'])
+    cache = get_feature_cache()
+
+    df = decode_time_series(payload['values'])
+    data = {
+        '15m': df,
+        '1h': fetcher.resample_ohlcv(df, '1h'),
+        '4h': fetcher.resample_ohlcv(df, '4h')
+    }
+    tech = TechnicalAnalyzer(df)
+    generator = SignalGenerator(symbol, symbol, data)
+    signal = quiet(lambda: forced_signal(symbol, data))
+    notifier = TelegramNotifier()
+
+    def vti():
+        cache.invalidate()
+        return VTIAnalyzer(symbol, data, tech).calculate_vti_score()
+
+    def risk():
+        manager = RiskManager(generator.current_price, generator.atr)
+        stop_loss = manager.calculate_stop_loss('BUY', tech.get_support_resistance())
+        take_profits = manager.calculate_take_profits('BUY', stop_loss)
+        manager.calculate_position_size(stop_loss)
+        return manager.validate_risk_reward(stop_loss, take_profits['tp2'])
+
+    def full_signal():
+        cache.invalidate()
+        return SignalGenerator(symbol, symbol, data).generate_signal()
+
+    stages = {
+        'fetch': lambda: fetcher.fetch_ohlcv(symbol, '15m', outputsize=rows),
+        'decode': lambda: decode_time_series(payload['values']),
+        'resample': lambda: (fetcher.resample_ohlcv(df, '1h'), fetcher.resample_ohlcv(df, '4h')),
+        'indicators': lambda: TechnicalAnalyzer(df),
+        'vti': vti,
+        'direction': generator._determine_direction,
+        'risk': risk,
+        'format': lambda: notifier._format_signal_message(signal),
+        'signal': full_signal
+    }
+
+    return {stage: measure(stages[stage], repeat) for stage in STAGES}
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'local'
+
+def run(sizes, repeat):
+    """Executa o benchmark completo e devolve o documento de resultados"""
+    results = {}
+
+    for name, (symbol, payload) in load_fixtures(sizes).items():
+        results[name] = bench_fixture(symbol, payload, repeat)
+
+        line = ' | '.join(f"{stage} {results[name][stage]['ms']:.2f}" for stage in STAGES)
+        print(f"{name:>18}: {line} (ms)")
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'indicator_backend': config.INDICATOR_BACKEND,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+def compare(base, current, threshold):
+    """
+    Compara dois documentos de resultados
+
+    Returns:
+        Lista de regressões (fixture/etapa mais lenta ou com pico de
+        memória maior que base * (1 + threshold))
+    """
+    regressions = []
+
+    for name, stages in current['results'].items():
+        for stage, now in stages.items():
+            before = base['results'].get(name, {}).get(stage)
+            if before is None:
+                continue
+
+            ratio = now['ms'] / before['ms'] if before['ms'] else 1.0
+            mem_ratio = now['peak_kib'] / before['peak_kib'] if before['peak_kib'] else 1.0
+            slower = ratio > 1 + threshold and now['ms'] - before['ms'] > NOISE_FLOOR_MS
+            bigger = mem_ratio > 1 + threshold
+
+            mark = '❌' if slower or bigger else '✅'
+            print(f"  {mark} {name:>18} {stage:<11} {before['ms']:9.2f} → {now['ms']:9.2f} ms ({ratio:5.2f}x)"
+                  f" | pico {before['peak_kib']:9.1f} → {now['peak_kib']:9.1f} KiB ({mem_ratio:5.2f}x)")
+
+            if slower or bigger:
+                regressions.append(f"{name}/{stage}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 3000, 20000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', metavar='BASE', help='JSON de referência para detectar regressões')
+    parser.add_argument('--threshold', type=float, default=0.15, help='piora relativa tolerada (0.15 = 15%%)')
+    parser.add_argument('--record', metavar='SYMBOL', nargs='+', help='grava fixtures reais do Twelve Data')
+    parser.add_argument('--record-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, args.record_size)
+        return 0
+
+    document = run(args.sizes, args.repeat)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{document['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"\n💾 Resultados: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+
+        print(f"\n📊 Comparação com {base['meta']['commit']} (limite {args.threshold:.0%})")
+        regressions = compare(base, document, args.threshold)
+
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressão(ões): {', '.join(regressions)}")
+            return 1
+        print("\n✅ Sem regressões")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,13 +28,168 @@ ANALYSIS_INTERVAL = 480  # 8 horas (em minutos)
 
 # ===== TELEGRAM =====
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
-TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
+TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')  # Vários chats: IDs separados por vírgula
+
+# Fila de envio assíncrona (sem ela, cada mensagem é enviada na hora)
+TELEGRAM_ASYNC = os.environ.get('TELEGRAM_ASYNC', '1') == '1'
+TELEGRAM_CHAT_RATE = 20         # Mensagens/min por chat (limite de grupos)
+TELEGRAM_CHAT_BURST = 3
+TELEGRAM_GLOBAL_RATE = 1800     # Mensagens/min do bot (30/s)
+TELEGRAM_MERGE_SIGNALS = int(os.environ.get('TELEGRAM_MERGE_SIGNALS', 1))  # Sinais por mensagem (1 = sem agrupar)
+TELEGRAM_MAX_MESSAGE = 4096     # Caracteres por mensagem
+TELEGRAM_MAX_ATTEMPTS = 5       # Depois disso a mensagem fica no spool para a próxima execução
+TELEGRAM_FLUSH_TIMEOUT = 120    # Segundos esperando a fila esvaziar no fim da execução
+TELEGRAM_SPOOL_DIR = os.environ.get(
+    'TELEGRAM_SPOOL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'telegram_spool')
+)
+
+# ===== NOTIFICAÇÕES (barramento de sinks) =====
+NOTIFY_WEBHOOK_URLS = [u.strip() for u in os.environ.get('NOTIFY_WEBHOOK_URLS', '').split(',') if u.strip()]
+NOTIFY_JSONL_FILE = os.environ.get('NOTIFY_JSONL_FILE', '')  # Vazio = sem arquivo de sinais
+NOTIFY_SINK_RATE = 60           # Entregas/min padrão por sink
+NOTIFY_WEBHOOK_RATE = 120
+NOTIFY_WEBHOOK_RETRIES = 2
+NOTIFY_MAX_FAILURES = 5         # Falhas seguidas até o sink ser pausado
+NOTIFY_COOLDOWN_SECONDS = 300
+NOTIFY_FLUSH_TIMEOUT = 120
+
+# ===== ESTADO DOS SINAIS (deduplicação entre execuções) =====
+SIGNAL_STORE_ENABLED = os.environ.get('SIGNAL_STORE', '1') == '1'
+SIGNAL_STORE_FILE = os.environ.get(
+    'SIGNAL_STORE_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'signals.db')
+)
+SIGNAL_LEVEL_TOLERANCE_R = 0.25  # SL/TP deslocado mais que isso (em R do sinal enviado) = mudança relevante
+# Análises seguidas sem reconfirmação até encerrar o sinal (barras M15 no daemon, execuções no batch)
+SIGNAL_STALE_BARS = int(os.environ.get('SIGNAL_STALE_BARS', 4))
 
 # ===== TWELVE DATA (Cotações) =====
 TWELVE_DATA_KEY = os.environ.get('TWELVE_DATA_KEY', 'demo')
 
+# ===== RATE LIMIT / CONCORRÊNCIA =====
+TWELVE_DATA_RATE_LIMIT = int(os.environ.get('TWELVE_DATA_RATE_LIMIT', 8))  # Requisições/min (free: 8)
+TWELVE_DATA_BURST = int(os.environ.get('TWELVE_DATA_BURST', 1))  # Bucket cheio no início: burst alto estoura a cota do 1º minuto
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', 4))
+BATCH_REQUESTS = os.environ.get('BATCH_REQUESTS', '1') == '1'  # Vários símbolos por requisição
+BATCH_MAX_SYMBOLS = 120  # Limite de símbolos por lote do Twelve Data
+
+# ===== PIPELINE (análise multi-core) =====
+PIPELINE_MODE = os.environ.get('PIPELINE_MODE', '0') == '1'  # Busca e análise em etapas paralelas
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 0))  # Processos de análise (0 = nº de CPUs)
+PIPELINE_CHUNK = int(os.environ.get('PIPELINE_CHUNK', BATCH_MAX_SYMBOLS))  # Pares por lote de busca
+
+# ===== TRIAGEM (universo inteiro como matriz) =====
+SCREEN_MODE = os.environ.get('SCREEN_MODE', '0') == '1'  # Só candidatos da triagem vão ao SignalGenerator
+
+# ===== HTTP (pool, retries, timeouts) =====
+HTTP_KEEP_ALIVE = os.environ.get('HTTP_KEEP_ALIVE', '1') == '1'
+HTTP_POOL_CONNECTIONS = 10     # Hosts distintos mantidos no pool
+HTTP_POOL_MAXSIZE = 16         # Conexões simultâneas por host
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_BASE = 1.0        # Segundos (dobra a cada tentativa, com jitter)
+HTTP_BACKOFF_MAX = 30.0
+HTTP_RETRY_AFTER_MAX = 120.0   # Teto para Retry-After do servidor
+HTTP_DEFAULT_TIMEOUT = 30
+HTTP_TIMEOUTS = {
+    'api.twelvedata.com': 30,
+    'api.tradingeconomics.com': 30,
+    'api.telegram.org': 10
+}
+
+# ===== MÉTRICAS =====
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'  # Desligado: registro no-op
+METRICS_JSON_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metrics.json')  # Modo lote
+METRICS_FILE = os.environ.get(
+    'METRICS_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metrics.prom')
+)  # OpenMetrics do modo daemon
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))  # Endpoint /metrics no daemon (0 = desligado)
+METRICS_EXPORT_SECONDS = 15
+
+# ===== STORE LOCAL DE VELAS =====
+CANDLE_STORE_ENABLED = os.environ.get('CANDLE_STORE_ENABLED', '1') == '1'
+CANDLE_STORE_DIR = os.environ.get(
+    'CANDLE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'candles')
+)
+CANDLE_STORE_MAX_BARS = 5000  # Histórico máximo mantido por (par, timeframe)
+CANDLE_STORE_OVERLAP = 2      # Velas re-buscadas para fechar a vela em formação
+
+# ===== ARQUIVO HISTÓRICO (colunas memory-mapped) =====
+CANDLE_ARCHIVE_ENABLED = os.environ.get('CANDLE_ARCHIVE_ENABLED', '1') == '1'
+CANDLE_ARCHIVE_DIR = os.environ.get(
+    'CANDLE_ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'archive')
+)
+
+# ===== VELAS COMPACTAS (universos grandes / histórico profundo) =====
+COMPACT_CANDLES = os.environ.get('COMPACT_CANDLES', '0') == '1'  # OHLC int32 escalado, índice int32, indicadores em bloco compartilhado
+
+# ===== RESAMPLING (H1/H4 derivados de M15) =====
+RESAMPLE_HIGHER_TIMEFRAMES = os.environ.get('RESAMPLE_HIGHER_TIMEFRAMES', '1') == '1'
+RESAMPLE_M15_DEPTH = 3000  # 720 H1 / 180 H4 = 2880 M15, + margem p/ buckets parciais
+RESAMPLE_OFFSET = '0h'     # Borda dos buckets: 00:00 UTC + offset (ex: '22h' p/ sessão NY)
+
+# ===== STREAMING (modo daemon) =====
+STREAM_URL = os.environ.get('STREAM_URL', 'wss://ws.twelvedata.com/v1/quotes/price')
+STREAM_HEARTBEAT_SECONDS = 10   # Twelve Data pede heartbeat a cada 10s
+STREAM_IDLE_SECONDS = 5         # Sem ticks por N s: checa barras vencidas
+STREAM_RECONNECT_MAX = 60       # Backoff máximo de reconexão (s)
+STREAM_REPLAY_SPEED = float(os.environ.get('STREAM_REPLAY_SPEED', 0))  # 0 = máx. velocidade
+
+# ===== ACOMPANHAMENTO DE POSIÇÕES (modo daemon) =====
+POSITION_TRACKING = os.environ.get('POSITION_TRACKING', '1') == '1'
+POSITIONS_CLOSED_FILE = os.environ.get(
+    'POSITIONS_CLOSED_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'closed_positions.jsonl')
+)
+
+# ===== INDICADORES INCREMENTAIS (modo daemon) =====
+INDICATOR_STATE_DIR = os.environ.get(
+    'INDICATOR_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'indicator_state')
+)
+INDICATOR_STATE_TAIL = 50  # Últimas saídas guardadas junto com o estado
+
+# ===== BACKTEST =====
+BACKTEST_DATA_DIR = os.environ.get(
+    'BACKTEST_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'history')
+)
+BACKTEST_MAX_HOLD_BARS = 480   # Velas M15 até encerrar a posição no close (5 dias)
+BACKTEST_ONE_POSITION = True   # No máximo uma posição aberta por par
+BACKTEST_TRADES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'backtest_trades.csv')
+
+# ===== OTIMIZADOR (varredura de parâmetros) =====
+OPTIMIZER_SPACE = {
+    'rsi_period': [10, 14, 21],
+    'macd_fast': [8, 12],
+    'macd_slow': [21, 26],
+    'macd_signal': [7, 9],
+    'atr_period': [10, 14, 21],
+    'vti_threshold': [2, 3],
+    'min_risk_reward': [1.5, 2.0],
+    'stop_mode': ['sr', 'atr'],
+    'atr_stop_mult': [1.0, 1.5, 2.0]
+}
+OPTIMIZER_WORKERS = int(os.environ.get('OPTIMIZER_WORKERS', 0))  # 0 = nº de CPUs
+OPTIMIZER_OBJECTIVE = 'expectancy_r'   # Métrica de summarize() a maximizar
+OPTIMIZER_MIN_TRADES = 30              # Combinações com menos trades são ignoradas
+OPTIMIZER_FOLDS = 4                    # Dobras walk-forward (0 = desliga)
+OPTIMIZER_TRAIN_BLOCKS = 3             # Blocos de treino por dobra
+OPTIMIZER_RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'optimizer_results.csv')
+
 # ===== TRADING ECONOMICS (Calendário Macro) =====
 TE_API_KEY = os.environ.get('TE_API_KEY', '')
+CALENDAR_FILE = os.environ.get(
+    'CALENDAR_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'calendar.json')
+)
+CALENDAR_TTL_HOURS = float(os.environ.get('CALENDAR_TTL_HOURS', '4'))  # Uma busca por janela
+CALENDAR_HIGH_IMPACT = 3  # Importância mínima de evento de alto impacto
+CALENDAR_EVENT_WINDOW_HOURS = 4  # VTI-3: horizonte de eventos à frente
+CALENDAR_LOOKBACK_HOURS = 1  # VTI-3: eventos recentes ainda contam
 
 # ===== VTI =====
 VTI_THRESHOLD = 2
@@ -44,6 +199,21 @@ VTI_CONFIDENCE_HIGH = 3
 MAX_POSITION_SIZE = 2.0
 RISK_PER_TRADE = 1.5
 MIN_RISK_REWARD = 1.5
+ATR_STOP_MULT = 1.5  # Stop em ATRs quando não há S/R
+TP_WEIGHTS = (1 / 3, 1 / 3, 1 / 3)  # Fração da posição encerrada em TP1/TP2/TP3
+ACCOUNT_SIZE = float(os.environ.get('ACCOUNT_SIZE', 10000))
+
+# ===== RISCO DE PORTFÓLIO =====
+PORTFOLIO_RISK = os.environ.get('PORTFOLIO_RISK', '1') == '1'  # Escala/veta sinais correlacionados
+PORTFOLIO_FILE = os.environ.get(  # Covariância EWMA incremental
+    'PORTFOLIO_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'portfolio_cov.npz')
+)
+PORTFOLIO_TIMEFRAME = '15m'  # Retornos usados na covariância
+PORTFOLIO_HALFLIFE_BARS = 480  # Meia-vida da EWMA (~5 dias de M15)
+PORTFOLIO_RISK_BUDGET = float(os.environ.get('PORTFOLIO_RISK_BUDGET', 4.5))  # % da conta, risco combinado
+PORTFOLIO_CURRENCY_CAP = float(os.environ.get('PORTFOLIO_CURRENCY_CAP', 3.0))  # % da conta por moeda
+PORTFOLIO_MIN_SCALE = 0.25  # Abaixo disso o sinal é vetado
 
 # ===== TÉCNICA =====
 RSI_PERIOD = 14
@@ -56,6 +226,8 @@ BB_PERIOD = 20
 BB_STD = 2
 ATR_PERIOD = 14
 VOLUME_MA_PERIOD = 20
+INDICATOR_BACKEND = os.environ.get('INDICATOR_BACKEND', 'ta')  # 'ta' ou 'numpy'
+FEATURE_CACHE_ENABLED = os.environ.get('FEATURE_CACHE', '1') == '1'  # Indicadores compartilhados por vela
 
 # ===== TIMEFRAMES =====
 TIMEFRAMES = {
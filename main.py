@@ -3,14 +3,18 @@
 Oracle Trading Systems v1.0
 Framework GCT 10.0 - Institutional Execution
 Análise automatizada de múltiplos pares forex/crypto
+
+Os módulos do sistema são importados dentro de cada modo: pandas, ta
+e requests só carregam nos caminhos que os usam (o reenvio do spool do
+Telegram e a consulta ao calendário salvo não tocam em pandas).
 """
 
+import argparse
+import os
 import sys
+import time
 from datetime import datetime
 import config
-from modules.data_fetcher import DataFetcher
-from modules.signal_generator import SignalGenerator
-from modules.telegram_notifier import TelegramNotifier
 
 def print_header():
     """Exibe cabeçalho do sistema"""
@@ -21,52 +25,485 @@ def print_header():
     print("=" * 60)
     print()
 
-def analyze_pair(pair_symbol, pair_name, data_fetcher):
+def analyze_pair(pair_symbol, pair_name, data_multi_tf):
     """
     Analisa um par individual
     
     Args:
         pair_symbol: Símbolo para API (ex: 'EURUSD=X')
         pair_name: Nome amigável (ex: 'EURUSD')
-        data_fetcher: Instância do DataFetcher
+        data_multi_tf: dict {'15m': df, '1h': df, '4h': df} já buscado
     
     Returns:
         Signal dict ou None
     """
+    from modules.metrics import get_metrics
+    from modules.signal_generator import SignalGenerator
+    
     print(f"📊 Analisando {pair_name}...", end=" ")
+    metrics = get_metrics()
     
     try:
-        # 1. Buscar dados multi-timeframe
-        data_multi_tf = data_fetcher.fetch_multiple_timeframes(pair_symbol)
-        
-        # 2. Validar dados
-        if not data_multi_tf.get('15m') or data_multi_tf['15m'].empty:
+        # 1. Validar dados
+        df_15m = data_multi_tf.get('15m')
+        if df_15m is None or df_15m.empty:
             print("❌ Sem dados")
+            metrics.inc('pairs_analyzed', result='no_data')
             return None
         
-        # 3. Gerar sinal
-        signal_gen = SignalGenerator(pair_name, pair_symbol, data_multi_tf)
-        
-        if not signal_gen.valid:
-            print("❌ Dados inválidos")
-            return None
-        
-        signal = signal_gen.generate_signal()
+        with metrics.timer('analysis_seconds', pair=pair_name):
+            # 2. Gerar sinal
+            signal_gen = SignalGenerator(pair_name, pair_symbol, data_multi_tf)
+            
+            if not signal_gen.valid:
+                print("❌ Dados inválidos")
+                metrics.inc('pairs_analyzed', result='invalid')
+                return None
+            
+            signal = signal_gen.generate_signal()
         
         if signal:
             print(f"✅ {signal['direction']} | VTI: {signal['vti_score']} | Confiança: {signal['confidence']}%")
+            metrics.inc('pairs_analyzed', result='signal')
+            metrics.inc('signals', pair=pair_name, direction=signal['direction'])
             return signal
         else:
             print("⚪ Sem sinal")
+            metrics.inc('pairs_analyzed', result='no_signal')
             return None
     
     except Exception as e:
         print(f"❌ Erro: {str(e)}")
+        metrics.inc('pairs_analyzed', result='error')
         return None
 
-def main():
+def dispatch_signal(signal, bus, telegram, store=None):
+    """
+    Publica o sinal se for novo ou mudou em relação ao ativo do par
+    
+    Sem store, todo sinal é publicado.
+    
+    Returns:
+        (status, encerrados): status do SignalStore (NEW sem store) e
+        sinais ativos encerrados pela reversão
+    """
+    from modules.signal_store import NEW, UNCHANGED
+    
+    status, reversed_signals = NEW, []
+    
+    if store is not None:
+        status, reversed_signals = store.update(signal)
+        for record in reversed_signals:
+            publish_invalidation(bus, telegram, record)
+        
+        if status == UNCHANGED:
+            print(f"  🔁 {signal['pair']} {signal['direction']}: sinal ativo sem mudanças, não reenviado")
+            return status, reversed_signals
+        signal['status'] = status
+    
+    bus.publish(signal)
+    return status, reversed_signals
+
+def publish_invalidation(bus, telegram, record):
+    """Avisa o encerramento de um sinal em todos os sinks (mesmo caminho dos sinais)"""
+    bus.publish(dict(record, event='invalidation'), telegram._format_invalidation_message(record))
+
+def level_ranges(store, universe):
+    """
+    (mínima, máxima) M15 desde a abertura de cada sinal ativo
+    
+    Args:
+        universe: {nome do par: {tf: df}} desta análise
+    
+    Returns:
+        {par: (mínima, máxima)}, para o SignalStore.sweep conferir SL/TP
+    """
+    if store is None or not store.active:
+        return {}
+    
+    import pandas as pd
+    from modules.compact_candles import column_values, frame_times
+    
+    ranges = {}
+    for record in list(store.active.values()):
+        df = (universe.get(record['pair']) or {}).get('15m')
+        if df is None or df.empty:
+            continue
+        window = frame_times(df) >= pd.Timestamp(record['opened_at']).value
+        if window.any():
+            ranges[record['pair']] = (
+                float(column_values(df, 'Low')[window].min()),
+                float(column_values(df, 'High')[window].max())
+            )
+    return ranges
+
+def close_stale(store, bus, telegram, analyzed, signaled, ranges=None):
+    """
+    Encerra e avisa os sinais ativos com SL/TP3 cruzado ou sem
+    reconfirmação há config.SIGNAL_STALE_BARS análises
+    """
+    if store is None:
+        return []
+    
+    closed = store.sweep(analyzed, signaled, ranges)
+    for record in closed:
+        print(f"  ⚪ {record['pair']} {record['direction']}: sinal encerrado ({record['close_reason']})")
+        publish_invalidation(bus, telegram, record)
+    store.commit()
+    
+    return closed
+
+def screen_candidates(universe):
+    """Triagem vetorizada de {symbol: {tf: df}}: nomes dos pares que seguem para a análise completa"""
+    from modules.screener import print_screen, screen_universe
+    
+    names = dict(zip(config.PAIRS, config.PAIR_NAMES))
+    pairs = [symbol for symbol in config.PAIRS if symbol in universe]
+    screen = screen_universe(universe, pairs, [names[symbol] for symbol in pairs])
+    print_screen(screen)
+    print()
+    return set(screen.index[screen['candidate'].astype(bool)])
+
+def apply_portfolio_risk(portfolio, signals):
+    """Reduz/veta os sinais da execução pelo risco combinado; devolve os aceitos"""
+    print("⚖️ RISCO DO PORTFÓLIO\n")
+    accepted, vetoed = portfolio.apply(signals)
+    exposure = ', '.join(
+        f"{currency} {value:+.1f}%" for currency, value in sorted(portfolio.last_exposure.items()) if abs(value) > 1e-9
+    )
+    print(f"⚖️ Risco combinado: {portfolio.last_risk:.2f}% (orçamento {portfolio.budget}%) | Vetados: {len(vetoed)}")
+    if exposure:
+        print(f"💱 Exposição: {exposure}")
+    print()
+    return accepted
+
+def print_metrics_summary(metrics):
+    """Resumo curto das métricas da execução"""
+    snapshot = metrics.snapshot()
+    counters = snapshot['counters']
+    timers = snapshot['timers']
+    
+    results = ', '.join(
+        f"{key.split('=')[1].rstrip('}')} {value}"
+        for key, value in counters.items() if key.startswith('pairs_analyzed{')
+    )
+    http_total = sum(value for key, value in counters.items() if key.startswith('http_requests{'))
+    retries = sum(value for key, value in counters.items() if key.startswith('http_retries{'))
+    waited = sum(stats['total_s'] for key, stats in timers.items() if key.startswith('rate_limit_wait_seconds'))
+    analysis = [stats for key, stats in timers.items() if key.startswith('analysis_seconds{')]
+    
+    print(f"⏱️ Execução: {timers.get('run_seconds', {}).get('total_s', 0):.1f}s | Resultados: {results or '-'}")
+    print(f"🌐 HTTP: {http_total} requisições | {retries} retries | espera no rate limit {waited:.1f}s")
+    if analysis:
+        slowest = max(stats['max_ms'] for stats in analysis)
+        average = sum(stats['total_s'] for stats in analysis) / sum(stats['count'] for stats in analysis) * 1000
+        print(f"🧮 Análise por par: média {average:.1f} ms | máx {slowest:.1f} ms")
+    print(f"💾 Métricas: {config.METRICS_JSON_FILE}")
+
+def parse_args(argv=None):
+    """Argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description=f"{config.SYSTEM_NAME} - {config.FRAMEWORK_VERSION}")
+    parser.add_argument('--daemon', action='store_true',
+                        help='modo contínuo: streaming de cotações e sinais a cada barra fechada')
+    parser.add_argument('--replay', metavar='CSV',
+                        help='no modo daemon, reproduz ticks de um CSV (symbol,timestamp,price)')
+    parser.add_argument('--pipeline', action='store_true', default=config.PIPELINE_MODE,
+                        help='busca e análise em etapas, com análise em vários processos')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processos de análise no modo pipeline (padrão: nº de CPUs)')
+    parser.add_argument('--screen', action='store_true', default=config.SCREEN_MODE,
+                        help='triagem vetorizada do universo antes da análise completa por par')
+    parser.add_argument('--backtest', metavar='DIR', nargs='?', const=config.BACKTEST_DATA_DIR,
+                        help='backtest sobre históricos M15 locais (CSV/Parquet por par ou arquivo histórico)')
+    parser.add_argument('--optimize', metavar='DIR', nargs='?', const=config.BACKTEST_DATA_DIR,
+                        help='varredura de parâmetros (config.OPTIMIZER_SPACE) sobre históricos locais')
+    parser.add_argument('--import-history', metavar='DIR',
+                        help='importa históricos M15 (CSV/Parquet por par) para o arquivo memory-mapped')
+    parser.add_argument('--resend', action='store_true',
+                        help='só reenvia as mensagens pendentes no spool do Telegram')
+    parser.add_argument('--calendar', action='store_true',
+                        help='só exibe o calendário econômico (busca de novo se vencido)')
+    parser.add_argument('--trials', type=int, default=0,
+                        help='na otimização, N amostras aleatórias em vez do grid completo')
+    parser.add_argument('--folds', type=int, default=config.OPTIMIZER_FOLDS,
+                        help='dobras walk-forward da otimização (0 = desliga)')
+    return parser.parse_args(argv)
+
+def run_daemon(replay_file=None):
+    """Modo daemon: mantém barras em tempo real e reavalia só o par cuja barra fechou"""
+    from modules.data_fetcher import DataFetcher
+    from modules.metrics import MetricsExporter, get_metrics
+    from modules.notification_bus import build_default_bus
+    from modules.portfolio_risk import PortfolioRisk
+    from modules.position_tracker import PositionTracker
+    from modules.price_feed import ReplaySource, TwelveDataWebSocketSource
+    from modules.signal_store import UNCHANGED, SignalStore
+    from modules.stream_engine import StreamingEngine
+    from modules.telegram_notifier import TelegramNotifier
+    
+    print_header()
+    
+    data_fetcher = DataFetcher()
+    telegram = TelegramNotifier()
+    if config.TELEGRAM_ASYNC:
+        telegram.start()
+    bus = build_default_bus(telegram)
+    store = SignalStore() if config.SIGNAL_STORE_ENABLED else None
+    
+    def on_position_event(event):
+        position = event['position']
+        print(f"  📌 {position['pair']} {position['direction']}: {event['type'].upper()} em {event['price']:.5f} ({event['r']:+.2f}R)")
+        telegram.send_position_event(event)
+        if event['closed'] and store is not None:
+            # Posição encerrada: o próximo sinal do par volta a ser novo
+            store.invalidate(position['pair'], 'stop' if event['type'] == 'sl' else 'tp3')
+            store.commit()
+    
+    portfolio = PortfolioRisk() if config.PORTFOLIO_RISK else None
+    tracker = PositionTracker(on_event=on_position_event) if config.POSITION_TRACKING else None
+    if tracker is not None and store is not None:
+        for record in store.active.values():
+            tracker.open(record['pair'], record['direction'], record['entry'],
+                         record['stop_loss'], record['levels'], record['opened_at'])
+        print(f"📌 Posições acompanhadas: {tracker.open_count()}")
+    
+    # Calendário renovado ao vencer o TTL; sem sucesso, nova tentativa só na próxima barra
+    data_fetcher.get_economic_calendar()
+    calendar_retry_at = [time.monotonic() + data_fetcher.interval_minutes['15m'] * 60]
+    portfolio_bar = [None]
+    
+    def update_portfolio(bar_time):
+        """
+        Covariância com as velas fechadas de todos os pares, uma vez por
+        horário de barra: só entram as anteriores à barra que acabou de
+        fechar (a do mesmo horário de outros pares pode ainda não ter fechado)
+        """
+        if portfolio is None or (portfolio_bar[0] is not None and bar_time <= portfolio_bar[0]):
+            return
+        portfolio_bar[0] = bar_time
+        portfolio.update_closes(portfolio.closes(engine.history, before=bar_time))
+    
+    def analyze(pair_symbol, pair_name, data_multi_tf):
+        if not data_fetcher.calendar.is_fresh() and time.monotonic() >= calendar_retry_at[0]:
+            calendar_retry_at[0] = time.monotonic() + data_fetcher.interval_minutes['15m'] * 60
+            data_fetcher.get_economic_calendar()
+        
+        if data_multi_tf.get(config.PORTFOLIO_TIMEFRAME) is not None:
+            update_portfolio(data_multi_tf[config.PORTFOLIO_TIMEFRAME].index[-1])
+        
+        # Cada barra fechada reconfirma (ou encerra) o sinal ativo do par
+        signal = analyze_pair(pair_symbol, pair_name, data_multi_tf)
+        accepted = [signal] if signal else []
+        if signal and portfolio is not None:
+            # Sinais ativos dos outros pares contam no orçamento
+            others = [record for record in list(store.active.values()) if record['pair'] != pair_name] if store is not None else []
+            accepted, _ = portfolio.apply([signal], others)
+        if accepted:
+            status, reversed_signals = dispatch_signal(signal, bus, telegram, store)
+            if tracker is not None:
+                # Reversão: a posição anterior sai a mercado, com o R registrado
+                for record in reversed_signals:
+                    exit_event = tracker.close(record['pair'], record['direction'], signal['current_price'],
+                                               data_multi_tf['15m'].index[-1].to_pydatetime())
+                    if exit_event is not None:
+                        print(f"  📌 {pair_name} {record['direction']}: reversão em {exit_event['price']:.5f} "
+                              f"({exit_event['position']['r_multiple']:+.2f}R)")
+                # Mudança de níveis não reabre: a posição segue com os níveis da entrada
+                if status != UNCHANGED and not tracker.is_open(pair_name, signal['direction']):
+                    tracker.open_signal(signal)
+        
+        # Posição acompanhada só encerra por TP3/SL (tracker) ou reversão
+        if tracker is None or not tracker.is_open(pair_name):
+            close_stale(
+                store, bus, telegram, [pair_name], [pair_name] if signal else [],
+                level_ranges(store, {pair_name: data_multi_tf})
+            )
+        return signal
+    
+    if replay_file:
+        print(f"🎞️ Replay: {replay_file}")
+        source = ReplaySource.from_csv(replay_file, speed=config.STREAM_REPLAY_SPEED)
+    else:
+        source = TwelveDataWebSocketSource(symbol_map=data_fetcher.symbol_map)
+    
+    engine = StreamingEngine(
+        source,
+        config.PAIRS,
+        config.PAIR_NAMES,
+        analyze,
+        data_fetcher.interval_minutes,
+        on_tick=tracker.on_price if tracker is not None else None
+    )
+    
+    exporter = MetricsExporter(get_metrics()).start() if get_metrics().enabled else None
+    
+    # Histórico inicial via REST (store local + top-up)
+    universe = data_fetcher.fetch_universe(config.PAIRS)
+    if portfolio is not None:
+        portfolio.update(universe)
+    engine.seed(universe)
+    del universe
+    
+    try:
+        signals = engine.run()
+    finally:
+        bus.close(config.NOTIFY_FLUSH_TIMEOUT)
+        telegram.flush()
+        if store is not None:
+            store.close()
+        if exporter is not None:
+            exporter.stop()
+    
+    print()
+    print("=" * 60)
+    print(f"🛑 STREAMING ENCERRADO | Barras M15: {engine.bars_closed} | Sinais: {len(signals)}")
+    if tracker is not None and tracker.realized:
+        total_r = sum(result['r_multiple'] for result in tracker.realized)
+        print(f"📌 Posições encerradas: {len(tracker.realized)} | Resultado: {total_r:+.2f}R")
+    print("=" * 60)
+    
+    return 0
+
+def run_backtest(directory):
+    """Backtest vetorizado dos pares configurados sobre históricos locais"""
+    from modules.backtest import Backtester, load_directory, print_report
+    
+    print_header()
+    
+    histories = load_directory(directory, pairs=config.PAIR_NAMES)
+    if not histories:
+        print(f"❌ Nenhum histórico encontrado em {directory}")
+        return 1
+    
+    for pair, df in histories.items():
+        print(f"📂 {pair}: {len(df)} velas ({df.index[0]:%Y-%m-%d} → {df.index[-1]:%Y-%m-%d})")
+    print()
+    
+    trades, report = Backtester().run(histories)
+    print_report(report)
+    
+    os.makedirs(os.path.dirname(config.BACKTEST_TRADES_FILE), exist_ok=True)
+    trades.to_csv(config.BACKTEST_TRADES_FILE, index=False)
+    print(f"💾 Trades: {config.BACKTEST_TRADES_FILE}")
+    
+    return 0
+
+def run_optimizer(directory, trials=0, folds=0):
+    """Varredura de parâmetros com walk-forward sobre históricos locais"""
+    from modules.backtest import load_directory
+    from modules.optimizer import Optimizer, grid, random_samples, print_optimizer_report
+    
+    print_header()
+    
+    histories = load_directory(directory, pairs=config.PAIR_NAMES)
+    if not histories:
+        print(f"❌ Nenhum histórico encontrado em {directory}")
+        return 1
+    
+    if trials:
+        combos = random_samples(config.OPTIMIZER_SPACE, trials)
+    else:
+        combos = grid(config.OPTIMIZER_SPACE)
+    
+    optimizer = Optimizer(histories)
+    results, walk_forward = optimizer.run(combos, folds=folds)
+    print()
+    print_optimizer_report(optimizer, results, walk_forward)
+    
+    os.makedirs(os.path.dirname(config.OPTIMIZER_RESULTS_FILE), exist_ok=True)
+    results.to_csv(config.OPTIMIZER_RESULTS_FILE, index=False)
+    print(f"💾 Resultados: {config.OPTIMIZER_RESULTS_FILE}")
+    
+    return 0
+
+def run_import_history(directory):
+    """Converte históricos CSV/Parquet para o arquivo histórico (colunas memory-mapped)"""
+    from modules.backtest import load_directory
+    from modules.candle_archive import get_candle_archive
+    
+    archive = get_candle_archive()
+    histories = load_directory(directory)
+    if not histories:
+        print(f"❌ Nenhum histórico encontrado em {directory}")
+        return 1
+    
+    for pair, df in histories.items():
+        total = archive.write(pair, '15m', df)
+        print(f"📦 {pair}: {len(df)} velas importadas | {total} no arquivo")
+    print(f"💾 Arquivo histórico: {archive.base_dir}")
+    
+    return 0
+
+def run_resend():
+    """Entrega o que ficou no spool do Telegram em execuções anteriores"""
+    from modules.telegram_notifier import TelegramNotifier
+    
+    telegram = TelegramNotifier()
+    if not telegram.bot_token or not telegram.chat_ids:
+        print("❌ Credenciais Telegram não configuradas")
+        return 1
+    
+    # A fila recupera o spool ao ligar
+    telegram.start()
+    return 0 if telegram.flush() else 1
+
+def run_calendar():
+    """Calendário econômico das próximas 48h (store em disco; API só se vencido)"""
+    from modules.calendar_store import get_calendar_store
+    
+    calendar = get_calendar_store()
+    if calendar.is_fresh():
+        summary = calendar.summary()
+    else:
+        from modules.data_fetcher import DataFetcher
+        summary = DataFetcher().get_economic_calendar()
+    
+    print(f"📅 Calendário econômico | atualizado: {summary['last_update'] or '-'} | fonte: {summary['source']}")
+    for label, events in (('Próximas 24h', summary['next_24h']), ('24h-48h', summary['next_48h'])):
+        print(f"\n{label}:")
+        for event in events:
+            impact = '🔴' if event['importance'] >= config.CALENDAR_HIGH_IMPACT else '🟡'
+            print(f"  {impact} {event['date']} {event['time']} ({event['hours_until']:+.1f}h) {event['country']}: {event['title']}")
+        if not events:
+            print("  -")
+    
+    return 0
+
+def main(argv=None):
     """Função principal do sistema"""
+    args = parse_args(argv)
+    
+    if args.resend:
+        return run_resend()
+    
+    if args.calendar:
+        return run_calendar()
+    
+    if args.daemon:
+        return run_daemon(args.replay)
+    
+    if args.backtest:
+        return run_backtest(args.backtest)
+    
+    if args.import_history:
+        return run_import_history(args.import_history)
+    
+    if args.optimize:
+        return run_optimizer(args.optimize, args.trials, args.folds)
+    
+    return run_batch(args)
+
+def run_batch(args):
+    """Execução agendada: busca, analisa e publica os sinais de todos os pares"""
+    from modules.data_fetcher import DataFetcher
+    from modules.metrics import get_metrics
+    from modules.notification_bus import build_default_bus
+    from modules.portfolio_risk import PortfolioRisk
+    from modules.signal_store import SignalStore
+    from modules.telegram_notifier import TelegramNotifier
+    
     print_header()
+    started = time.perf_counter()
     
     # Validar credenciais Telegram
     if not config.TELEGRAM_BOT_TOKEN or not config.TELEGRAM_CHAT_ID:
@@ -77,18 +514,80 @@ def main():
     # Inicializar módulos
     data_fetcher = DataFetcher()
     telegram = TelegramNotifier()
+    if config.TELEGRAM_ASYNC:
+        telegram.start()
+    
+    # Cada sinal sai para os sinks (chats, webhooks, arquivo) assim que é gerado;
+    # sinais já ativos e sem mudança não são reenviados
+    bus = build_default_bus(telegram)
+    store = SignalStore() if config.SIGNAL_STORE_ENABLED else None
+    
+    def on_signal(signal):
+        dispatch_signal(signal, bus, telegram, store)
+    
+    # Com o risco de portfólio, os sinais só saem depois de avaliados em conjunto
+    portfolio = PortfolioRisk() if config.PORTFOLIO_RISK else None
+    closes = {}
+    names = dict(zip(config.PAIRS, config.PAIR_NAMES))
+    ranges = {}
+    
+    def collect(universe):
+        # Faixa de preço desde a abertura de cada sinal ativo (SL/TP cruzado)
+        ranges.update(level_ranges(store, {names.get(symbol, symbol): data for symbol, data in universe.items()}))
+        # Da busca, o portfólio só guarda os closes do timeframe da covariância
+        if portfolio is not None:
+            closes.update(portfolio.closes(universe))
+    
+    # Calendário econômico: uma busca por janela, consultada pelo VTI-3 de todos os pares
+    data_fetcher.get_economic_calendar()
     
     # Lista para armazenar sinais
     signals = []
     
-    # Analisar cada par
-    print("🔍 INICIANDO ANÁLISE DE MÚLTIPLOS PARES\n")
-    
-    for pair_symbol, pair_name in zip(config.PAIRS, config.PAIR_NAMES):
-        signal = analyze_pair(pair_symbol, pair_name, data_fetcher)
+    if args.pipeline:
+        # Busca em lotes sobreposta à análise em vários processos (com triagem, só candidatos vão ao pool)
+        from modules.pipeline import AnalysisPipeline
+        pipeline = AnalysisPipeline(
+            data_fetcher, analyze_pair, workers=args.workers,
+            on_signal=on_signal if portfolio is None else None,
+            on_universe=collect,
+            select=screen_candidates if args.screen else None
+        )
+        signals = pipeline.run(config.PAIRS, config.PAIR_NAMES)
+        analyzed = pipeline.analyzed
+    else:
+        # Buscar dados de todos os pares (concorrente, limitado pelo token bucket)
+        universe = data_fetcher.fetch_universe(config.PAIRS)
+        collect(universe)
+        analyzed = [
+            pair_name for pair_symbol, pair_name in zip(config.PAIRS, config.PAIR_NAMES)
+            if (universe[pair_symbol] or {}).get('15m') is not None
+        ]
         
-        if signal:
-            signals.append(signal)
+        pairs = list(zip(config.PAIRS, config.PAIR_NAMES))
+        
+        if args.screen:
+            # Uma passada NumPy sobre todos os pares; só candidatos seguem
+            candidates = screen_candidates(universe)
+            pairs = [(pair_symbol, pair_name) for pair_symbol, pair_name in pairs if pair_name in candidates]
+        
+        # Analisar cada par
+        print("🔍 INICIANDO ANÁLISE DE MÚLTIPLOS PARES\n")
+        
+        for pair_symbol, pair_name in pairs:
+            signal = analyze_pair(pair_symbol, pair_name, universe[pair_symbol])
+            
+            if signal:
+                signals.append(signal)
+                if portfolio is None:
+                    on_signal(signal)
+    
+    if portfolio is not None:
+        portfolio.update_closes(closes)
+        closes.clear()
+        if signals:
+            for signal in apply_portfolio_risk(portfolio, signals):
+                on_signal(signal)
     
     print()
     print("=" * 60)
@@ -98,19 +597,15 @@ def main():
     print("=" * 60)
     print()
     
-    # Enviar sinais para o Telegram
-    if signals:
-        print("📱 ENVIANDO SINAIS PARA O TELEGRAM\n")
-        
-        for signal in signals:
-            print(f"📤 Enviando {signal['pair']}...", end=" ")
-            success = telegram.send_signal(signal)
-            
-            if success:
-                print("✅")
-            else:
-                print("❌")
-        
+    # Sinais ativos que esta análise não reconfirmou
+    closed = close_stale(store, bus, telegram, analyzed, [signal['pair'] for signal in signals], ranges)
+    if store is not None:
+        store.close()
+    
+    # Esperar as entregas dos sinais (e dos avisos de encerramento)
+    if (signals or closed) and bus.sinks:
+        print("📱 ENTREGANDO SINAIS\n")
+        bus.close(config.NOTIFY_FLUSH_TIMEOUT)
         print()
     
     # Enviar resumo
@@ -118,6 +613,16 @@ def main():
     telegram.send_analysis_summary(len(config.PAIRS), len(signals))
     print("✅")
     
+    # Espera a fila assíncrona entregar (o que falhar fica no spool)
+    telegram.flush()
+    
+    metrics = get_metrics()
+    if metrics.enabled:
+        metrics.observe('run_seconds', time.perf_counter() - started)
+        metrics.write_json(config.METRICS_JSON_FILE)
+        print()
+        print_metrics_summary(metrics)
+    
     print()
     print("=" * 60)
     print("🎯 SISTEMA FINALIZADO COM SUCESSO")
@@ -0,0 +1,461 @@
+import os
+import numpy as np
+import pandas as pd
+import config
+from modules.candle_archive import CandleArchive
+from modules.indicators_numpy import cached, compute_indicators, default_params, ema, rolling_mean
+from modules.ohlcv_decoder import COLUMNS, SYNTHETIC_VOLUME
+
+# Rótulos de tendência em int8
+ALTA, BAIXA, LATERAL, INDEFINIDA = 1, -1, 0, 2
+
+TRADE_COLUMNS = [
+    'pair', 'entry_time', 'exit_time', 'direction', 'entry', 'stop_loss',
+    'tp1', 'tp2', 'tp3', 'vti_score', 'tp1_hit', 'tp2_hit', 'tp3_hit',
+    'sl_hit', 'bars_held', 'r_multiple'
+]
+
+def default_strategy_params():
+    """Parâmetros da estratégia (mesmos valores do SignalGenerator/RiskManager)"""
+    params = default_params()
+    params.update({
+        'vti_threshold': config.VTI_THRESHOLD,
+        'rsi_buy_max': config.RSI_OVERBOUGHT,
+        'rsi_sell_min': config.RSI_OVERSOLD,
+        'trend_band': 0.001,          # VTI: EMA20 vs EMA50 (±0.1%)
+        'volatility_window': 20,
+        'volatility_high': 1.5,
+        'flow_window': 20,
+        'sr_lookback': 100,
+        'stop_mode': 'sr',            # 'sr' (S/R, como ao vivo) ou 'atr'
+        'sl_buffer': 0.002,           # SL 0.2% além do S/R
+        'atr_stop_mult': config.ATR_STOP_MULT,
+        'rr_levels': (1.5, 2.5, 4.0),
+        'tp_weights': config.TP_WEIGHTS,  # Saída parcial em cada TP
+        'min_risk_reward': config.MIN_RISK_REWARD,
+        'max_hold_bars': config.BACKTEST_MAX_HOLD_BARS,
+        'one_position': config.BACKTEST_ONE_POSITION
+    })
+    return params
+
+def load_history(path):
+    """
+    Lê histórico OHLCV de um CSV ou Parquet
+
+    Aceita colunas em qualquer caixa (datetime/time/date, open, high,
+    low, close, volume). Sem volume, usa o volume sintético da API.
+
+    Raises:
+        ValueError: sem coluna de horário ou de preço
+    """
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    time_col = next((col for col in ('datetime', 'time', 'date', 'timestamp') if col in df.columns), None)
+    if time_col is None:
+        raise ValueError("sem coluna datetime/time/date/timestamp")
+
+    df = df.rename(columns={col.lower(): col for col in COLUMNS})
+    missing = [col for col in COLUMNS[:4] if col not in df.columns]
+    if missing:
+        raise ValueError(f"sem coluna(s) {', '.join(col.lower() for col in missing)}")
+    if 'Volume' not in df.columns:
+        df['Volume'] = float(SYNTHETIC_VOLUME)
+
+    df.index = pd.DatetimeIndex(pd.to_datetime(df[time_col]), name='datetime')
+    df = df[COLUMNS].astype(np.float64).sort_index()
+
+    return df[~df.index.duplicated(keep='last')]
+
+def load_directory(directory, pairs=None):
+    """
+    Carrega {PAR: df} de um diretório (EURUSD.csv, EURUSD_15m.parquet...)
+
+    Um arquivo histórico (CandleArchive) é aberto via memmap: as séries
+    M15 viram DataFrames sem leitura nem cópia.
+
+    Args:
+        pairs: nomes a carregar (padrão: todos os arquivos)
+    """
+    histories = {}
+    if not os.path.isdir(directory):
+        return histories
+
+    archive = CandleArchive(directory)
+    for symbol, interval in archive.series('15m'):
+        if not pairs or symbol.upper() in pairs:
+            histories[symbol.upper()] = archive.frame(symbol, interval)
+
+    for filename in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(filename)
+        if ext not in ('.csv', '.parquet'):
+            continue
+
+        pair = stem.split('_')[0].upper()
+        if pairs and pair not in pairs:
+            continue
+
+        if ext == '.parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print(f"⚠️ {filename}: leitura de Parquet requer pyarrow")
+                continue
+
+        try:
+            histories[pair] = load_history(os.path.join(directory, filename))
+        except ValueError as e:
+            print(f"⚠️ {filename} ignorado: {str(e)}")
+
+    return histories
+
+def _trend_labels(fast, slow, band, valid):
+    """Tendência do VTI (EMA20 vs EMA50 com banda)"""
+    labels = np.full(fast.shape, LATERAL, dtype=np.int8)
+    labels[fast > slow * (1 + band)] = ALTA
+    labels[fast < slow * (1 - band)] = BAIXA
+    labels[~valid] = INDEFINIDA
+    return labels
+
+def _higher_tf_trend(index, close, minutes, band):
+    """
+    Tendência do timeframe maior vista em cada vela M15
+
+    Ao vivo, o df H1/H4 termina na vela em formação, cujo close é o
+    close M15 atual. A EMA dessa vela é a EMA da vela fechada anterior
+    mais um passo com o close atual - sem reamostrar vela a vela.
+    """
+    offset = pd.Timedelta(config.RESAMPLE_OFFSET).value
+    bucket = (index.asi8 - offset) // (minutes * 60 * 10**9)
+
+    last_of_bucket = np.r_[np.nonzero(np.diff(bucket))[0], len(bucket) - 1]
+    position = np.searchsorted(bucket[last_of_bucket], bucket)
+
+    emas = []
+    for span in (20, 50):
+        alpha = 2.0 / (span + 1)
+        closed = ema(close[last_of_bucket], alpha)
+        previous = closed[np.maximum(position - 1, 0)]
+        emas.append(np.where(position > 0, previous * (1 - alpha) + alpha * close, close))
+
+    return _trend_labels(emas[0], emas[1], band, position + 1 >= 50)
+
+def _rolling_extreme(values, window, func):
+    """Mínimo/máximo móvel (janela parcial no início, como tail())"""
+    padded = np.concatenate([np.full(window - 1, values[0]), values])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    return func(windows, axis=1)
+
+def _first_hit(path, levels, starts, horizon, below):
+    """
+    Índice (0..horizon-1) da 1ª vela após starts que toca cada nível
+
+    horizon quando o nível não é tocado. Processado em blocos para
+    limitar a matriz sinais x horizonte.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(path, horizon)
+    hits = np.full(len(starts), horizon, dtype=np.int64)
+
+    for begin in range(0, len(starts), 4096):
+        block = windows[starts[begin:begin + 4096] + 1]
+        level = levels[begin:begin + 4096, None]
+        touched = block <= level if below else block >= level
+        found = touched.any(axis=1)
+        hits[begin:begin + 4096] = np.where(found, touched.argmax(axis=1), horizon)
+
+    return hits
+
+
+class Backtester:
+    """
+    Backtest vetorizado da lógica do SignalGenerator
+
+    Indicadores são calculados uma única vez sobre todo o histórico
+    (backend NumPy) e VTI, direção, SL/TP e os toques de cada nível são
+    avaliados como operações de array em todas as velas. Os sinais
+    saem no fechamento da vela M15, como numa execução ao vivo.
+
+    Diferença conhecida: ao vivo as EMAs partem do início da janela
+    buscada; aqui partem do início do histórico (valores convergidos).
+    """
+
+    def __init__(self, params=None):
+        self.params = default_strategy_params()
+        if params:
+            self.params.update(params)
+
+    def signals(self, pair_name, df, cache=None):
+        """
+        Avalia a estratégia em todas as velas
+
+        Args:
+            cache: dict por par reaproveitado entre conjuntos de parâmetros
+                (séries base como EMAs são calculadas uma vez por período)
+
+        Returns:
+            dict de arrays: direction (1 BUY, -1 SELL, 0 OUT), vti_score,
+            stop_loss, tp1, tp2, tp3 (NaN onde não há sinal)
+        """
+        p = self.params
+        high = df['High'].to_numpy(dtype=np.float64)
+        low = df['Low'].to_numpy(dtype=np.float64)
+        close = df['Close'].to_numpy(dtype=np.float64)
+        volume = df['Volume'].to_numpy(dtype=np.float64)
+        n = len(close)
+        bars = np.arange(n)
+
+        ind = compute_indicators(high, low, close, volume, p, cache=cache)
+
+        # detect_trend (EMA 20/50/200) - usado no VTI-1 e na direção
+        def detect_trend():
+            labels = np.full(n, LATERAL, dtype=np.int8)
+            labels[(close > ind.ema_20) & (ind.ema_20 > ind.ema_50) & (ind.ema_50 > ind.ema_200)] = ALTA
+            labels[(close < ind.ema_20) & (ind.ema_20 < ind.ema_50) & (ind.ema_50 < ind.ema_200)] = BAIXA
+            labels[np.isnan(ind.ema_200) | (bars < 199)] = INDEFINIDA
+            return labels
+
+        trend = cached(cache, ('detect_trend',), detect_trend)
+
+        # VTI-1: USD/ouro/BTC exigem tendência definida; demais, não lateral
+        if 'USD' in pair_name or pair_name in ('XAUUSD', 'BTCUSD'):
+            vti1 = (trend == ALTA) | (trend == BAIXA)
+        else:
+            vti1 = trend != LATERAL
+
+        # Tendências do VTI por timeframe (EMAs sem período mínimo)
+        band = p['trend_band']
+        fast = cached(cache, ('ema', 20), lambda: ema(close, 2.0 / 21))
+        slow = cached(cache, ('ema', 50), lambda: ema(close, 2.0 / 51))
+        trend_15m = cached(cache, ('trend_15m', band), lambda: _trend_labels(fast, slow, band, bars >= 49))
+        trend_1h = cached(cache, ('htf_trend', 60, band), lambda: _higher_tf_trend(df.index, close, 60, band))
+        trend_4h = cached(cache, ('htf_trend', 240, band), lambda: _higher_tf_trend(df.index, close, 240, band))
+
+        # VTI-2: estrutura alinhada + volume acima da média
+        volume_avg = cached(cache, ('volume_ma', p['flow_window']), lambda: rolling_mean(volume, p['flow_window']))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            volume_ratio = np.where(volume_avg > 0, volume / volume_avg, 1.0)
+        vti2 = ((trend_15m == trend_1h) | (trend_15m == trend_4h)) & (volume_ratio > 1.0)
+
+        # VTI-3: 15m e 1h alinhados (não laterais) + volatilidade aceitável
+        atr_avg = cached(
+            cache, ('atr_avg', p['atr_period'], p['volatility_window']),
+            lambda: rolling_mean(ind.atr, p['volatility_window'])
+        )
+        high_volatility = ind.atr > atr_avg * p['volatility_high']
+        vti3 = (trend_15m == trend_1h) & (trend_15m != LATERAL) & ~high_volatility
+
+        score = vti1.astype(np.int8) + vti2 + vti3
+
+        # Direção
+        with np.errstate(invalid='ignore'):
+            buy = (trend == ALTA) & (ind.rsi < p['rsi_buy_max']) & (ind.macd_diff > 0)
+            sell = (trend == BAIXA) & (ind.rsi > p['rsi_sell_min']) & (ind.macd_diff < 0)
+        direction = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+        direction[(score < p['vti_threshold']) | (bars < 49)] = 0
+
+        # SL no S/R das últimas velas (ou em ATRs); TPs em múltiplos do risco
+        if p['stop_mode'] == 'atr':
+            stop_loss = (close - direction * p['atr_stop_mult'] * ind.atr).round(5)
+        else:
+            lookback = p['sr_lookback']
+            support = cached(cache, ('support', lookback), lambda: _rolling_extreme(low, lookback, np.min))
+            resistance = cached(cache, ('resistance', lookback), lambda: _rolling_extreme(high, lookback, np.max))
+            stop_loss = np.where(
+                direction == 1,
+                support * (1 - p['sl_buffer']),
+                resistance * (1 + p['sl_buffer'])
+            ).round(5)
+
+        risk = np.abs(close - stop_loss)
+        take_profits = [(close + direction * risk * rr).round(5) for rr in p['rr_levels']]
+
+        # validate_risk_reward (contra o TP2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rr2 = np.abs(take_profits[1] - close) / risk
+        direction[(risk == 0) | ~(rr2 >= p['min_risk_reward'])] = 0
+
+        active = direction != 0
+        return {
+            'direction': direction,
+            'vti_score': score,
+            'stop_loss': np.where(active, stop_loss, np.nan),
+            'tp1': np.where(active, take_profits[0], np.nan),
+            'tp2': np.where(active, take_profits[1], np.nan),
+            'tp3': np.where(active, take_profits[2], np.nan)
+        }
+
+    def run_pair(self, pair_name, df, cache=None):
+        """
+        Simula as operações de um par
+
+        Cada TP fecha sua fração da posição (tp_weights); o restante sai
+        no SL ou, passado max_hold_bars, no close. SL e TP na mesma vela
+        contam como SL (conservador).
+
+        Returns:
+            DataFrame de trades (TRADE_COLUMNS)
+        """
+        p = self.params
+        sig = self.signals(pair_name, df, cache)
+        entries = np.nonzero(sig['direction'])[0]
+
+        if len(entries) == 0:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+
+        high = df['High'].to_numpy(dtype=np.float64)
+        low = df['Low'].to_numpy(dtype=np.float64)
+        close = df['Close'].to_numpy(dtype=np.float64)
+        n = len(close)
+        horizon = p['max_hold_bars']
+
+        # Caminho futuro com padding: velas inexistentes nunca tocam níveis
+        pad = np.full(horizon + 1, np.nan)
+        high_path = np.concatenate([high, pad])
+        low_path = np.concatenate([low, pad])
+
+        direction = sig['direction'][entries]
+        is_buy = direction == 1
+        entry = close[entries]
+        stop_loss = sig['stop_loss'][entries]
+
+        def first_hit(levels, adverse):
+            # BUY: SL pela mínima, TPs pela máxima (SELL ao contrário)
+            below = is_buy if adverse else ~is_buy
+            hits = np.full(len(entries), horizon, dtype=np.int64)
+            for mask, use_low in ((below, True), (~below, False)):
+                if mask.any():
+                    path = low_path if use_low else high_path
+                    hits[mask] = _first_hit(path, levels[mask], entries[mask], horizon, use_low)
+            return hits
+
+        sl_at = first_hit(stop_loss, adverse=True)
+        tp_at = [first_hit(sig[f'tp{k}'][entries], adverse=False) for k in (1, 2, 3)]
+
+        # Saída do último pedaço da posição
+        timeout_at = np.minimum(horizon, n - 1 - entries) - 1
+        exit_at = np.minimum(np.minimum(sl_at, tp_at[2]), np.maximum(timeout_at, 0))
+        exit_index = np.minimum(entries + 1 + exit_at, n - 1)
+
+        risk = np.abs(entry - stop_loss)
+        timeout_r = direction * (close[exit_index] - entry) / risk
+        sl_hit = sl_at < horizon
+
+        r_multiple = np.zeros(len(entries))
+        tp_hit = []
+        for k, weight in enumerate(p['tp_weights']):
+            level = sig[f'tp{k + 1}'][entries]
+            hit = tp_at[k] < sl_at
+            tp_hit.append(hit)
+            reward = direction * (level - entry) / risk
+            r_multiple += weight * np.where(hit, reward, np.where(sl_hit, -1.0, timeout_r))
+
+        trades = pd.DataFrame({
+            'pair': pair_name,
+            'entry_time': df.index[entries],
+            'exit_time': df.index[exit_index],
+            'direction': np.where(is_buy, 'BUY', 'SELL'),
+            'entry': entry,
+            'stop_loss': stop_loss,
+            'tp1': sig['tp1'][entries],
+            'tp2': sig['tp2'][entries],
+            'tp3': sig['tp3'][entries],
+            'vti_score': sig['vti_score'][entries],
+            'tp1_hit': tp_hit[0],
+            'tp2_hit': tp_hit[1],
+            'tp3_hit': tp_hit[2],
+            'sl_hit': sl_hit & ~tp_hit[2],
+            'bars_held': exit_index - entries,
+            'r_multiple': r_multiple
+        }, columns=TRADE_COLUMNS)
+
+        if p['one_position']:
+            trades = trades[self._non_overlapping(entries, exit_index)]
+
+        return trades.reset_index(drop=True)
+
+    @staticmethod
+    def _non_overlapping(entries, exits):
+        """Máscara de sinais aceitos com no máximo uma posição aberta"""
+        keep = np.zeros(len(entries), dtype=bool)
+        busy_until = -1
+
+        for i, (entry, exit_index) in enumerate(zip(entries, exits)):
+            if entry > busy_until:
+                keep[i] = True
+                busy_until = exit_index
+
+        return keep
+
+    def run(self, histories, caches=None):
+        """
+        Backtest de vários pares
+
+        Args:
+            histories: {pair_name: df OHLCV M15}
+            caches: {pair_name: dict} opcional (ver signals)
+
+        Returns:
+            (trades, report): DataFrame com todos os trades e dict de métricas
+            por par e 'TOTAL'
+        """
+        caches = caches or {}
+        frames = [self.run_pair(pair, df, caches.get(pair)) for pair, df in histories.items()]
+        frames = [frame for frame in frames if not frame.empty]
+
+        if frames:
+            trades = pd.concat(frames, ignore_index=True).sort_values('exit_time', kind='stable')
+        else:
+            trades = pd.DataFrame(columns=TRADE_COLUMNS)
+
+        report = {pair: summarize(trades[trades['pair'] == pair]) for pair in histories}
+        report['TOTAL'] = summarize(trades)
+
+        return trades.reset_index(drop=True), report
+
+
+def summarize(trades):
+    """Taxas de acerto, expectativa e drawdown (em R) de uma lista de trades"""
+    count = len(trades)
+
+    if count == 0:
+        return {'trades': 0}
+
+    r = trades['r_multiple'].to_numpy(dtype=np.float64)
+    equity = np.cumsum(r)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+
+    return {
+        'trades': count,
+        'win_rate': float((r > 0).mean()),
+        'tp1_rate': float(trades['tp1_hit'].mean()),
+        'tp2_rate': float(trades['tp2_hit'].mean()),
+        'tp3_rate': float(trades['tp3_hit'].mean()),
+        'sl_rate': float(trades['sl_hit'].mean()),
+        'expectancy_r': float(r.mean()),
+        'total_r': float(equity[-1]),
+        'max_drawdown_r': float(drawdown.max()),
+        'avg_bars_held': float(trades['bars_held'].mean())
+    }
+
+def print_report(report):
+    """Exibe o relatório no console"""
+    print("=" * 60)
+    print("📈 BACKTEST")
+    print("=" * 60)
+
+    for pair, stats in report.items():
+        if not stats.get('trades'):
+            print(f"  {pair:<8} sem trades")
+            continue
+
+        print(
+            f"  {pair:<8} {stats['trades']:>5} trades | win {stats['win_rate']:.0%}"
+            f" | TP1 {stats['tp1_rate']:.0%} TP2 {stats['tp2_rate']:.0%} TP3 {stats['tp3_rate']:.0%}"
+            f" | E {stats['expectancy_r']:+.2f}R | total {stats['total_r']:+.1f}R"
+            f" | DD {stats['max_drawdown_r']:.1f}R"
+        )
+
+    print("=" * 60)
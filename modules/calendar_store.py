@@ -0,0 +1,190 @@
+import bisect
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+import config
+
+# País do Trading Economics -> moeda
+COUNTRY_CURRENCY = {
+    'United States': 'USD',
+    'Euro Area': 'EUR',
+    'United Kingdom': 'GBP',
+    'Japan': 'JPY',
+    'Switzerland': 'CHF',
+    'Canada': 'CAD',
+    'Australia': 'AUD',
+    'New Zealand': 'NZD'
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+def _epoch(dt):
+    """Segundos desde a época de um datetime UTC naive"""
+    return (dt - EPOCH).total_seconds()
+
+def pair_currencies(pair_name):
+    """Moedas de um par ('EURUSD' -> ('EUR', 'USD'))"""
+    name = pair_name.replace('/', '').replace('=X', '').upper()
+    return (name[:3], name[3:6]) if len(name) >= 6 else (name,)
+
+
+class CalendarStore:
+    """
+    Calendário econômico persistido em disco (JSON) com TTL
+
+    Os eventos ficam indexados por moeda em listas ordenadas por
+    horário (epoch), uma com todos e outra só com os de alto impacto:
+    "o par tem evento de alto impacto nas próximas N horas" é uma busca
+    binária por moeda do par.
+    """
+
+    def __init__(self, path=None, ttl_hours=None):
+        self.path = path or config.CALENDAR_FILE
+        self.ttl = timedelta(hours=ttl_hours or config.CALENDAR_TTL_HOURS)
+        self.fetched_at = None
+        self.events = []
+        self.index = {}
+        self.high_index = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Carrega o calendário salvo (se houver)"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._set(data.get('events', []), datetime.strptime(data['fetched_at'], '%Y-%m-%d %H:%M:%S'))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Arquivo ausente, corrompido ou de outro formato: busca de novo
+            return False
+
+        return True
+
+    def save(self, events, fetched_at=None):
+        """
+        Substitui o calendário e grava em disco (atômico)
+
+        Args:
+            events: lista de {'time': datetime UTC, 'currency', 'country', 'title', 'importance'}
+        """
+        fetched_at = fetched_at or datetime.utcnow()
+        events = [dict(event, time=event['time'].strftime('%Y-%m-%dT%H:%M:%S')) for event in events]
+        self._set(events, fetched_at)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_at': fetched_at.strftime('%Y-%m-%d %H:%M:%S'), 'events': events}, f)
+        os.replace(tmp_path, self.path)
+
+    def _set(self, events, fetched_at):
+        """Reconstrói os índices por moeda"""
+        index = {}
+        high_index = {}
+
+        for event in sorted(events, key=lambda e: e['time']):
+            ts = _epoch(datetime.strptime(event['time'], '%Y-%m-%dT%H:%M:%S'))
+            times, items = index.setdefault(event['currency'], ([], []))
+            times.append(ts)
+            items.append(event)
+
+            if event['importance'] >= config.CALENDAR_HIGH_IMPACT:
+                high_times, high_items = high_index.setdefault(event['currency'], ([], []))
+                high_times.append(ts)
+                high_items.append(event)
+
+        with self.lock:
+            self.events = events
+            self.fetched_at = fetched_at
+            self.index = index
+            self.high_index = high_index
+
+    def is_fresh(self, now=None):
+        now = now or datetime.utcnow()
+        return self.fetched_at is not None and now - self.fetched_at < self.ttl
+
+    @staticmethod
+    def _window(index, currencies, start, end):
+        """Eventos das moedas com horário em [start, end]"""
+        found = []
+        for currency in currencies:
+            times, items = index.get(currency, ((), ()))
+            lo = bisect.bisect_left(times, start)
+            hi = bisect.bisect_right(times, end)
+            found.extend(items[lo:hi])
+        return sorted(found, key=lambda e: e['time'])
+
+    def upcoming(self, pair_name, hours, now=None, high_only=False):
+        """
+        Eventos das moedas do par entre now - CALENDAR_LOOKBACK_HOURS e now + hours
+        """
+        now = _epoch(now or datetime.utcnow())
+        start = now - config.CALENDAR_LOOKBACK_HOURS * 3600
+        end = now + hours * 3600
+
+        with self.lock:
+            index = self.high_index if high_only else self.index
+            return self._window(index, pair_currencies(pair_name), start, end)
+
+    def has_high_impact_event(self, pair_name, hours=None, now=None):
+        """O par tem evento de alto impacto na janela (CALENDAR_EVENT_WINDOW_HOURS)?"""
+        hours = config.CALENDAR_EVENT_WINDOW_HOURS if hours is None else hours
+        now = _epoch(now or datetime.utcnow())
+        start = now - config.CALENDAR_LOOKBACK_HOURS * 3600
+        end = now + hours * 3600
+
+        with self.lock:
+            for currency in pair_currencies(pair_name):
+                times = self.high_index.get(currency, ((), ()))[0]
+                i = bisect.bisect_left(times, start)
+                if i < len(times) and times[i] <= end:
+                    return True
+
+        return False
+
+    def summary(self, now=None):
+        """Resumo no formato de DataFetcher.get_economic_calendar (próximas 24h/48h)"""
+        now = now or datetime.utcnow()
+        next_24h = []
+        next_48h = []
+
+        for event in self.events:
+            event_time = datetime.strptime(event['time'], '%Y-%m-%dT%H:%M:%S')
+            hours_diff = (event_time - now).total_seconds() / 3600
+            if hours_diff < 0 or hours_diff > 48:
+                continue
+
+            item = {
+                'title': event['title'],
+                'country': event['country'],
+                'time': event_time.strftime('%H:%M UTC'),
+                'date': event_time.strftime('%Y-%m-%d'),
+                'hours_until': round(hours_diff, 1),
+                'importance': event['importance']
+            }
+            (next_24h if hours_diff <= 24 else next_48h).append(item)
+
+        next_24h = sorted(next_24h, key=lambda x: x['hours_until'])
+        next_48h = sorted(next_48h, key=lambda x: x['hours_until'])[:10]
+
+        return {
+            'next_24h': next_24h[:10],
+            'next_48h': next_48h,
+            'high_impact': any(item['importance'] >= config.CALENDAR_HIGH_IMPACT for item in next_24h),
+            'total_events': len(next_24h[:10]) + len(next_48h),
+            'last_update': self.fetched_at.strftime('%Y-%m-%d %H:%M UTC') if self.fetched_at else None,
+            'source': 'Trading Economics'
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_calendar_store():
+    """Calendário compartilhado (carregado do disco na 1ª chamada)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CalendarStore()
+        return _store
@@ -0,0 +1,222 @@
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+import config
+from modules.compact_candles import expand_frame
+from modules.ohlcv_decoder import COLUMNS
+
+# Largura fixa, little-endian: o arquivo é o próprio array
+TIME_FILE = 'datetime.i8'
+COLUMN_FILES = {col: f'{col}.f8' for col in COLUMNS}
+TIME_DTYPE = np.dtype('<i8')
+VALUE_DTYPE = np.dtype('<f8')
+
+
+class CandleArchive:
+    """
+    Arquivo histórico de velas OHLCV em colunas de largura fixa
+
+    Um diretório por (símbolo, intervalo) com um arquivo binário cru por
+    coluna (datetime em ns UTC int64, OHLCV em float64), lido via
+    numpy.memmap: abrir dez anos de M15 não lê nada do disco, e um
+    intervalo de datas é uma busca binária nos horários seguida de
+    fatias (views) das colunas, sem parse nem cópia. Só as páginas
+    tocadas pela análise entram na memória.
+
+    Gravação só por append (velas fechadas, em ordem). O tamanho válido
+    é o da menor coluna, então um append interrompido no meio é
+    descartado na próxima abertura.
+    """
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or config.CANDLE_ARCHIVE_DIR
+        self.maps = {}
+        self.lock = threading.Lock()
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.base_dir, f"{symbol}_{interval}")
+
+    def series(self, interval=None):
+        """(símbolo, intervalo) disponíveis no arquivo"""
+        if not os.path.isdir(self.base_dir):
+            return []
+
+        found = []
+        for name in sorted(os.listdir(self.base_dir)):
+            if '_' not in name or not os.path.exists(os.path.join(self.base_dir, name, TIME_FILE)):
+                continue
+            symbol, tf = name.rsplit('_', 1)
+            if interval is None or tf == interval:
+                found.append((symbol, tf))
+        return found
+
+    @staticmethod
+    def _rows(directory):
+        """Velas completas (menor coluna)"""
+        sizes = [os.path.getsize(os.path.join(directory, TIME_FILE)) // TIME_DTYPE.itemsize]
+        for filename in COLUMN_FILES.values():
+            path = os.path.join(directory, filename)
+            sizes.append(os.path.getsize(path) // VALUE_DTYPE.itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def open(self, symbol, interval):
+        """
+        Colunas mapeadas em memória de um (símbolo, intervalo)
+
+        Returns:
+            (times int64 ns, {coluna: float64}) somente leitura, ou None
+        """
+        key = (symbol, interval)
+        with self.lock:
+            if key in self.maps:
+                return self.maps[key]
+
+            directory = self._dir(symbol, interval)
+            if not os.path.exists(os.path.join(directory, TIME_FILE)):
+                return None
+
+            rows = self._rows(directory)
+            if rows == 0:
+                return None
+
+            times = np.memmap(os.path.join(directory, TIME_FILE), dtype=TIME_DTYPE, mode='r', shape=(rows,))
+            columns = {
+                col: np.memmap(os.path.join(directory, filename), dtype=VALUE_DTYPE, mode='r', shape=(rows,))
+                for col, filename in COLUMN_FILES.items()
+            }
+            self.maps[key] = (times, columns)
+            return self.maps[key]
+
+    def last_time(self, symbol, interval):
+        """Horário da última vela arquivada (ou None)"""
+        mapped = self.open(symbol, interval)
+        return None if mapped is None else pd.Timestamp(int(mapped[0][-1]))
+
+    def view(self, symbol, interval, start=None, end=None):
+        """
+        Fatia [start, end] sem cópia (start/end: qualquer coisa aceita por pd.Timestamp)
+
+        Returns:
+            (times, {coluna: array}) - views das colunas mapeadas, ou None
+        """
+        mapped = self.open(symbol, interval)
+        if mapped is None:
+            return None
+
+        times, columns = mapped
+        lo = 0 if start is None else int(np.searchsorted(times, pd.Timestamp(start).value, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, pd.Timestamp(end).value, side='right'))
+
+        return times[lo:hi], {col: values[lo:hi] for col, values in columns.items()}
+
+    @staticmethod
+    def _frame(times, columns):
+        """DataFrame sobre as views (uma coluna por bloco, sem consolidar)"""
+        index = pd.DatetimeIndex(times.view('M8[ns]'), name='datetime')
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def frame(self, symbol, interval, start=None, end=None):
+        """DataFrame OHLCV de [start, end] apoiado nos arquivos (sem cópia, somente leitura)"""
+        sliced = self.view(symbol, interval, start, end)
+        if sliced is None or not len(sliced[0]):
+            return None
+        return self._frame(*sliced)
+
+    def tail(self, symbol, interval, bars):
+        """Últimas bars velas como DataFrame sem cópia"""
+        mapped = self.open(symbol, interval)
+        if mapped is None:
+            return None
+
+        times, columns = mapped
+        return self._frame(times[-bars:], {col: values[-bars:] for col, values in columns.items()})
+
+    def append(self, symbol, interval, df):
+        """
+        Anexa as velas posteriores à última arquivada
+
+        df deve conter só velas fechadas (a vela em formação mudaria
+        depois de gravada).
+
+        Returns:
+            Número de velas anexadas
+        """
+        if df is None or df.empty:
+            return 0
+
+        df = expand_frame(df)
+        times = df.index.asi8
+        directory = self._dir(symbol, interval)
+
+        with self.lock:
+            os.makedirs(directory, exist_ok=True)
+            time_path = os.path.join(directory, TIME_FILE)
+            rows = self._rows(directory) if os.path.exists(time_path) else 0
+
+            if rows:
+                last = np.fromfile(time_path, dtype=TIME_DTYPE, count=1, offset=(rows - 1) * TIME_DTYPE.itemsize)[0]
+                times = times[times > last]
+            if not len(times):
+                return 0
+
+            new = df.iloc[len(df) - len(times):]
+            # Horários por último: uma coluna de valores incompleta nunca vira vela válida
+            for col, filename in list(COLUMN_FILES.items()) + [(None, TIME_FILE)]:
+                path = os.path.join(directory, filename)
+                dtype = TIME_DTYPE if col is None else VALUE_DTYPE
+                values = times if col is None else new[col].to_numpy(dtype=np.float64)
+                with open(path, 'ab') as f:
+                    f.truncate(rows * dtype.itemsize)  # Sobra de append interrompido
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+            self.maps.pop((symbol, interval), None)
+
+        return len(times)
+
+    def write(self, symbol, interval, df):
+        """
+        Importa um histórico completo (ex: CSV/Parquet de anos)
+
+        Mescla com o que já estiver arquivado (a vela do df prevalece) e
+        regrava o diretório de forma atômica.
+
+        Returns:
+            Total de velas arquivadas
+        """
+        df = expand_frame(df)[COLUMNS]
+        existing = self.frame(symbol, interval)
+        if existing is not None:
+            df = pd.concat([existing, df])
+            df = df[~df.index.duplicated(keep='last')]
+        df = df.sort_index()
+
+        directory = self._dir(symbol, interval)
+        tmp_dir = directory + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        df.index.asi8.astype(TIME_DTYPE).tofile(os.path.join(tmp_dir, TIME_FILE))
+        for col, filename in COLUMN_FILES.items():
+            df[col].to_numpy(dtype=VALUE_DTYPE).tofile(os.path.join(tmp_dir, filename))
+
+        with self.lock:
+            self.maps.pop((symbol, interval), None)
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+            os.replace(tmp_dir, directory)
+
+        return len(df)
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_candle_archive():
+    """Arquivo histórico compartilhado (mapas reaproveitados entre chamadas)"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = CandleArchive()
+        return _archive
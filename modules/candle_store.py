@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pandas as pd
+import config
+from modules.compact_candles import compact_frame, expand_frame
+
+class CandleStore:
+    """
+    Armazenamento local colunar de velas OHLCV
+    Um arquivo .npz por (símbolo, intervalo), uma coluna por array
+    """
+
+    COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    def __init__(self, base_dir=None, max_bars=None):
+        self.base_dir = base_dir or config.CANDLE_STORE_DIR
+        self.max_bars = max_bars or config.CANDLE_STORE_MAX_BARS
+
+    def _path(self, symbol, interval):
+        """Caminho do arquivo de um (símbolo, intervalo)"""
+        return os.path.join(self.base_dir, f"{symbol}_{interval}.npz")
+
+    def load(self, symbol, interval):
+        """Carrega velas salvas ou None se não houver"""
+        path = self._path(symbol, interval)
+
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path) as data:
+                index = pd.DatetimeIndex(data['datetime'], name='datetime')
+                df = pd.DataFrame({col: data[col] for col in self.COLUMNS}, index=index)
+        except Exception as e:
+            print(f"  ⚠️ Store ilegível ({symbol} {interval}): {str(e)}")
+            return None
+
+        if df.empty:
+            return None
+        return compact_frame(df) if config.COMPACT_CANDLES else df
+
+    def save(self, symbol, interval, df):
+        """Grava velas de forma atômica (tmp + rename)"""
+        if df is None or df.empty:
+            return
+
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        path = self._path(symbol, interval)
+        tmp_path = path + '.tmp'
+
+        # Em disco sempre float64 exato (independe do modo compacto)
+        df = expand_frame(df)
+        columns = {col: df[col].to_numpy(dtype=np.float64) for col in self.COLUMNS}
+        columns['datetime'] = df.index.to_numpy(dtype='datetime64[ns]')
+
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+
+        os.replace(tmp_path, path)
+
+    def merge(self, symbol, interval, df_new, existing=None):
+        """
+        Mescla velas novas com existing e salva (dedup por datetime)
+
+        Velas repetidas ficam com a versão mais recente, pois a última
+        vela salva normalmente ainda estava em formação. Sem existing,
+        as velas novas substituem o que estiver salvo.
+        """
+        # Mescla em float64: colunas int32 escaladas e float64 não se misturam
+        if existing is None:
+            merged = expand_frame(df_new).sort_index()
+        else:
+            merged = pd.concat([expand_frame(existing), expand_frame(df_new)[self.COLUMNS]])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        merged = merged.tail(self.max_bars)
+        self.save(symbol, interval, merged)
+
+        return compact_frame(merged) if config.COMPACT_CANDLES else merged
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from modules.ohlcv_decoder import COLUMNS
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+MAX_DECIMALS = 8
+SPARSE_SHARE = 0.9  # Volume vira coluna esparsa quando 90%+ das velas têm o mesmo valor
+INT32_MAX = 2 ** 31 - 1
+MINUTE_NS = 60 * 10 ** 9
+
+# Metadados do frame compacto (df.attrs; acompanham fatias e cópias)
+DECIMALS_ATTR = 'price_decimals'  # OHLC em int32 = preço * 10^casas (None: float64)
+TIME_BASE_ATTR = 'time_base'      # Índice int32 = minutos desde time_base ns (None: DatetimeIndex)
+
+def price_decimals(values):
+    """Menor número de casas decimais que representa todos os preços (None se > MAX_DECIMALS)"""
+    values = np.asarray(values, dtype=np.float64)
+    for decimals in range(MAX_DECIMALS + 1):
+        if np.allclose(np.round(values, decimals), values, rtol=1e-12, atol=0, equal_nan=True):
+            return decimals
+    return None
+
+def _scaled_prices(df):
+    """
+    OHLC em inteiros int32 na precisão do instrumento
+
+    Só vale se a divisão de volta por 10^casas devolver o float64
+    original bit a bit (preços vindos de texto decimal sempre voltam).
+
+    Returns:
+        (casas, {coluna: int32}) ou (None, {coluna: float64})
+    """
+    columns = {col: df[col].to_numpy(dtype=np.float64) for col in PRICE_COLUMNS}
+    prices = np.concatenate(list(columns.values()))
+
+    decimals = price_decimals(prices) if np.isfinite(prices).all() else None
+    if decimals is None:
+        return None, columns
+
+    scale = 10.0 ** decimals
+    scaled = {col: np.round(values * scale) for col, values in columns.items()}
+    if max(np.abs(values).max() for values in scaled.values()) > INT32_MAX:
+        return None, columns
+    if not all(np.array_equal(scaled[col] / scale, columns[col]) for col in PRICE_COLUMNS):
+        return None, columns
+
+    return decimals, {col: values.astype(np.int32) for col, values in scaled.items()}
+
+def _compact_volume(values):
+    """Volume sintético/constante: coluna esparsa (só as exceções ocupam memória)"""
+    finite = values[np.isfinite(values)]
+    if len(finite):
+        common, counts = np.unique(finite, return_counts=True)
+        fill = common[np.argmax(counts)]
+        if counts.max() >= SPARSE_SHARE * len(values):
+            return pd.arrays.SparseArray(values, fill_value=fill)
+
+    if len(finite) == len(values) and np.array_equal(values, np.round(values)) and np.abs(values).max(initial=0) <= INT32_MAX:
+        return values.astype(np.int32)
+    return values
+
+def _compact_index(index):
+    """Minutos int32 desde a primeira vela (None se o horário não couber)"""
+    times = index.asi8
+    base = int(times[0])
+    offsets = times - base
+    if (offsets % MINUTE_NS).any() or offsets.max() // MINUTE_NS > INT32_MAX:
+        return None, index
+    return base, pd.Index((offsets // MINUTE_NS).astype(np.int32), name='datetime')
+
+def compact_frame(df):
+    """
+    Versão compacta de um DataFrame OHLCV
+
+    OHLC em int32 escalado pela precisão do instrumento (5 casas no
+    forex, 3 no JPY, 2 no ouro), índice em minutos int32 desde a
+    primeira vela e volume sintético (forex) numa coluna esparsa sem
+    dados: 20 bytes por vela em vez de 48. Escala e base de tempo vão
+    em df.attrs. Leia os valores com column_values/frame_times ou
+    volte ao float64 com expand_frame. Frames já compactos voltam sem cópia.
+    """
+    if df is None or df.empty or is_compact(df):
+        return df
+
+    decimals, columns = _scaled_prices(df)
+    columns['Volume'] = _compact_volume(df['Volume'].to_numpy(dtype=np.float64))
+    time_base, index = _compact_index(df.index)
+
+    compact = pd.DataFrame(columns, index=index)
+    compact.attrs[DECIMALS_ATTR] = decimals
+    compact.attrs[TIME_BASE_ATTR] = time_base
+    return compact
+
+def is_compact(df):
+    return df is not None and DECIMALS_ATTR in df.attrs
+
+def column_values(df, column):
+    """Coluna em float64 exato (desfaz a escala dos preços); sem cópia se já for float64"""
+    values = df[column].to_numpy(dtype=np.float64)
+    decimals = df.attrs.get(DECIMALS_ATTR)
+    if decimals is not None and column in PRICE_COLUMNS:
+        values = values / 10.0 ** decimals
+    return values
+
+def frame_times(df):
+    """Horários das velas em ns UTC (int64)"""
+    time_base = df.attrs.get(TIME_BASE_ATTR)
+    if time_base is None:
+        return df.index.asi8
+    return df.index.to_numpy(dtype=np.int64) * MINUTE_NS + time_base
+
+def frame_index(df):
+    """DatetimeIndex das velas (reconstruído no frame compacto)"""
+    if df.attrs.get(TIME_BASE_ATTR) is None:
+        return df.index
+    return pd.DatetimeIndex(frame_times(df).view('M8[ns]'), name='datetime')
+
+def last_time(df):
+    """Horário da última vela (Timestamp)"""
+    return pd.Timestamp(int(frame_times(df)[-1])) if is_compact(df) else df.index[-1]
+
+def expand_frame(df):
+    """DataFrame OHLCV float64 (preços exatos, volume denso, DatetimeIndex); sem cópia se não for compacto"""
+    if df is None or df.empty or not is_compact(df):
+        return df
+
+    block = np.empty((len(df), len(COLUMNS)), dtype=np.float64)
+    for i, col in enumerate(COLUMNS):
+        block[:, i] = column_values(df, col)
+
+    return pd.DataFrame(block, index=frame_index(df), columns=COLUMNS, copy=False)
+
+def expand_frames(data):
+    """expand_frame em todos os timeframes de {tf: df}"""
+    return {tf: expand_frame(df) for tf, df in data.items()}
+
+def frame_nbytes(df):
+    """Memória ocupada pelo DataFrame (colunas + índice)"""
+    return 0 if df is None else int(df.memory_usage(index=True, deep=True).sum())
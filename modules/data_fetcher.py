@@ -1,9 +1,12 @@
-import pandas as pd
-from datetime import datetime, timedelta
-import pytz
-import requests
-import time
+from datetime import datetime, timedelta, timezone
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+from modules.calendar_store import COUNTRY_CURRENCY, get_calendar_store
+from modules.http_client import get_http_client
+from modules.metrics import get_metrics
+from modules.rate_limiter import get_rate_limiter
 
 class DataFetcher:
     """
@@ -12,10 +15,10 @@ class DataFetcher:
     - Trading Economics: Calendário Econômico Macro
     """
     
-    def __init__(self):
-        self.timezone = pytz.UTC
-        self.calendar_cache = None
-        self.calendar_cache_time = None
+    def __init__(self, use_store=True):
+        """use_store=False: sem store local nem arquivo (só a API)"""
+        self.timezone = timezone.utc
+        self.calendar = get_calendar_store()
         
         self.twelve_data_key = os.environ.get('TWELVE_DATA_KEY', 'demo')
         self.te_api_key = os.environ.get('TE_API_KEY', '')
@@ -42,6 +45,33 @@ class DataFetcher:
             '1d': '1day'
         }
         
+        self.outputsize_map = {
+            '15m': 480,
+            '1h': 720,
+            '4h': 180,
+            '1d': 90
+        }
+        
+        self.interval_minutes = {
+            '15m': 15,
+            '1h': 60,
+            '4h': 240,
+            '1d': 1440
+        }
+        
+        # Store e arquivo carregam pandas: criados só no 1º acesso (o calendário não precisa)
+        self.use_store = use_store
+        self._candle_store = None
+        self._archive = None
+        self.http = get_http_client()
+        
+        # Limiter compartilhado por todas as threads/instâncias
+        self.rate_limiter = get_rate_limiter(
+            'twelve_data',
+            config.TWELVE_DATA_RATE_LIMIT,
+            config.TWELVE_DATA_BURST
+        )
+        
         self.macro_countries = [
             'United States',
             'Euro Area', 
@@ -52,7 +82,23 @@ class DataFetcher:
             'Australia'
         ]
     
-    def fetch_ohlcv(self, symbol, interval='15m', period='5d'):
+    @property
+    def candle_store(self):
+        """Store local de velas (None se desligado)"""
+        if self._candle_store is None and self.use_store and config.CANDLE_STORE_ENABLED:
+            from modules.candle_store import CandleStore
+            self._candle_store = CandleStore()
+        return self._candle_store
+    
+    @property
+    def archive(self):
+        """Arquivo histórico memory-mapped (None se desligado)"""
+        if self._archive is None and self.use_store and config.CANDLE_ARCHIVE_ENABLED:
+            from modules.candle_archive import get_candle_archive
+            self._archive = get_candle_archive()
+        return self._archive
+    
+    def fetch_ohlcv(self, symbol, interval='15m', period='5d', outputsize=None):
         """Busca cotações do Twelve Data"""
         
         print(f"\n📊 Buscando {symbol} ({interval}):")
@@ -61,126 +107,470 @@ class DataFetcher:
             td_symbol = self.symbol_map.get(symbol, symbol)
             td_interval = self.interval_map.get(interval, '15min')
             
-            outputsize_map = {
-                '15m': 480,
-                '1h': 720,
-                '4h': 180,
-                '1d': 90
-            }
-            outputsize = outputsize_map.get(interval, 480)
+            if outputsize is None:
+                outputsize = self.outputsize_map.get(interval, 480)
             
             print(f"  🔄 Twelve Data: {td_symbol} | {td_interval} | {outputsize} velas")
             
-            url = 'https://api.twelvedata.com/time_series'
+            data = self._request_time_series(td_symbol, td_interval, outputsize)
             
-            params = {
-                'symbol': td_symbol,
-                'interval': td_interval,
-                'apikey': self.twelve_data_key,
-                'outputsize': outputsize,
-                'format': 'JSON'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            
-            if response.status_code != 200:
-                print(f"  ❌ HTTP {response.status_code}")
+            if data is None:
                 return None
             
-            data = response.json()
+            df = self._parse_time_series(data)
             
-            if 'status' in data and data['status'] == 'error':
-                msg = data.get('message', 'Unknown')
-                print(f"  ❌ API Error: {msg}")
-                return None
-            
-            if 'values' not in data:
-                print(f"  ❌ Sem dados. Keys: {list(data.keys())}")
-                return None
+            if df is not None:
+                print(f"  ✅ {len(df)} velas obtidas")
             
-            df = pd.DataFrame(data['values'])
-            
-            if df.empty:
-                print(f"  ❌ DataFrame vazio")
-                return None
-            
-            # Renomeia colunas base (Volume pode não existir)
-            column_mapping = {
-                'open': 'Open',
-                'high': 'High',
-                'low': 'Low',
-                'close': 'Close'
-            }
+            return df
+        
+        except Exception as e:
+            print(f"  ❌ Exceção: {str(e)}")
+            return None
+    
+    def fetch_ohlcv_batch(self, symbols, interval='15m', outputsize=None, retry_throttled=True):
+        """
+        Busca vários símbolos numa única requisição ao Twelve Data
+        
+        O endpoint time_series aceita símbolos separados por vírgula e
+        devolve um objeto por símbolo; erros de um símbolo não derrubam
+        os demais. Símbolos que voltam com {"code": 429} (cota esgotada
+        no meio do lote) são pedidos de novo, uma vez, no minuto seguinte.
+        
+        Returns:
+            dict {symbol: df ou None}
+        """
+        result = {symbol: None for symbol in symbols}
+        
+        if not symbols:
+            return result
+        
+        td_symbols = [self.symbol_map.get(symbol, symbol) for symbol in symbols]
+        td_interval = self.interval_map.get(interval, '15min')
+        
+        if outputsize is None:
+            outputsize = self.outputsize_map.get(interval, 480)
+        
+        print(f"\n📦 Lote Twelve Data: {len(symbols)} símbolos | {td_interval} | {outputsize} velas")
+        
+        try:
+            # Twelve Data cobra 1 crédito por símbolo do lote
+            data = self._request_time_series(','.join(td_symbols), td_interval, outputsize, credits=len(symbols))
             
-            if 'volume' in df.columns:
-                column_mapping['volume'] = 'Volume'
+            if data is None:
+                return result
             
-            df = df.rename(columns=column_mapping)
+            # Erro do lote inteiro (chave inválida, limite estourado...)
+            if data.get('status') == 'error' and 'values' not in data:
+                print(f"  ❌ API Error: {data.get('message', 'Unknown')}")
+                return result
             
-            # Converte OHLC
-            for col in ['Open', 'High', 'Low', 'Close']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+            # Com um único símbolo a resposta não vem indexada
+            if len(symbols) == 1:
+                data = {td_symbols[0]: data}
             
-            # Volume: real ou fake
-            if 'Volume' in df.columns:
-                df['Volume'] = pd.to_numeric(df['Volume'], errors='coerce').fillna(1000)
-            else:
-                df['Volume'] = 1000
+            throttled = []
+            for symbol, td_symbol in zip(symbols, td_symbols):
+                entry = data.get(td_symbol)
+                
+                if entry is None:
+                    print(f"  ❌ {symbol}: ausente na resposta")
+                    continue
+                
+                if retry_throttled and entry.get('code') == 429:
+                    throttled.append(symbol)
+                    continue
+                
+                df = self._parse_time_series(entry, label=symbol)
+                
+                if df is not None:
+                    print(f"  ✅ {symbol}: {len(df)} velas obtidas")
+                    result[symbol] = df
+            
+            if throttled:
+                delay = self._quota_delay()
+                get_metrics().inc('http_retries', endpoint='api.twelvedata.com/time_series')
+                print(f"  🔁 Twelve Data: {len(throttled)} símbolo(s) do lote sem cota (429), novo pedido em {delay:.0f}s")
+                time.sleep(delay)
+                result.update(self.fetch_ohlcv_batch(throttled, interval, outputsize, retry_throttled=False))
+        
+        except Exception as e:
+            print(f"  ❌ Exceção no lote: {str(e)}")
+        
+        return result
+    
+    @staticmethod
+    def _quota_delay():
+        """Segundos até a virada do minuto (quando os créditos do Twelve Data renovam)"""
+        return 60 - time.time() % 60 + 1
+    
+    def _request_time_series(self, td_symbol, td_interval, outputsize, credits=1):
+        """
+        Chamada HTTP ao endpoint time_series (JSON ou None)
+        
+        Cota estourada vem como HTTP 200 com {"code": 429} no corpo: a
+        requisição é repetida no minuto seguinte, passando de novo pelo
+        rate limiter.
+        """
+        url = 'https://api.twelvedata.com/time_series'
+        
+        params = {
+            'symbol': td_symbol,
+            'interval': td_interval,
+            'apikey': self.twelve_data_key,
+            'outputsize': outputsize,
+            'format': 'JSON'
+        }
+        
+        for attempt in range(config.HTTP_MAX_RETRIES + 1):
+            waited = self.rate_limiter.acquire(credits)
+            if waited > 0:
+                print(f"  ⏳ Rate limit: aguardou {waited:.1f}s")
             
-            # Datetime
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            df = df.set_index('datetime')
-            df = df.sort_index()
+            response = self.http.get(url, params=params, limiter=self.rate_limiter, tokens=credits)
             
-            if df.index.tz is not None:
-                df.index = df.index.tz_localize(None)
+            if response.status_code != 200:
+                print(f"  ❌ HTTP {response.status_code}")
+                return None
             
-            print(f"  ✅ {len(df)} velas obtidas")
+            data = response.json()
+            if not (isinstance(data, dict) and data.get('code') == 429) or attempt == config.HTTP_MAX_RETRIES:
+                return data
             
-            return df
+            delay = self._quota_delay()
+            get_metrics().inc('http_retries', endpoint='api.twelvedata.com/time_series')
+            print(f"  🔁 Twelve Data: cota do minuto esgotada (429), tentativa {attempt + 1}/{config.HTTP_MAX_RETRIES} em {delay:.0f}s")
+            time.sleep(delay)
+    
+    def _parse_time_series(self, data, label=None):
+        """Converte a resposta JSON de um símbolo em DataFrame OHLCV"""
+        prefix = f"{label}: " if label else ''
         
-        except Exception as e:
-            print(f"  ❌ Exceção: {str(e)}")
+        if 'status' in data and data['status'] == 'error':
+            msg = data.get('message', 'Unknown')
+            print(f"  ❌ {prefix}API Error: {msg}")
+            return None
+        
+        if 'values' not in data:
+            print(f"  ❌ {prefix}Sem dados. Keys: {list(data.keys())}")
+            return None
+        
+        from modules.compact_candles import compact_frame
+        from modules.ohlcv_decoder import decode_time_series
+        
+        df = decode_time_series(data['values'])
+        
+        if df is None or df.empty:
+            print(f"  ❌ {prefix}DataFrame vazio")
+            return None
+        
+        return compact_frame(df) if config.COMPACT_CANDLES else df
+    
+    def fetch_candles(self, symbol, interval='15m', outputsize=None):
+        """
+        Busca velas lendo primeiro o store local
+        
+        Só a cauda faltante desde a última vela salva é pedida ao
+        Twelve Data; o resultado é mesclado e salvo de volta.
+        """
+        if outputsize is None:
+            outputsize = self.outputsize_map.get(interval, 480)
+        
+        if self.candle_store is None:
+            return self.fetch_ohlcv(symbol, interval=interval, outputsize=outputsize)
+        
+        cached, request_size = self._plan_top_up(symbol, interval, outputsize)
+        df_new = self.fetch_ohlcv(symbol, interval=interval, outputsize=request_size)
+        
+        return self._store_top_up(symbol, interval, df_new, cached, outputsize)
+    
+    def fetch_candles_batch(self, symbols, interval='15m', outputsize=None):
+        """
+        Versão em lote de fetch_candles
+        
+        No máximo duas requisições: uma para os símbolos com store
+        (tamanho = maior cauda faltante) e outra para os que precisam
+        da janela inteira.
+        
+        Returns:
+            dict {symbol: df ou None}
+        """
+        if outputsize is None:
+            outputsize = self.outputsize_map.get(interval, 480)
+        
+        if self.candle_store is None:
+            return self.fetch_ohlcv_batch(symbols, interval=interval, outputsize=outputsize)
+        
+        plans = {symbol: self._plan_top_up(symbol, interval, outputsize) for symbol in symbols}
+        top_up = [symbol for symbol in symbols if plans[symbol][0] is not None]
+        full = [symbol for symbol in symbols if plans[symbol][0] is None]
+        
+        fetched = {}
+        if top_up:
+            request_size = max(plans[symbol][1] for symbol in top_up)
+            fetched.update(self.fetch_ohlcv_batch(top_up, interval=interval, outputsize=request_size))
+        if full:
+            fetched.update(self.fetch_ohlcv_batch(full, interval=interval, outputsize=outputsize))
+        
+        return {
+            symbol: self._store_top_up(symbol, interval, fetched[symbol], plans[symbol][0], outputsize)
+            for symbol in symbols
+        }
+    
+    def _plan_top_up(self, symbol, interval, outputsize):
+        """
+        Decide quantas velas pedir com base no store
+        
+        Returns:
+            (cached, request_size) - cached é None se o store não serve
+        """
+        cached = self.candle_store.load(symbol, interval)
+        source = 'Store'
+        
+        if (cached is None or len(cached) < outputsize) and self.archive is not None:
+            # Store vazio/curto: a janela sai do arquivo histórico
+            archived = self.archive.tail(symbol, interval, outputsize)
+            if archived is not None and len(archived) >= outputsize:
+                cached, source = archived, 'Arquivo'
+        
+        if cached is None or len(cached) < outputsize:
+            return None, outputsize
+        
+        from modules.compact_candles import last_time
+        
+        missing = self._bars_since(last_time(cached), interval)
+        
+        if missing >= outputsize:
+            # Lacuna maior que a janela: descarta para não deixar buracos
+            return None, outputsize
+        
+        # Overlap cobre a última vela salva, que estava em formação
+        request_size = min(outputsize, missing + config.CANDLE_STORE_OVERLAP)
+        print(f"  💾 {source} {symbol} {interval}: {len(cached)} velas | buscando só {request_size}")
+        
+        return cached, request_size
+    
+    def _store_top_up(self, symbol, interval, df_new, cached, outputsize):
+        """Mescla a cauda buscada no store (ou usa o store se a busca falhou)"""
+        if df_new is None:
+            stale = self.candle_store.load(symbol, interval)
+            if stale is not None:
+                print(f"  ⚠️ {symbol}: usando {len(stale)} velas do store (sem atualização)")
+                return stale.tail(outputsize)
+            return None
+        
+        merged = self.candle_store.merge(symbol, interval, df_new, existing=cached)
+        
+        if self.archive is not None:
+            # Só velas fechadas: a última pode estar em formação
+            self.archive.append(symbol, interval, merged.iloc[:-1])
+        
+        return merged.tail(outputsize)
+    
+    def load_history(self, symbol, interval='15m', start=None, end=None):
+        """
+        Histórico local de [start, end] sem chamar a API
+        
+        DataFrame apoiado no arquivo memory-mapped (sem parse nem cópia,
+        somente leitura) ou None se o arquivo não tiver o par.
+        """
+        if self.archive is None:
             return None
+        return self.archive.frame(symbol, interval, start, end)
+    
+    def _bars_since(self, last_time, interval):
+        """Quantidade de velas decorridas desde last_time"""
+        minutes = self.interval_minutes.get(interval, 15)
+        elapsed = (datetime.utcnow() - last_time.to_pydatetime()).total_seconds() / 60
+        
+        return max(int(elapsed // minutes), 0)
+    
+    def resample_ohlcv(self, df, interval):
+        """
+        Agrega velas M15 num timeframe maior
+        
+        Buckets fechados à esquerda e alinhados a 00:00 UTC (mais
+        config.RESAMPLE_OFFSET). O primeiro bucket é descartado se o
+        histórico começa no meio dele; o último pode estar em formação,
+        como na API.
+        """
+        from modules.compact_candles import compact_frame, expand_frame
+        
+        rule = f"{self.interval_minutes[interval]}min"
+        df = expand_frame(df)
+        
+        resampled = df.resample(
+            rule,
+            label='left',
+            closed='left',
+            origin='epoch',
+            offset=config.RESAMPLE_OFFSET
+        ).agg({
+            'Open': 'first',
+            'High': 'max',
+            'Low': 'min',
+            'Close': 'last',
+            'Volume': 'sum'
+        }).dropna(subset=['Close'])
+        
+        if not resampled.empty and resampled.index[0] != df.index[0]:
+            resampled = resampled.iloc[1:]
+        
+        return compact_frame(resampled) if config.COMPACT_CANDLES else resampled
+    
+    def fetch_resampled_timeframes(self, symbol):
+        """
+        Busca só M15 (histórico profundo) e deriva H1/H4 localmente
+        
+        Cai para a busca direta de um timeframe apenas quando o
+        histórico M15 não cobre a quantidade de velas necessária.
+        """
+        primary = config.TIMEFRAMES['primary']
+        df_deep = self.fetch_candles(symbol, interval=primary, outputsize=config.RESAMPLE_M15_DEPTH)
+        
+        return self._derive_timeframes(symbol, df_deep)
+    
+    def _derive_timeframes(self, symbol, df_deep):
+        """Monta o dict multi-timeframe a partir do M15 profundo"""
+        primary = config.TIMEFRAMES['primary']
+        
+        if df_deep is None:
+            return {tf: None for tf in config.TIMEFRAMES.values()}
+        
+        data = {primary: df_deep.tail(self.outputsize_map.get(primary, 480))}
+        
+        for tf in (config.TIMEFRAMES['secondary'], config.TIMEFRAMES['tertiary']):
+            outputsize = self.outputsize_map.get(tf, 480)
+            resampled = self.resample_ohlcv(df_deep, tf)
+            
+            if len(resampled) >= outputsize:
+                print(f"  🧮 {symbol} {tf}: {outputsize} velas derivadas de M15")
+                data[tf] = resampled.tail(outputsize)
+            else:
+                print(f"  ⚠️ {symbol} {tf}: M15 insuficiente ({len(resampled)}/{outputsize}), busca direta")
+                data[tf] = self.fetch_candles(symbol, interval=tf)
+        
+        return data
     
     def fetch_multiple_timeframes(self, symbol):
-        """Busca dados em múltiplos timeframes COM DELAYS para respeitar rate limit"""
+        """Busca dados em múltiplos timeframes (rate limit via token bucket)"""
         
         print(f"\n{'='*60}")
         print(f"📈 ANALISANDO: {symbol}")
         print(f"{'='*60}")
         
+        if config.RESAMPLE_HIGHER_TIMEFRAMES:
+            data = self.fetch_resampled_timeframes(symbol)
+            
+            if data['15m'] is None:
+                print(f"\n❌ FALHA CRÍTICA: {symbol} sem dados M15")
+            else:
+                self._print_summary(symbol, data)
+            
+            return data
+        
         data = {}
         
         # M15
         print("\n⏰ Timeframe M15 (primário):")
-        df_15m = self.fetch_ohlcv(symbol, interval='15m')
+        df_15m = self.fetch_candles(symbol, interval='15m')
         data['15m'] = df_15m
         
         if df_15m is None:
             print(f"\n❌ FALHA CRÍTICA: {symbol} sem dados M15")
             return {'15m': None, '1h': None, '4h': None}
         
-        # DELAY para respeitar rate limit (8 requests/min)
-        print("  ⏳ Aguardando 2s (rate limit)...")
-        time.sleep(2)
-        
         # H1
         print("\n⏰ Timeframe H1 (secundário):")
-        df_1h = self.fetch_ohlcv(symbol, interval='1h')
-        data['1h'] = df_1h
-        
-        print("  ⏳ Aguardando 2s (rate limit)...")
-        time.sleep(2)
+        data['1h'] = self.fetch_candles(symbol, interval='1h')
         
         # H4
         print("\n⏰ Timeframe H4 (terciário):")
-        df_4h = self.fetch_ohlcv(symbol, interval='4h')
-        data['4h'] = df_4h
+        data['4h'] = self.fetch_candles(symbol, interval='4h')
+        
+        self._print_summary(symbol, data)
+        
+        return data
+    
+    def fetch_universe(self, symbols, workers=None):
+        """
+        Busca todos os (par, timeframe) em paralelo
+        
+        As requisições rodam num pool de threads e só o token bucket
+        dita o ritmo, sem sleeps fixos entre timeframes ou pares.
+        
+        Returns:
+            dict {symbol: {'15m': df, '1h': df, '4h': df}}
+        """
+        workers = workers or config.FETCH_WORKERS
+        timeframes = list(config.TIMEFRAMES.values())
+        
+        if config.BATCH_REQUESTS:
+            universe = self._fetch_universe_batched(symbols, workers)
+        elif config.RESAMPLE_HIGHER_TIMEFRAMES:
+            # Uma série M15 por par; H1/H4 derivados localmente
+            print(f"\n🚀 Buscando M15 de {len(symbols)} pares com {workers} workers (H1/H4 via resample)")
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.fetch_resampled_timeframes, symbols))
+            
+            universe = dict(zip(symbols, results))
+        else:
+            jobs = [(symbol, tf) for symbol in symbols for tf in timeframes]
+            
+            print(f"\n🚀 Buscando {len(jobs)} séries ({len(symbols)} pares) com {workers} workers")
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(lambda job: self.fetch_candles(*job), jobs))
+            
+            universe = {symbol: {} for symbol in symbols}
+            for (symbol, tf), df in zip(jobs, frames):
+                universe[symbol][tf] = df
+        
+        for symbol, data in universe.items():
+            if data.get('15m') is None:
+                print(f"\n❌ FALHA CRÍTICA: {symbol} sem dados M15")
+                universe[symbol] = {tf: None for tf in timeframes}
+            else:
+                self._print_summary(symbol, data)
+        
+        return universe
+    
+    def _fetch_universe_batched(self, symbols, workers):
+        """
+        Busca o universo com uma requisição por (lote, timeframe)
+        
+        Lotes de até BATCH_MAX_SYMBOLS símbolos; com resampling ligado
+        só o M15 é buscado e H1/H4 são derivados por símbolo.
+        """
+        primary = config.TIMEFRAMES['primary']
+        size = config.BATCH_MAX_SYMBOLS
+        chunks = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+        
+        if config.RESAMPLE_HIGHER_TIMEFRAMES:
+            jobs = [(chunk, primary, config.RESAMPLE_M15_DEPTH) for chunk in chunks]
+        else:
+            jobs = [(chunk, tf, None) for tf in config.TIMEFRAMES.values() for chunk in chunks]
+        
+        print(f"\n🚀 Buscando {len(symbols)} pares em {len(jobs)} requisições em lote")
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(lambda job: self.fetch_candles_batch(*job), jobs))
         
-        # DELAY entre pares
-        print("  ⏳ Aguardando 5s antes do próximo par...")
-        time.sleep(5)
+        universe = {symbol: {} for symbol in symbols}
+        for (chunk, tf, _), frames in zip(jobs, batches):
+            for symbol in chunk:
+                universe[symbol][tf] = frames.get(symbol)
+        
+        if config.RESAMPLE_HIGHER_TIMEFRAMES:
+            for symbol in symbols:
+                universe[symbol] = self._derive_timeframes(symbol, universe[symbol][primary])
+        
+        return universe
+    
+    def _print_summary(self, symbol, data):
+        """Resumo das velas obtidas por timeframe"""
+        df_15m, df_1h, df_4h = data.get('15m'), data.get('1h'), data.get('4h')
         
         print(f"\n{'='*60}")
         print(f"📊 RESUMO {symbol}:")
@@ -188,26 +578,29 @@ class DataFetcher:
         print(f"  H1:  {'✅ ' + str(len(df_1h)) + ' velas' if df_1h is not None else '⚠️  Sem dados'}")
         print(f"  H4:  {'✅ ' + str(len(df_4h)) + ' velas' if df_4h is not None else '⚠️  Sem dados'}")
         print(f"{'='*60}\n")
-        
-        return data
     
     def get_current_price(self, symbol):
         """Obtém preço atual"""
+        from modules.compact_candles import column_values
+        
         df = self.fetch_ohlcv(symbol, interval='15m')
         
         if df is not None and not df.empty:
-            return df['Close'].iloc[-1]
+            return column_values(df, 'Close')[-1]
         
         return None
     
     def get_economic_calendar(self):
-        """Busca eventos econômicos do Trading Economics"""
+        """
+        Calendário econômico do Trading Economics
         
-        if self.calendar_cache and self.calendar_cache_time:
-            cache_age = (datetime.utcnow() - self.calendar_cache_time).total_seconds()
-            if cache_age < 14400:
-                print("📅 Usando cache do calendário econômico")
-                return self.calendar_cache
+        Uma busca por janela de CALENDAR_TTL_HOURS para todos os pares:
+        os eventos ficam no CalendarStore (disco), compartilhado entre
+        execuções e consultado pelo VTI-3.
+        """
+        if self.calendar.is_fresh():
+            print("📅 Usando cache do calendário econômico")
+            return self.calendar.summary()
         
         print("\n" + "="*60)
         print("📅 BUSCANDO CALENDÁRIO ECONÔMICO - TRADING ECONOMICS")
@@ -233,7 +626,7 @@ class DataFetcher:
                 'importance': '2,3'
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = self.http.get(url, params=params)
             
             if response.status_code != 200:
                 print(f"❌ Trading Economics retornou {response.status_code}")
@@ -247,66 +640,33 @@ class DataFetcher:
             
             print(f"\n📊 Total de eventos: {len(events_raw)}")
             
-            next_24h = []
-            next_48h = []
-            high_impact = False
+            events = []
             
             for event in events_raw:
                 try:
                     country = event.get('Country', '')
-                    event_name = event.get('Event', '')
-                    importance = event.get('Importance', 1)
                     event_date_str = event.get('Date', '')
                     
-                    if country not in self.macro_countries:
-                        continue
-                    
-                    if not event_date_str:
-                        continue
-                    
-                    event_time = datetime.strptime(event_date_str, '%Y-%m-%dT%H:%M:%S')
-                    hours_diff = (event_time - now).total_seconds() / 3600
-                    
-                    if hours_diff < 0:
+                    if country not in self.macro_countries or not event_date_str:
                         continue
                     
-                    item = {
-                        'title': event_name,
+                    events.append({
+                        'time': datetime.strptime(event_date_str, '%Y-%m-%dT%H:%M:%S'),
+                        'currency': COUNTRY_CURRENCY[country],
                         'country': country,
-                        'time': event_time.strftime('%H:%M UTC'),
-                        'date': event_time.strftime('%Y-%m-%d'),
-                        'hours_until': round(hours_diff, 1),
-                        'importance': importance
-                    }
-                    
-                    if 0 <= hours_diff <= 24:
-                        next_24h.append(item)
-                        if importance == 3:
-                            high_impact = True
-                    elif 24 < hours_diff <= 48:
-                        next_48h.append(item)
+                        'title': event.get('Event', ''),
+                        'importance': int(event.get('Importance', 1))
+                    })
                 
-                except:
+                except (KeyError, TypeError, ValueError):
                     continue
             
-            next_24h = sorted(next_24h, key=lambda x: x['hours_until'])[:10]
-            next_48h = sorted(next_48h, key=lambda x: x['hours_until'])[:10]
-            
-            result = {
-                'next_24h': next_24h,
-                'next_48h': next_48h,
-                'high_impact': high_impact,
-                'total_events': len(next_24h) + len(next_48h),
-                'last_update': datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'),
-                'source': 'Trading Economics'
-            }
-            
-            self.calendar_cache = result
-            self.calendar_cache_time = datetime.utcnow()
+            self.calendar.save(events, fetched_at=now)
+            result = self.calendar.summary(now)
             
-            print(f"\n📊 Próximas 24h: {len(next_24h)} eventos")
-            print(f"📊 Próximas 48h: {len(next_48h)} eventos")
-            print(f"🚨 High Impact: {'SIM' if high_impact else 'NÃO'}")
+            print(f"\n📊 Próximas 24h: {len(result['next_24h'])} eventos")
+            print(f"📊 Próximas 48h: {len(result['next_48h'])} eventos")
+            print(f"🚨 High Impact: {'SIM' if result['high_impact'] else 'NÃO'}")
             
             return result
         
@@ -0,0 +1,95 @@
+import threading
+import config
+
+class FeatureCache:
+    """
+    Cache de features (indicadores) por (par, timeframe, última vela)
+
+    Cada feature é calculada no máximo uma vez por vela e compartilhada
+    entre os analisadores. Regras de invalidação:
+      - vela nova (timestamp final diferente) descarta tudo do
+        (par, timeframe) - só a versão mais recente fica em memória;
+      - a mesma vela com close diferente (vela em formação atualizada)
+        ou janela deslocada (primeira vela diferente) também invalida;
+      - invalidate() limpa explicitamente um par/timeframe ou tudo.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = config.FEATURE_CACHE_ENABLED if enabled is None else enabled
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def bar_key(df):
+        """Identidade da vela atual do df: (última vela, close, primeira vela)"""
+        return (df.index[-1], float(df['Close'].iloc[-1]), df.index[0])
+
+    def _features(self, pair, timeframe, df):
+        """Dict de features da vela atual (descarta versões anteriores)"""
+        key = (pair, timeframe)
+        bar = self.bar_key(df)
+        entry = self.entries.get(key)
+
+        if entry is None or entry[0] != bar:
+            entry = (bar, {})
+            self.entries[key] = entry
+
+        return entry[1]
+
+    def get(self, pair, timeframe, df, name, compute):
+        """
+        Valor memoizado da feature name; compute() só roda em cache miss
+
+        Args:
+            df: DataFrame do (par, timeframe), usado para identificar a vela
+            compute: função sem argumentos que calcula a feature
+        """
+        if not self.enabled or df is None or df.empty:
+            return compute()
+
+        with self.lock:
+            features = self._features(pair, timeframe, df)
+            if name in features:
+                self.hits += 1
+                return features[name]
+
+        value = compute()
+
+        with self.lock:
+            self.misses += 1
+            self._features(pair, timeframe, df)[name] = value
+
+        return value
+
+    def put(self, pair, timeframe, df, name, value):
+        """Registra uma feature já calculada (ex: colunas do TechnicalAnalyzer)"""
+        if not self.enabled or df is None or df.empty:
+            return
+
+        with self.lock:
+            self._features(pair, timeframe, df)[name] = value
+
+    def invalidate(self, pair=None, timeframe=None):
+        """Remove entradas de um par (e timeframe), ou todas"""
+        with self.lock:
+            for key in list(self.entries):
+                if (pair is None or key[0] == pair) and (timeframe is None or key[1] == timeframe):
+                    del self.entries[key]
+
+    def stats(self):
+        """Contadores de acerto do cache"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_feature_cache():
+    """Retorna o cache de features compartilhado (criado na 1ª chamada)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FeatureCache()
+        return _cache
@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+import config
+from modules.metrics import get_metrics
+
+# Status transitórios que valem nova tentativa
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Repetir estes não duplica efeitos no servidor
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+def is_connect_error(error):
+    """Falha antes de a requisição chegar ao servidor (seguro repetir qualquer método)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    return isinstance(reason, NewConnectionError)
+
+class HTTPClient:
+    """
+    Camada HTTP compartilhada por todos os módulos
+    - Pool de conexões keep-alive (reaproveita TCP+TLS)
+    - Retries com backoff exponencial + jitter, honrando Retry-After
+    - Timeout por host
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(
+            pool_connections=config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=config.HTTP_POOL_MAXSIZE
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        if not config.HTTP_KEEP_ALIVE:
+            self.session.headers['Connection'] = 'close'
+
+        self.metrics = get_metrics()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, timeout=None, max_retries=None, limiter=None, tokens=1, **kwargs):
+        """
+        Executa a requisição com retries
+
+        Erros de conexão/timeout e status em RETRY_STATUSES são
+        repetidos até max_retries vezes (padrão: HTTP_MAX_RETRIES).
+        Métodos não idempotentes (POST) só repetem erros de conexão e
+        429 com Retry-After: um timeout ou 5xx pode chegar depois de o
+        servidor aceitar (ex: mensagem do Telegram enviada em dobro).
+        Esgotadas as tentativas, devolve a última resposta (ou relança
+        a última exceção).
+
+        Args:
+            limiter: TokenBucket do serviço; cada nova tentativa consome
+                tokens de novo (a 1ª fica a cargo de quem chama)
+        """
+        if max_retries is None:
+            max_retries = config.HTTP_MAX_RETRIES
+
+        parsed = urlparse(url)
+        host = parsed.hostname
+        if timeout is None:
+            timeout = config.HTTP_TIMEOUTS.get(host, config.HTTP_DEFAULT_TIMEOUT)
+
+        # Só o último segmento do path (o do Telegram carrega o token do bot)
+        endpoint = f"{host}/{parsed.path.rsplit('/', 1)[-1]}"
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+
+        while True:
+            try:
+                with self.metrics.timer('http_request_seconds', endpoint=endpoint):
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.inc('http_requests', endpoint=endpoint, status=type(e).__name__)
+                if attempt >= max_retries or not (idempotent or is_connect_error(e)):
+                    raise
+                delay = self._backoff(attempt)
+                reason = type(e).__name__
+            else:
+                self.metrics.inc('http_requests', endpoint=endpoint, status=response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    return response
+                delay = self._retry_after(response)
+                if not idempotent and (response.status_code != 429 or delay is None):
+                    return response
+                if delay is None:
+                    delay = self._backoff(attempt)
+                reason = f"HTTP {response.status_code}"
+
+            attempt += 1
+            self.metrics.inc('http_retries', endpoint=endpoint)
+            print(f"  🔁 {host}: {reason}, tentativa {attempt}/{max_retries} em {delay:.1f}s")
+            time.sleep(delay)
+            if limiter is not None:
+                limiter.acquire(tokens)
+
+    def _backoff(self, attempt):
+        """Backoff exponencial com full jitter"""
+        ceiling = min(config.HTTP_BACKOFF_MAX, config.HTTP_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _retry_after(self, response):
+        """Lê Retry-After (segundos ou data HTTP), limitado a HTTP_RETRY_AFTER_MAX"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+
+        return min(max(delay, 0.0), config.HTTP_RETRY_AFTER_MAX)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """Retorna o cliente HTTP compartilhado (criado na 1ª chamada)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
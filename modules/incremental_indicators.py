@@ -0,0 +1,249 @@
+import json
+import math
+import os
+from collections import deque
+import pandas as pd
+import config
+from modules.technical_analysis import INDICATOR_COLUMNS
+
+NAN = float('nan')
+
+EMA_SPANS = (20, 50, 200)
+
+class IncrementalIndicators:
+    """
+    Indicadores técnicos com estado: custo constante por vela nova
+
+    Reproduz a semântica da biblioteca ta usada pelo TechnicalAnalyzer
+    (EMAs com adjust=False, RSI/ATR de Wilder, Bollinger com ddof=0 e
+    os mesmos períodos mínimos). O estado é serializável em JSON para
+    sobreviver a reinícios do daemon.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.last_timestamp = None
+        self.prev_close = None
+        self.rsi_up = 0.0
+        self.rsi_down = 0.0
+        self.ema = {}
+        self.macd_signal = None
+        self.macd_count = 0
+        self.atr = 0.0
+        self.atr_seed = []
+        self.closes = deque(maxlen=config.BB_PERIOD)
+        self.volumes = deque(maxlen=config.VOLUME_MA_PERIOD)
+        self.recent = deque(maxlen=config.INDICATOR_STATE_TAIL)
+
+    @staticmethod
+    def _ema_step(prev, value, alpha):
+        return value if prev is None else prev + alpha * (value - prev)
+
+    def update(self, timestamp, high, low, close, volume):
+        """
+        Consome uma vela fechada e devolve os indicadores dela
+
+        Velas com timestamp <= ao último processado são ignoradas
+        (retorna None), o que torna o replay após reinício idempotente.
+        """
+        timestamp = pd.Timestamp(timestamp)
+
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return None
+
+        # RSI (Wilder) - a 1ª vela entra com variação 0, como no ta
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        alpha_rsi = 1.0 / config.RSI_PERIOD
+        self.rsi_up = self._ema_step(self.rsi_up if self.count else None, max(diff, 0.0), alpha_rsi)
+        self.rsi_down = self._ema_step(self.rsi_down if self.count else None, max(-diff, 0.0), alpha_rsi)
+
+        # True Range (1ª vela: high - low)
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        # EMAs internas rodam desde a 1ª vela; a saída respeita o período mínimo
+        for span in set(EMA_SPANS) | {config.MACD_FAST, config.MACD_SLOW}:
+            self.ema[span] = self._ema_step(self.ema.get(span), close, 2.0 / (span + 1))
+
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.prev_close = close
+        self.count += 1
+        self.last_timestamp = timestamp
+
+        values = {}
+
+        # RSI
+        if self.count >= config.RSI_PERIOD:
+            if self.rsi_down == 0:
+                values['RSI'] = 100.0
+            else:
+                values['RSI'] = 100 - 100 / (1 + self.rsi_up / self.rsi_down)
+        else:
+            values['RSI'] = NAN
+
+        # MACD: sinal é EMA do MACD a partir do 1º valor válido
+        if self.count >= config.MACD_SLOW:
+            macd = self.ema[config.MACD_FAST] - self.ema[config.MACD_SLOW]
+            self.macd_signal = self._ema_step(self.macd_signal, macd, 2.0 / (config.MACD_SIGNAL + 1))
+            self.macd_count += 1
+            values['MACD'] = macd
+            if self.macd_count >= config.MACD_SIGNAL:
+                values['MACD_signal'] = self.macd_signal
+                values['MACD_diff'] = macd - self.macd_signal
+            else:
+                values['MACD_signal'] = values['MACD_diff'] = NAN
+        else:
+            values['MACD'] = values['MACD_signal'] = values['MACD_diff'] = NAN
+
+        # Bollinger (janela fixa: custo não cresce com o histórico)
+        if len(self.closes) == config.BB_PERIOD:
+            mean = sum(self.closes) / config.BB_PERIOD
+            std = math.sqrt(sum((c - mean) ** 2 for c in self.closes) / config.BB_PERIOD)
+            values['BB_upper'] = mean + config.BB_STD * std
+            values['BB_middle'] = mean
+            values['BB_lower'] = mean - config.BB_STD * std
+        else:
+            values['BB_upper'] = values['BB_middle'] = values['BB_lower'] = NAN
+
+        # ATR: ta devolve 0 até ter ATR_PERIOD velas e semeia com a média simples
+        if self.count < config.ATR_PERIOD:
+            self.atr_seed.append(true_range)
+            values['ATR'] = 0.0
+        elif self.count == config.ATR_PERIOD:
+            self.atr_seed.append(true_range)
+            self.atr = sum(self.atr_seed) / config.ATR_PERIOD
+            self.atr_seed = []
+            values['ATR'] = self.atr
+        else:
+            self.atr = (self.atr * (config.ATR_PERIOD - 1) + true_range) / config.ATR_PERIOD
+            values['ATR'] = self.atr
+
+        # EMAs de tendência
+        for span in EMA_SPANS:
+            values[f'EMA_{span}'] = self.ema[span] if self.count >= span else NAN
+
+        # Média de volume
+        if len(self.volumes) == config.VOLUME_MA_PERIOD:
+            values['Volume_MA'] = sum(self.volumes) / config.VOLUME_MA_PERIOD
+        else:
+            values['Volume_MA'] = NAN
+
+        self.recent.append((timestamp, values))
+
+        return values
+
+    def peek(self, timestamp, high, low, close, volume):
+        """Indicadores de uma vela em formação, sem alterar o estado"""
+        clone = IncrementalIndicators.from_dict(self.to_dict())
+        clone.last_timestamp = None
+        return clone.update(timestamp, high, low, close, volume)
+
+    def warm_up(self, df):
+        """
+        Processa todas as velas de um DataFrame OHLCV
+
+        Returns:
+            DataFrame com INDICATOR_COLUMNS alinhado ao índice de df
+        """
+        rows = []
+        for ts, high, low, close, volume in zip(
+            df.index, df['High'].values, df['Low'].values, df['Close'].values, df['Volume'].values
+        ):
+            values = self.update(ts, float(high), float(low), float(close), float(volume))
+            rows.append(values if values is not None else {})
+
+        return pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS, dtype=float)
+
+    def recent_frame(self):
+        """Últimas saídas guardadas no estado (para reconstruir após reinício)"""
+        if not self.recent:
+            return pd.DataFrame(columns=INDICATOR_COLUMNS, dtype=float)
+
+        index = pd.DatetimeIndex([ts for ts, _ in self.recent], name='datetime')
+        return pd.DataFrame([values for _, values in self.recent], index=index, columns=INDICATOR_COLUMNS)
+
+    def to_dict(self):
+        """Estado serializável (NaN -> None)"""
+        def clean(value):
+            return None if isinstance(value, float) and math.isnan(value) else value
+
+        return {
+            'count': self.count,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            'prev_close': self.prev_close,
+            'rsi_up': self.rsi_up,
+            'rsi_down': self.rsi_down,
+            'ema': {str(span): value for span, value in self.ema.items()},
+            'macd_signal': self.macd_signal,
+            'macd_count': self.macd_count,
+            'atr': self.atr,
+            'atr_seed': list(self.atr_seed),
+            'closes': list(self.closes),
+            'volumes': list(self.volumes),
+            'recent': [
+                [ts.isoformat(), {k: clean(v) for k, v in values.items()}]
+                for ts, values in self.recent
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Reconstrói o motor a partir de to_dict()"""
+        engine = cls()
+        engine.count = state['count']
+        engine.last_timestamp = pd.Timestamp(state['last_timestamp']) if state['last_timestamp'] else None
+        engine.prev_close = state['prev_close']
+        engine.rsi_up = state['rsi_up']
+        engine.rsi_down = state['rsi_down']
+        engine.ema = {int(span): value for span, value in state['ema'].items()}
+        engine.macd_signal = state['macd_signal']
+        engine.macd_count = state['macd_count']
+        engine.atr = state['atr']
+        engine.atr_seed = list(state['atr_seed'])
+        engine.closes.extend(state['closes'])
+        engine.volumes.extend(state['volumes'])
+        for ts, values in state.get('recent', []):
+            engine.recent.append((
+                pd.Timestamp(ts),
+                {k: NAN if v is None else v for k, v in values.items()}
+            ))
+        return engine
+
+
+class IndicatorStateStore:
+    """Persiste o estado dos motores incrementais por (par, timeframe)"""
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or config.INDICATOR_STATE_DIR
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.base_dir, f"{symbol}_{interval}.json")
+
+    def load(self, symbol, interval):
+        """Motor salvo ou None"""
+        path = self._path(symbol, interval)
+
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path) as f:
+                return IncrementalIndicators.from_dict(json.load(f))
+        except Exception as e:
+            print(f"  ⚠️ Estado de indicadores ilegível ({symbol} {interval}): {str(e)}")
+            return None
+
+    def save(self, symbol, interval, engine):
+        """Grava o estado de forma atômica"""
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        path = self._path(symbol, interval)
+        tmp_path = path + '.tmp'
+
+        with open(tmp_path, 'w') as f:
+            json.dump(engine.to_dict(), f)
+
+        os.replace(tmp_path, path)
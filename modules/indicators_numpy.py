@@ -0,0 +1,226 @@
+import math
+import threading
+from collections import namedtuple
+import numpy as np
+import config
+
+# Mesma ordem de INDICATOR_COLUMNS (technical_analysis)
+IndicatorArrays = namedtuple('IndicatorArrays', [
+    'rsi', 'macd', 'macd_signal', 'macd_diff',
+    'bb_upper', 'bb_middle', 'bb_lower',
+    'atr', 'ema_20', 'ema_50', 'ema_200', 'volume_ma'
+])
+
+# Fator máximo de b^-j dentro de um bloco (controla o erro numérico)
+_BLOCK_GROWTH = 1e6
+
+_shared = threading.local()
+
+def default_params():
+    """Parâmetros dos indicadores vindos do config"""
+    return {
+        'rsi_period': config.RSI_PERIOD,
+        'macd_fast': config.MACD_FAST,
+        'macd_slow': config.MACD_SLOW,
+        'macd_signal': config.MACD_SIGNAL,
+        'bb_period': config.BB_PERIOD,
+        'bb_std': config.BB_STD,
+        'atr_period': config.ATR_PERIOD,
+        'volume_ma_period': config.VOLUME_MA_PERIOD
+    }
+
+def shared_block(rows):
+    """
+    Bloco float64 (rows x nº de indicadores) reaproveitado por thread
+
+    Cresce até a maior série vista e é sobrescrito no próximo uso da
+    mesma thread: views dele valem só até a próxima chamada.
+    """
+    block = getattr(_shared, 'block', None)
+    if block is None or len(block) < rows:
+        block = np.empty((rows, len(IndicatorArrays._fields)))
+        _shared.block = block
+    return block[:rows]
+
+def cached(cache, key, compute):
+    """
+    Memoiza compute() em cache[key] (cache None desativa)
+
+    Os arrays guardados são compartilhados: quem usa não pode
+    alterá-los in-place.
+    """
+    if cache is None:
+        return compute()
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+def ema(values, alpha, prev=None):
+    """
+    Média exponencial y[t] = (1 - alpha) * y[t-1] + alpha * x[t]
+
+    Equivale a ewm(alpha=alpha, adjust=False) do pandas: sem prev, a
+    série começa em y[0] = x[0]. Opera ao longo do eixo 0 (aceita
+    matriz tempo x símbolo) sem loop por elemento: a recursão é
+    resolvida por blocos com cumsum e só o valor de fronteira de cada
+    bloco é propagado em Python.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = x.shape[0]
+
+    if n == 0:
+        return x.copy()
+
+    decay = 1.0 - alpha
+    carry = x[0].copy() if prev is None else np.asarray(prev, dtype=np.float64).copy()
+
+    if decay <= 0:
+        return x.copy()
+
+    block = max(1, min(n, int(math.log(_BLOCK_GROWTH) / -math.log(decay))))
+    powers = decay ** np.arange(block, dtype=np.float64)
+    inverse = 1.0 / powers
+    shape = (block,) + (1,) * (x.ndim - 1)
+    powers = powers.reshape(shape)
+    inverse = inverse.reshape(shape)
+    out = np.empty_like(x)
+
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        size = chunk.shape[0]
+        local = alpha * powers[:size] * np.cumsum(chunk * inverse[:size], axis=0)
+        out[start:start + size] = local + powers[:size] * decay * carry
+        carry = out[start + size - 1]
+
+    return out
+
+def rolling_mean_std(values, window):
+    """Média e desvio padrão (ddof=0) móveis; NaN antes da janela completa"""
+    x = np.asarray(values, dtype=np.float64)
+    mean = np.full(x.shape, np.nan)
+    std = np.full(x.shape, np.nan)
+
+    if x.shape[0] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)
+        mean[window - 1:] = windows.mean(axis=-1)
+        std[window - 1:] = windows.std(axis=-1)
+
+    return mean, std
+
+def rolling_mean(values, window):
+    """Média móvel simples; NaN antes da janela completa"""
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+
+    if x.shape[0] >= window:
+        csum = np.cumsum(x, axis=0)
+        out[window - 1] = csum[window - 1]
+        out[window:] = csum[window:] - csum[:-window]
+        out[window - 1:] /= window
+
+    return out
+
+def compute_indicators(high, low, close, volume, params=None, cache=None, out=None):
+    """
+    Calcula todo o conjunto de indicadores do TechnicalAnalyzer
+
+    Entradas float64 contíguas (1-D, ou 2-D tempo x símbolo). Mesma
+    semântica da biblioteca ta: períodos mínimos, RSI/ATR de Wilder,
+    ATR zerado antes de completar o período.
+
+    Args:
+        cache: dict opcional reaproveitado entre chamadas sobre a MESMA
+            série (ex: varredura de parâmetros): cada EMA/RSI/ATR/janela
+            é calculada uma única vez por período
+        out: bloco opcional (n x 12, ex: shared_block(n)) preenchido com os
+            indicadores na ordem de IndicatorArrays; o retorno passa a
+            ser views das colunas do bloco
+
+    Returns:
+        IndicatorArrays (struct-of-arrays, um array por indicador)
+    """
+    p = default_params()
+    if params:
+        p.update(params)
+
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    volume = np.ascontiguousarray(volume, dtype=np.float64)
+    n = close.shape[0]
+
+    def masked(series, valid_from):
+        series = series.copy()
+        series[:min(valid_from, n)] = np.nan
+        return series
+
+    def close_ema(span):
+        return cached(cache, ('ema', span), lambda: ema(close, 2.0 / (span + 1)))
+
+    # RSI
+    def rsi_of(period):
+        diff = np.zeros_like(close)
+        diff[1:] = close[1:] - close[:-1]
+        avg_up = ema(np.maximum(diff, 0.0), 1.0 / period)
+        avg_down = ema(np.maximum(-diff, 0.0), 1.0 / period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(avg_down == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_down))
+        return masked(values, period - 1)
+
+    rsi = cached(cache, ('rsi', p['rsi_period']), lambda: rsi_of(p['rsi_period']))
+
+    # MACD
+    def macd_of(fast, slow, signal):
+        macd = masked(close_ema(fast) - close_ema(slow), slow - 1)
+        macd_signal = np.full(close.shape, np.nan)
+        start = slow - 1
+        if n > start:
+            macd_signal[start:] = ema(macd[start:], 2.0 / (signal + 1))
+        macd_signal = masked(macd_signal, start + signal - 1)
+        return macd, macd_signal, macd - macd_signal
+
+    macd, macd_signal, macd_diff = cached(
+        cache, ('macd', p['macd_fast'], p['macd_slow'], p['macd_signal']),
+        lambda: macd_of(p['macd_fast'], p['macd_slow'], p['macd_signal'])
+    )
+
+    # Bollinger
+    bb_middle, bb_std = cached(cache, ('bb', p['bb_period']), lambda: rolling_mean_std(close, p['bb_period']))
+    bb_upper = bb_middle + p['bb_std'] * bb_std
+    bb_lower = bb_middle - p['bb_std'] * bb_std
+
+    # ATR (Wilder, semeado pela média simples dos primeiros TRs)
+    def atr_of(period):
+        prev_close = np.empty_like(close)
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        atr = np.zeros_like(close)
+        if n >= period:
+            seed = true_range[:period].mean(axis=0)
+            atr[period - 1] = seed
+            atr[period:] = ema(true_range[period:], 1.0 / period, prev=seed)
+        return atr
+
+    atr = cached(cache, ('atr', p['atr_period']), lambda: atr_of(p['atr_period']))
+
+    # EMAs de tendência
+    emas = [cached(cache, ('ema_trend', span), lambda: masked(close_ema(span), span - 1)) for span in (20, 50, 200)]
+
+    volume_ma = cached(
+        cache, ('volume_ma', p['volume_ma_period']),
+        lambda: rolling_mean(volume, p['volume_ma_period'])
+    )
+
+    arrays = IndicatorArrays(
+        rsi, macd, macd_signal, macd_diff,
+        bb_upper, bb_middle, bb_lower,
+        atr, emas[0], emas[1], emas[2], volume_ma
+    )
+
+    if out is None:
+        return arrays
+
+    for i, values in enumerate(arrays):
+        out[:, i] = values
+    return IndicatorArrays(*(out[:, i] for i in range(len(arrays))))
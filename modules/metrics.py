@@ -0,0 +1,274 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+PREFIX = 'oracle_'
+
+# Descrições exportadas no OpenMetrics
+HELP = {
+    'http_request_seconds': 'Latência de cada tentativa HTTP por endpoint',
+    'http_requests': 'Respostas HTTP por endpoint e status (ou exceção)',
+    'http_retries': 'Novas tentativas HTTP por endpoint',
+    'rate_limit_wait_seconds': 'Espera no token bucket por limiter',
+    'indicator_seconds': 'Cálculo de indicadores por par',
+    'analysis_seconds': 'Análise completa por par',
+    'pairs_analyzed': 'Pares analisados por resultado',
+    'signals': 'Sinais gerados por par e direção',
+    'telegram_messages': 'Mensagens Telegram por status',
+    'notifications': 'Entregas do barramento de notificações por sink e status',
+    'stream_bars_closed': 'Barras fechadas no modo daemon por timeframe',
+    'run_seconds': 'Duração da execução em lote'
+}
+
+class _Timer:
+    """Context manager que registra a duração num timer do registro"""
+
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Contadores e timers em memória (thread-safe)
+
+    Timers guardam contagem, soma e máximo por combinação de labels
+    (exportados como summary no OpenMetrics). Nomes sem prefixo; o
+    prefixo 'oracle_' entra só na exportação.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        """Soma value ao contador name{labels}"""
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Registra uma duração (segundos) no timer name{labels}"""
+        key = self._key(name, labels)
+        with self.lock:
+            stats = self.timers.get(key)
+            if stats is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def timer(self, name, **labels):
+        """with metrics.timer('x', pair='EURUSD'): ..."""
+        return _Timer(self, name, labels)
+
+    def drain(self):
+        """Estado bruto acumulado (zerando o registro) - para juntar entre processos"""
+        with self.lock:
+            state = {'counters': self.counters, 'timers': self.timers}
+            self.counters = {}
+            self.timers = {}
+        return state
+
+    def merge(self, state):
+        """Soma um estado vindo de drain() (ex: worker do pipeline)"""
+        with self.lock:
+            for key, value in state['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, (count, total, peak) in state['timers'].items():
+                stats = self.timers.get(key)
+                if stats is None:
+                    self.timers[key] = [count, total, peak]
+                else:
+                    stats[0] += count
+                    stats[1] += total
+                    stats[2] = max(stats[2], peak)
+
+    def snapshot(self):
+        """Resumo JSON-serializável: {counters: {...}, timers: {...}}"""
+        def label(name, labels):
+            if not labels:
+                return name
+            return name + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+
+        with self.lock:
+            counters = {label(name, labels): value for (name, labels), value in sorted(self.counters.items())}
+            timers = {
+                label(name, labels): {
+                    'count': count,
+                    'total_s': round(total, 6),
+                    'avg_ms': round(total / count * 1000, 3),
+                    'max_ms': round(peak * 1000, 3)
+                }
+                for (name, labels), (count, total, peak) in sorted(self.timers.items())
+            }
+
+        return {'counters': counters, 'timers': timers}
+
+    def to_openmetrics(self):
+        """Exposição no formato texto OpenMetrics"""
+        def labels_text(labels):
+            if not labels:
+                return ''
+            escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels]
+            return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+        with self.lock:
+            families = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                families.setdefault((name, 'counter'), []).append((labels, value))
+            for (name, labels), stats in sorted(self.timers.items()):
+                families.setdefault((name, 'summary'), []).append((labels, tuple(stats)))
+
+        lines = []
+        for (name, kind), samples in families.items():
+            family = PREFIX + name
+            lines.append(f"# TYPE {family} {kind}")
+            if name in HELP:
+                lines.append(f"# HELP {family} {HELP[name]}")
+
+            for labels, value in samples:
+                if kind == 'counter':
+                    lines.append(f"{family}_total{labels_text(labels)} {value}")
+                else:
+                    lines.append(f"{family}_count{labels_text(labels)} {value[0]}")
+                    lines.append(f"{family}_sum{labels_text(labels)} {value[1]:.6f}")
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        """Grava o snapshot em JSON (atômico)"""
+        self._write(path, json.dumps(self.snapshot(), indent=2))
+
+    def write_openmetrics(self, path):
+        """Grava a exposição OpenMetrics (atômico, para node_exporter textfile etc.)"""
+        self._write(path, self.to_openmetrics())
+
+    @staticmethod
+    def _write(path, text):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+class NullMetrics:
+    """Registro desligado: todas as operações são no-op"""
+
+    enabled = False
+    _null_timer = contextlib.nullcontext()
+
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, seconds, **labels):
+        pass
+
+    def timer(self, name, **labels):
+        return self._null_timer
+
+    def drain(self):
+        return {'counters': {}, 'timers': {}}
+
+    def merge(self, state):
+        pass
+
+    def snapshot(self):
+        return {'counters': {}, 'timers': {}}
+
+
+class MetricsExporter:
+    """
+    Exporta o registro no modo daemon
+
+    Regrava o arquivo OpenMetrics a cada METRICS_EXPORT_SECONDS e,
+    com porta configurada, serve GET /metrics em HTTP.
+    """
+
+    def __init__(self, registry, path=None, port=None, interval=None):
+        self.registry = registry
+        self.path = path or config.METRICS_FILE
+        self.port = config.METRICS_PORT if port is None else port
+        self.interval = interval or config.METRICS_EXPORT_SECONDS
+        self._stop = threading.Event()
+        self._server = None
+
+    def start(self):
+        threading.Thread(target=self._write_loop, daemon=True).start()
+
+        if self.port:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = registry.to_openmetrics().encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(('0.0.0.0', self.port), Handler)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            print(f"📈 Métricas em http://0.0.0.0:{self.port}/metrics")
+
+        return self
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        try:
+            self.registry.write_openmetrics(self.path)
+        except OSError as e:
+            print(f"⚠️ Falha ao gravar métricas: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+        if self._server is not None:
+            self._server.shutdown()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_metrics():
+    """Registro compartilhado (NullMetrics quando METRICS_ENABLED está desligado)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry() if config.METRICS_ENABLED else NullMetrics()
+        return _registry
@@ -0,0 +1,247 @@
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+import config
+from modules.http_client import get_http_client
+from modules.metrics import get_metrics
+from modules.rate_limiter import TokenBucket
+
+class Sink(ABC):
+    """
+    Destino de notificações
+
+    Cada sink tem seu próprio executor (um sink lento não segura os
+    outros), seu token bucket e um disjuntor: depois de
+    NOTIFY_MAX_FAILURES falhas seguidas fica NOTIFY_COOLDOWN_SECONDS
+    sem receber entregas.
+    """
+
+    def __init__(self, name, rate_per_minute=None, burst=None, concurrency=1):
+        self.name = name
+        self.limiter = TokenBucket(rate_per_minute or config.NOTIFY_SINK_RATE, burst, name=f'sink_{name}')
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f'sink-{name}')
+        self.stats = {'sent': 0, 'failed': 0, 'skipped': 0}
+        self.failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def deliver(self, signal, message):
+        """Entrega um sinal (True = sucesso); exceções contam como falha"""
+
+    def send(self, signal, message):
+        """Entrega isolada: aplica disjuntor, rate limit e contabiliza o resultado"""
+        if time.monotonic() < self.open_until:
+            return self._record('skipped')
+
+        self.limiter.acquire()
+        try:
+            success = self.deliver(signal, message)
+        except Exception as e:
+            print(f"❌ Sink {self.name}: {type(e).__name__}: {str(e)}")
+            success = False
+
+        return self._record('sent' if success else 'failed')
+
+    def _record(self, status):
+        with self.lock:
+            self.stats[status] += 1
+            if status == 'sent':
+                self.failures = 0
+            elif status == 'failed':
+                self.failures += 1
+                if self.failures >= config.NOTIFY_MAX_FAILURES:
+                    self.open_until = time.monotonic() + config.NOTIFY_COOLDOWN_SECONDS
+                    self.failures = 0
+                    print(f"⚠️ Sink {self.name}: {config.NOTIFY_MAX_FAILURES} falhas seguidas, pausado por {config.NOTIFY_COOLDOWN_SECONDS}s")
+
+        get_metrics().inc('notifications', sink=self.name, status=status)
+        return status == 'sent'
+
+    def close(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+class TelegramSink(Sink):
+    """Um chat do Telegram (usa a fila do TelegramNotifier quando ligada)"""
+
+    def __init__(self, notifier, chat_id):
+        # O limite por chat já é aplicado pela fila do notifier; sem ela, vale o do Telegram
+        rate = config.TELEGRAM_GLOBAL_RATE if notifier.outbox is not None else config.TELEGRAM_CHAT_RATE
+        super().__init__(f'telegram:{chat_id}', rate, config.TELEGRAM_CHAT_BURST)
+        self.notifier = notifier
+        self.chat_id = chat_id
+
+    def deliver(self, signal, message):
+        return self.notifier._send_message(message, kind='signal', chat_ids=[self.chat_id])
+
+
+class WebhookSink(Sink):
+    """POST JSON {signal, text} numa URL"""
+
+    def __init__(self, url, rate_per_minute=None, concurrency=2):
+        super().__init__(f'webhook:{urlparse(url).hostname or url}',
+                         rate_per_minute or config.NOTIFY_WEBHOOK_RATE, concurrency=concurrency)
+        self.url = url
+        self.http = get_http_client()
+
+    def deliver(self, signal, message):
+        response = self.http.post(
+            self.url,
+            data=json.dumps({'signal': signal, 'text': message}, default=str),
+            headers={'Content-Type': 'application/json'},
+            max_retries=config.NOTIFY_WEBHOOK_RETRIES,
+            limiter=self.limiter
+        )
+        if response.status_code >= 300:
+            print(f"❌ Sink {self.name}: HTTP {response.status_code}")
+            return False
+        return True
+
+
+class JsonlSink(Sink):
+    """Acrescenta cada sinal como uma linha JSON num arquivo local"""
+
+    def __init__(self, path):
+        super().__init__(f'jsonl:{os.path.basename(path)}', rate_per_minute=10 ** 6)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def deliver(self, signal, message):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(signal, default=str) + '\n')
+        return True
+
+
+class QueueSink(Sink):
+    """
+    Stand-in de fila de mensagens: publica num queue.Queue em memória
+
+    Consumidores internos leem de sink.queue; com a fila cheia a entrega
+    falha em vez de bloquear o barramento.
+    """
+
+    def __init__(self, name='queue', maxsize=1000):
+        super().__init__(name, rate_per_minute=10 ** 6)
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, signal, message):
+        try:
+            self.queue.put_nowait({'signal': signal, 'text': message})
+        except queue.Full:
+            print(f"❌ Sink {self.name}: fila cheia")
+            return False
+        return True
+
+
+class NotificationBus:
+    """
+    Distribui cada sinal para vários sinks em paralelo
+
+    A mensagem é formatada uma única vez por conteúdo de sinal (cache)
+    e entregue a todos os sinks ao mesmo tempo; publish() não bloqueia.
+    """
+
+    def __init__(self, formatter, sinks=None, cache_size=256):
+        """
+        Args:
+            formatter: função signal -> texto (ex: TelegramNotifier._format_signal_message)
+            sinks: lista de Sink
+            cache_size: mensagens formatadas mantidas em cache
+        """
+        self.formatter = formatter
+        self.sinks = list(sinks or [])
+        self.cache_size = cache_size
+        self.messages = OrderedDict()
+        self.futures = []
+        self.lock = threading.Lock()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def format(self, signal):
+        """
+        Texto do sinal, formatado uma vez por conteúdo
+
+        A chave é o sinal inteiro serializado: status, SL/TPs, VTI ou
+        escala do portfólio diferentes geram texto novo, mesmo no mesmo
+        minuto e preço.
+        """
+        key = json.dumps(signal, sort_keys=True, default=str)
+
+        with self.lock:
+            if key in self.messages:
+                self.messages.move_to_end(key)
+                return self.messages[key]
+
+        message = self.formatter(signal)
+
+        with self.lock:
+            self.messages[key] = message
+            if len(self.messages) > self.cache_size:
+                self.messages.popitem(last=False)
+
+        return message
+
+    def publish(self, signal, message=None):
+        """
+        Enfileira a entrega do sinal em todos os sinks (não bloqueia)
+
+        message já formatada (ex: aviso de sinal encerrado) dispensa o formatter.
+        """
+        if signal is None or not self.sinks:
+            return False
+
+        message = message if message is not None else self.format(signal)
+        futures = [sink.executor.submit(sink.send, signal, message) for sink in self.sinks]
+
+        with self.lock:
+            self.futures = [f for f in self.futures if not f.done()] + futures
+
+        return True
+
+    def flush(self, timeout=None):
+        """Espera as entregas pendentes e exibe o balanço por sink"""
+        with self.lock:
+            pending = list(self.futures)
+
+        done, not_done = wait(pending, timeout=timeout)
+
+        for sink in self.sinks:
+            stats = sink.stats
+            print(f"📣 {sink.name}: {stats['sent']} entregue(s) | {stats['failed']} falha(s) | {stats['skipped']} pulado(s)")
+
+        return not not_done
+
+    def close(self, timeout=None):
+        done = self.flush(timeout)
+        for sink in self.sinks:
+            sink.close(wait=done)
+        return done
+
+
+def build_default_bus(telegram):
+    """
+    Barramento com os sinks do config: um por chat do Telegram, um por
+    webhook de NOTIFY_WEBHOOK_URLS e o arquivo NOTIFY_JSONL_FILE
+    """
+    bus = NotificationBus(telegram._format_signal_message)
+
+    if telegram.bot_token:
+        for chat_id in telegram.chat_ids:
+            bus.add_sink(TelegramSink(telegram, chat_id))
+
+    for url in config.NOTIFY_WEBHOOK_URLS:
+        bus.add_sink(WebhookSink(url))
+
+    if config.NOTIFY_JSONL_FILE:
+        bus.add_sink(JsonlSink(config.NOTIFY_JSONL_FILE))
+
+    return bus
@@ -0,0 +1,91 @@
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+SYNTHETIC_VOLUME = 1000  # Forex não tem volume no Twelve Data
+
+_get_ohlc = itemgetter('open', 'high', 'low', 'close')
+_get_ohlcv = itemgetter('open', 'high', 'low', 'close', 'volume')
+_get_datetime = itemgetter('datetime')
+
+def decode_time_series(values):
+    """
+    Decodifica o array 'values' do Twelve Data num DataFrame OHLCV
+
+    Caminho rápido: strings vão direto para arrays float64/datetime64
+    (formato fixo 'YYYY-MM-DD[ HH:MM:SS]') e a ordem é invertida, já
+    que a API devolve da vela mais recente para a mais antiga. O
+    DataFrame é montado uma única vez sobre um bloco float64 contíguo.
+    Entradas fora do padrão caem no decoder pandas.
+    """
+    if not values:
+        return None
+
+    has_volume = 'volume' in values[0]
+    getter = _get_ohlcv if has_volume else _get_ohlc
+
+    try:
+        prices = np.array(list(map(getter, values)), dtype=np.float64)
+        timestamps = np.array(list(map(_get_datetime, values)), dtype='datetime64[s]')
+    except (KeyError, TypeError, ValueError):
+        return decode_time_series_pandas(values)
+
+    if has_volume:
+        block = np.ascontiguousarray(prices[::-1])
+    else:
+        block = np.empty((len(values), len(COLUMNS)), dtype=np.float64)
+        block[:, :4] = prices[::-1]
+        block[:, 4] = SYNTHETIC_VOLUME
+
+    timestamps = timestamps[::-1].astype('datetime64[ns]')
+
+    # Garante ordem crescente mesmo se a API mudar a ordenação
+    if len(timestamps) > 1 and not (timestamps[1:] >= timestamps[:-1]).all():
+        order = np.argsort(timestamps, kind='stable')
+        block = block[order]
+        timestamps = timestamps[order]
+
+    index = pd.DatetimeIndex(timestamps, name='datetime')
+
+    return pd.DataFrame(block, index=index, columns=COLUMNS, copy=False)
+
+def decode_time_series_pandas(values):
+    """Decoder genérico via pandas (tolerante a campos inválidos)"""
+    df = pd.DataFrame(values)
+
+    if df.empty:
+        return None
+
+    # Renomeia colunas base (Volume pode não existir)
+    column_mapping = {
+        'open': 'Open',
+        'high': 'High',
+        'low': 'Low',
+        'close': 'Close'
+    }
+
+    if 'volume' in df.columns:
+        column_mapping['volume'] = 'Volume'
+
+    df = df.rename(columns=column_mapping)
+
+    # Converte OHLC
+    for col in ['Open', 'High', 'Low', 'Close']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Volume: real ou fake
+    if 'Volume' in df.columns:
+        df['Volume'] = pd.to_numeric(df['Volume'], errors='coerce').fillna(SYNTHETIC_VOLUME)
+    else:
+        df['Volume'] = SYNTHETIC_VOLUME
+
+    # Datetime
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    df = df.set_index('datetime')
+    df = df.sort_index()
+
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+
+    return df[COLUMNS]
@@ -0,0 +1,253 @@
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import config
+from modules.backtest import Backtester, summarize
+
+REPORT_METRICS = ['trades', 'win_rate', 'expectancy_r', 'total_r', 'max_drawdown_r']
+
+def grid(space):
+    """Todas as combinações de {param: [valores]}"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+def random_samples(space, trials, seed=None):
+    """
+    Amostras aleatórias do espaço
+
+    Listas são sorteadas entre os valores; tuplas (mín, máx) são
+    intervalos (inteiros se os dois limites forem int).
+    """
+    rng = random.Random(seed)
+    samples = []
+
+    for _ in range(trials):
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(values)
+        samples.append(params)
+
+    return samples
+
+def is_valid(params):
+    """Descarta combinações sem sentido (ex: MACD rápida >= lenta)"""
+    fast = params.get('macd_fast', config.MACD_FAST)
+    slow = params.get('macd_slow', config.MACD_SLOW)
+    return fast < slow
+
+def walk_forward_splits(index, folds, train_blocks):
+    """
+    Janelas walk-forward (treino rolante seguido de teste)
+
+    As velas de index são divididas em train_blocks + folds blocos de
+    mesmo tamanho; a dobra i treina nos blocos [i, i + train_blocks) e
+    testa no seguinte. Bordas caem sempre no horário de uma vela.
+
+    Returns:
+        Lista de {'train': (início, fim), 'test': (início, fim)} (fim exclusivo)
+    """
+    blocks = np.array_split(np.arange(len(index)), train_blocks + folds)
+    # O último fim é a vela seguinte à última (passo mínimo do índice)
+    step = np.diff(index.asi8).min() if len(index) > 1 else pd.Timedelta(1, 'min').value
+    edges = index[[block[0] for block in blocks]].append(pd.DatetimeIndex([index[-1] + pd.Timedelta(step, 'ns')]))
+
+    return [
+        {
+            'train': (edges[i], edges[i + train_blocks]),
+            'test': (edges[i + train_blocks], edges[i + train_blocks + 1])
+        }
+        for i in range(folds)
+    ]
+
+
+# Estado de cada processo worker: históricos e séries base por par
+_worker_histories = None
+_worker_caches = None
+
+def _init_worker(histories):
+    global _worker_histories, _worker_caches
+    _worker_histories = histories
+    _worker_caches = {pair: {} for pair in histories}
+
+def _evaluate(task):
+    """Backtest de uma combinação, resumido no período todo e em cada janela"""
+    index, params, windows = task
+    trades, _ = Backtester(params).run(_worker_histories, _worker_caches)
+
+    results = {'full': summarize(trades)}
+    for name, (start, end) in windows.items():
+        in_window = (trades['entry_time'] >= start) & (trades['entry_time'] < end)
+        results[name] = summarize(trades[in_window])
+
+    return index, results
+
+
+class Optimizer:
+    """
+    Varredura de parâmetros da estratégia sobre históricos locais
+
+    Cada combinação roda o backtest vetorizado num pool de processos.
+    Cada worker guarda, por par, as séries base já calculadas (EMAs por
+    período, RSI, ATR e sua média, rótulos de tendência, janelas de
+    S/R...) chaveadas pelos parâmetros de que dependem: dentro de um
+    worker cada série sai uma vez, não uma vez por combinação (os
+    caches não são compartilhados entre processos). As janelas
+    walk-forward são só recortes dos trades: os indicadores são causais
+    e calculados uma vez sobre todo o histórico.
+    """
+
+    def __init__(self, histories, workers=None, objective=None, min_trades=None):
+        """
+        Args:
+            histories: {pair_name: df OHLCV M15}
+            workers: processos (padrão: config.OPTIMIZER_WORKERS ou nº de CPUs)
+            objective: métrica de summarize() a maximizar
+            min_trades: mínimo de trades para uma combinação ser elegível
+        """
+        self.histories = histories
+        self.workers = workers or config.OPTIMIZER_WORKERS or os.cpu_count() or 1
+        self.objective = objective or config.OPTIMIZER_OBJECTIVE
+        self.min_trades = config.OPTIMIZER_MIN_TRADES if min_trades is None else min_trades
+
+    def run(self, combos, folds=0, train_blocks=None):
+        """
+        Avalia as combinações
+
+        Args:
+            combos: lista de dicts de parâmetros (grid() / random_samples())
+            folds: dobras walk-forward (0 = só o período completo)
+            train_blocks: blocos de treino por dobra
+
+        Returns:
+            (results, walk_forward): DataFrame com uma linha por combinação
+            (parâmetros + métricas '<janela>_<métrica>') e lista com a
+            melhor combinação de treino de cada dobra e seu resultado no teste
+        """
+        combos = [params for params in combos if is_valid(params)]
+        self.param_columns = list(dict.fromkeys(key for params in combos for key in params))
+        splits = self._splits(folds, train_blocks or config.OPTIMIZER_TRAIN_BLOCKS)
+
+        windows = {}
+        for i, split in enumerate(splits, 1):
+            windows[f'f{i}_train'] = split['train']
+            windows[f'f{i}_test'] = split['test']
+
+        tasks = [(index, params, windows) for index, params in enumerate(combos)]
+        rows = [None] * len(tasks)
+        step = max(1, len(tasks) // 10)
+
+        print(f"🧪 Otimização: {len(tasks)} combinações | {len(splits)} dobra(s) | {self.workers} processo(s)")
+
+        for done, (index, results) in enumerate(self._map(tasks), 1):
+            row = dict(combos[index])
+            for window, stats in results.items():
+                for metric in REPORT_METRICS:
+                    row[f'{window}_{metric}'] = stats.get(metric, 0)
+            rows[index] = row
+
+            if done % step == 0 or done == len(tasks):
+                print(f"  ⏳ {done}/{len(tasks)}")
+
+        results = pd.DataFrame(rows)
+        return results, self._walk_forward(results, splits)
+
+    def _map(self, tasks):
+        """Executa as tarefas no pool (ou no próprio processo com 1 worker)"""
+        if self.workers == 1:
+            _init_worker(self.histories)
+            return map(_evaluate, tasks)
+
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.histories,)
+        )
+        chunksize = max(1, len(tasks) // (self.workers * 8))
+
+        def results():
+            with pool:
+                yield from pool.map(_evaluate, tasks, chunksize=chunksize)
+
+        return results()
+
+    def _splits(self, folds, train_blocks):
+        if not folds:
+            return []
+
+        # Velas de todos os pares (horários distintos, em ordem)
+        times = np.unique(np.concatenate([df.index.asi8 for df in self.histories.values()]))
+        return walk_forward_splits(pd.DatetimeIndex(times.view('M8[ns]'), name='datetime'), folds, train_blocks)
+
+    def best(self, results, window='full'):
+        """Combinações elegíveis ordenadas pelo objetivo numa janela"""
+        eligible = results[results[f'{window}_trades'] >= self.min_trades]
+        return eligible.sort_values(f'{window}_{self.objective}', ascending=False)
+
+    def _walk_forward(self, results, splits):
+        """Escolhe a melhor combinação no treino de cada dobra e mede no teste"""
+        report = []
+
+        for i, split in enumerate(splits, 1):
+            ranked = self.best(results, f'f{i}_train')
+            if ranked.empty:
+                report.append({'fold': i, 'test': split['test'], 'params': None})
+                continue
+
+            top = ranked.iloc[0]
+            report.append({
+                'fold': i,
+                'train': split['train'],
+                'test': split['test'],
+                'params': {col: top[col] for col in self.param_columns},
+                'train_' + self.objective: top[f'f{i}_train_{self.objective}'],
+                **{f'test_{metric}': top[f'f{i}_test_{metric}'] for metric in REPORT_METRICS}
+            })
+
+        return report
+
+
+def print_optimizer_report(optimizer, results, walk_forward, top=10):
+    """Exibe as melhores combinações e o resultado fora da amostra"""
+    objective = optimizer.objective
+    ranked = optimizer.best(results)
+
+    print("=" * 60)
+    print(f"🏆 MELHORES COMBINAÇÕES ({objective}, período completo)")
+    print("=" * 60)
+
+    for _, row in ranked.head(top).iterrows():
+        params = ', '.join(f"{col}={row[col]}" for col in optimizer.param_columns)
+        print(f"  {row[f'full_{objective}']:+.3f} | {int(row['full_trades'])} trades | {params}")
+
+    if walk_forward:
+        print()
+        print("🚶 WALK-FORWARD (melhor do treino, medido no teste)")
+
+        trades = total = 0
+        for fold in walk_forward:
+            if fold['params'] is None:
+                print(f"  Dobra {fold['fold']}: nenhuma combinação com {optimizer.min_trades}+ trades")
+                continue
+
+            trades += fold['test_trades']
+            total += fold['test_total_r']
+            print(
+                f"  Dobra {fold['fold']}: {fold['test'][0]:%Y-%m-%d} → {fold['test'][1]:%Y-%m-%d}"
+                f" | {int(fold['test_trades'])} trades | E {fold['test_expectancy_r']:+.2f}R"
+                f" | total {fold['test_total_r']:+.1f}R"
+            )
+
+        if trades:
+            print(f"  Fora da amostra: {int(trades)} trades | E {total / trades:+.2f}R | total {total:+.1f}R")
+
+    print("=" * 60)
@@ -0,0 +1,206 @@
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import config
+from modules.metrics import get_metrics
+from modules.compact_candles import expand_frame, frame_times
+from modules.ohlcv_decoder import COLUMNS
+
+class SharedUniverse:
+    """
+    Frames OHLCV de vários pares num único bloco de memória compartilhada
+
+    Cada frame ocupa [timestamps int64 | OHLCV float64 (linhas x 5)]. Os
+    workers recebem só o nome do bloco e o layout (offsets), e montam
+    DataFrames somente leitura sobre o buffer, sem serializar dados.
+    """
+
+    def __init__(self, universe):
+        frames = []
+        total = 0
+
+        for symbol, data in universe.items():
+            for tf, df in (data or {}).items():
+                if df is None or df.empty:
+                    continue
+                frames.append((symbol, tf, df, total))
+                total += len(df) * 8 * (1 + len(COLUMNS))
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        self.name = self.shm.name
+        self.layout = {}
+
+        for symbol, tf, df, offset in frames:
+            timestamps, values = self._views(self.shm, offset, len(df))
+            timestamps[:] = frame_times(df)
+            values[:] = expand_frame(df)[COLUMNS].to_numpy(dtype=np.float64)
+            self.layout.setdefault(symbol, {})[tf] = (offset, len(df))
+
+    @staticmethod
+    def _views(shm, offset, rows):
+        """Arrays (timestamps, OHLCV) de um frame dentro do bloco"""
+        timestamps = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        values = np.ndarray((rows, len(COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=offset + rows * 8)
+        return timestamps, values
+
+    @staticmethod
+    def frames(shm, layout):
+        """Reconstrói {tf: df} de um par a partir do buffer (sem cópia)"""
+        data = {}
+
+        for tf, (offset, rows) in (layout or {}).items():
+            timestamps, values = SharedUniverse._views(shm, offset, rows)
+            values.flags.writeable = False
+
+            index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name='datetime')
+            data[tf] = pd.DataFrame(values, index=index, columns=COLUMNS, copy=False)
+
+        return data
+
+    def close(self):
+        """Libera e remove o bloco"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Estado de cada processo worker
+_worker_analyze = None
+_worker_segments = {}
+
+def _init_worker(analyze):
+    global _worker_analyze
+    _worker_analyze = analyze
+    # Com fork o worker herda as métricas do pai; descarta para não contar em dobro
+    get_metrics().drain()
+
+def _attach(name):
+    """Abre (uma vez por worker) o bloco de memória do lote atual"""
+    if name not in _worker_segments:
+        # Blocos de lotes anteriores já não têm frames vivos
+        for old_name, old_shm in list(_worker_segments.items()):
+            try:
+                old_shm.close()
+                del _worker_segments[old_name]
+            except BufferError:
+                pass
+
+        # O resource tracker é o mesmo do processo pai, que remove o bloco
+        _worker_segments[name] = shared_memory.SharedMemory(name=name)
+
+    return _worker_segments[name]
+
+def _analyze_task(task):
+    """Analisa um par no worker; a saída do print e as métricas voltam junto com o sinal"""
+    shm_name, symbol, name, layout = task
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        data = SharedUniverse.frames(_attach(shm_name), layout)
+        for tf in config.TIMEFRAMES.values():
+            data.setdefault(tf, None)
+        signal = _worker_analyze(symbol, name, data)
+
+    return output.getvalue(), signal, get_metrics().drain()
+
+
+class AnalysisPipeline:
+    """
+    Pipeline busca -> análise multi-core
+
+    Os pares são processados em lotes: enquanto o pool de processos
+    analisa um lote, o próximo já está sendo buscado. Os frames vão
+    para os workers via memória compartilhada e os resultados voltam
+    na ordem original dos pares.
+    """
+
+    def __init__(self, data_fetcher, analyze, workers=None, chunk_size=None, on_signal=None, on_universe=None,
+                 select=None):
+        """
+        Args:
+            data_fetcher: DataFetcher (etapa de busca)
+            analyze: função (pair_symbol, pair_name, data_multi_tf) -> signal ou None,
+                definida no nível de módulo (precisa ser serializável)
+            workers: processos de análise (padrão: config.ANALYSIS_WORKERS ou nº de CPUs)
+            chunk_size: pares por lote de busca (padrão: config.PIPELINE_CHUNK)
+            on_signal: callback opcional chamado com cada sinal assim que é coletado
+            on_universe: callback opcional chamado com cada lote buscado {symbol: {tf: df}}
+            select: triagem opcional de cada lote buscado -> nomes dos pares que
+                seguem para a análise (os demais não vão para o pool)
+        """
+        self.fetcher = data_fetcher
+        self.analyze = analyze
+        self.workers = workers or config.ANALYSIS_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or config.PIPELINE_CHUNK
+        self.on_signal = on_signal
+        self.on_universe = on_universe
+        self.select = select
+        self.analyzed = []
+
+    def run(self, pairs, pair_names):
+        """
+        Busca e analisa todos os pares (os nomes dos que tinham dados M15
+        ficam em self.analyzed)
+
+        Returns:
+            Lista de sinais, na ordem de pairs
+        """
+        items = list(zip(pairs, pair_names))
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        signals = []
+        pending = None
+
+        print(f"⚙️ Pipeline: {len(items)} pares | {len(chunks)} lote(s) | {self.workers} processo(s) de análise\n")
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.analyze,)
+        ) as pool:
+            for chunk in chunks:
+                universe = self.fetcher.fetch_universe([symbol for symbol, _ in chunk])
+                if self.on_universe is not None:
+                    self.on_universe(universe)
+                selected = self.select(universe) if self.select is not None else None
+                segment = SharedUniverse(universe)
+
+                tasks = [
+                    (segment.name, symbol, name, segment.layout.get(symbol)) for symbol, name in chunk
+                    if selected is None or name in selected
+                ]
+                self.analyzed.extend(
+                    name for symbol, name in chunk if '15m' in (segment.layout.get(symbol) or {})
+                )
+                chunksize = max(1, len(tasks) // (self.workers * 4))
+                results = pool.map(_analyze_task, tasks, chunksize=chunksize)
+
+                # Lote anterior é coletado depois de disparar a busca/análise deste
+                if pending is not None:
+                    signals.extend(self._collect(*pending))
+                pending = (segment, results)
+
+            if pending is not None:
+                signals.extend(self._collect(*pending))
+
+        return signals
+
+    def _collect(self, segment, results):
+        """Consome os resultados de um lote (em ordem) e libera a memória"""
+        signals = []
+
+        try:
+            metrics = get_metrics()
+            for output, signal, state in results:
+                print(output, end='')
+                metrics.merge(state)
+                if signal:
+                    signals.append(signal)
+                    if self.on_signal is not None:
+                        self.on_signal(signal)
+        finally:
+            segment.close()
+
+        return signals
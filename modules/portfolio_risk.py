@@ -0,0 +1,323 @@
+import os
+import numpy as np
+import pandas as pd
+import config
+from modules.calendar_store import pair_currencies
+from modules.compact_candles import column_values, frame_index
+
+class ReturnCovariance:
+    """
+    Covariância EWMA dos retornos log dos pares, persistida em .npz
+
+    Cada atualização só consome as velas posteriores à última vista:
+    k velas novas custam O(k * n²) (atualizações de posto 1 somadas),
+    em vez de recalcular a matriz sobre todo o histórico a cada
+    execução. Par sem vela num horário (ex: forex no fim de semana)
+    entra com retorno zero. Um par novo reconstrói a matriz a partir
+    do histórico buscado.
+    """
+
+    def __init__(self, path=None, halflife_bars=None):
+        self.path = path if path is not None else config.PORTFOLIO_FILE
+        self.decay = 0.5 ** (1.0 / (halflife_bars or config.PORTFOLIO_HALFLIFE_BARS))
+        self.symbols = []
+        self.cov = np.zeros((0, 0))
+        self.last_close = np.zeros(0)
+        self.last_time = None  # ns UTC da última vela incorporada
+        self.bars = 0
+        self.load()
+
+    def load(self):
+        """Carrega o estado salvo (se houver)"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self.symbols = [str(symbol) for symbol in data['symbols']]
+                self.cov = data['cov']
+                self.last_close = data['last_close']
+                self.last_time = int(data['last_time'])
+                self.bars = int(data['bars'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Covariância do portfólio ignorada ({type(e).__name__}), reconstruindo")
+            return False
+
+        return True
+
+    def save(self):
+        """Grava o estado (atômico)"""
+        if not self.path or self.last_time is None:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                symbols=np.array(self.symbols, dtype=str),
+                cov=self.cov,
+                last_close=self.last_close,
+                last_time=np.int64(self.last_time),
+                bars=np.int64(self.bars)
+            )
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _align(closes, symbols, after=None):
+        """
+        Closes em matriz tempo x par (NaN onde o par não tem vela)
+
+        Com after (ns), só entram as velas posteriores: o corte é uma
+        busca binária por série, antes de qualquer alinhamento.
+        """
+        series = {}
+        for symbol in symbols:
+            if symbol not in closes:
+                continue
+            times = closes[symbol].index.asi8
+            values = closes[symbol].to_numpy(dtype=np.float64)
+            if after is not None:
+                cut = np.searchsorted(times, after, side='right')
+                times, values = times[cut:], values[cut:]
+            if len(times):
+                series[symbol] = (times, values)
+
+        if not series:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(symbols)))
+
+        stamps = np.unique(np.concatenate([times for times, _ in series.values()]))
+        matrix = np.full((len(stamps), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            if symbol in series:
+                times, values = series[symbol]
+                matrix[np.searchsorted(stamps, times), j] = values
+
+        return stamps, matrix
+
+    def update(self, closes):
+        """
+        Incorpora as velas novas
+
+        Args:
+            closes: {par: Series de closes fechados, indexada por horário (ordenada)}
+
+        Returns:
+            Número de velas incorporadas
+        """
+        closes = {symbol: series for symbol, series in closes.items() if series is not None and len(series) > 1}
+        if not closes:
+            return 0
+
+        rebuild = self.last_time is None or bool(set(closes) - set(self.symbols))
+        symbols = sorted(closes) if rebuild else self.symbols
+
+        stamps, values = self._align(closes, symbols, None if rebuild else self.last_time)
+        if not rebuild:
+            if not len(stamps):
+                return 0
+            # Retorno da 1ª vela nova parte do último close conhecido
+            values = np.vstack([self.last_close, values])
+
+        # Sem vela no horário: repete o último close (retorno zero)
+        rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+        values = values[np.maximum.accumulate(rows, axis=0), np.arange(len(symbols))]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = np.diff(np.log(values), axis=0)
+        returns[~np.isfinite(returns)] = 0.0
+
+        k = len(returns)
+        weights = (1 - self.decay) * self.decay ** np.arange(k - 1, -1, -1)
+        cov = np.zeros((len(symbols), len(symbols))) if rebuild else self.cov
+
+        self.cov = self.decay ** k * cov + returns.T @ (returns * weights[:, None])
+        self.symbols = symbols
+        self.last_close = values[-1]
+        self.last_time = int(stamps[-1])
+        self.bars = k if rebuild else self.bars + k
+
+        return k
+
+    def correlation(self, symbols):
+        """Matriz de correlação dos pares (sem histórico: descorrelacionado)"""
+        position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        known = [i for i, symbol in enumerate(symbols) if symbol in position]
+        corr = np.eye(len(symbols))
+
+        if known:
+            idx = [position[symbols[i]] for i in known]
+            sub = self.cov[np.ix_(idx, idx)]
+            std = np.sqrt(np.diag(sub))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                block = sub / np.outer(std, std)
+            block[~np.isfinite(block)] = 0.0
+            np.fill_diagonal(block, 1.0)
+            corr[np.ix_(known, known)] = block
+
+        return corr
+
+
+class PortfolioRisk:
+    """
+    Risco combinado dos sinais da execução
+
+    Cada sinal arrisca risk_percentage% da conta no stop. Os sinais
+    são aceitos em ordem de VTI/confiança; o risco combinado é
+    sqrt(aᵀ C a), com a = risco com sinal (+BUY/-SELL) e C a
+    correlação dos retornos, e não pode passar de
+    PORTFOLIO_RISK_BUDGET. A exposição por moeda (BUY EURUSD = +EUR,
+    -USD) fica limitada a PORTFOLIO_CURRENCY_CAP. O sinal que não cabe
+    inteiro é reduzido; abaixo de PORTFOLIO_MIN_SCALE, vetado.
+    """
+
+    def __init__(self, covariance=None, budget=None, currency_cap=None, min_scale=None):
+        self.covariance = covariance if covariance is not None else ReturnCovariance()
+        self.budget = budget or config.PORTFOLIO_RISK_BUDGET
+        self.currency_cap = currency_cap or config.PORTFOLIO_CURRENCY_CAP
+        self.min_scale = config.PORTFOLIO_MIN_SCALE if min_scale is None else min_scale
+        self.last_risk = 0.0
+        self.last_exposure = {}
+
+    @staticmethod
+    def closes(universe, pairs=None, pair_names=None, timeframe=None, before=None):
+        """
+        Closes fechados do timeframe da covariância, por nome de par
+
+        Sem before, a última vela de cada série (pode estar em formação)
+        fica de fora; com before, só entram as velas anteriores a ele.
+        As séries são cópias em float64 (também de frames compactos): o
+        universo pode ser liberado em seguida.
+
+        Returns:
+            {par: Series de closes}
+        """
+        timeframe = timeframe or config.PORTFOLIO_TIMEFRAME
+        names = dict(zip(pairs or config.PAIRS, pair_names or config.PAIR_NAMES))
+        closes = {}
+
+        for symbol, data in universe.items():
+            df = (data or {}).get(timeframe)
+            if df is None or len(df) <= 2:
+                continue
+            close = pd.Series(column_values(df, 'Close'), index=frame_index(df))
+            close = close.iloc[:-1] if before is None else close[close.index < before]
+            closes[names.get(symbol, symbol)] = close.copy()
+
+        return closes
+
+    def update_closes(self, closes):
+        """Atualiza a covariância com {par: closes fechados} e salva"""
+        added = self.covariance.update(closes)
+        self.covariance.save()
+        return added
+
+    def update(self, universe, pairs=None, pair_names=None, timeframe=None):
+        """Atualiza a covariância com os candles buscados e salva"""
+        return self.update_closes(self.closes(universe, pairs, pair_names, timeframe))
+
+    @staticmethod
+    def _priority(signal):
+        return int(str(signal['vti_score']).split('/')[0]), signal.get('confidence', 0)
+
+    @staticmethod
+    def _currency_moves(pair, direction, risk):
+        """Variação de exposição por moeda de uma posição inteira"""
+        sign = 1 if direction == 'BUY' else -1
+        currencies = pair_currencies(pair)
+        moves = {currencies[0]: sign * risk}
+        if len(currencies) > 1:
+            moves[currencies[1]] = moves.get(currencies[1], 0) - sign * risk
+        return moves
+
+    def _budget_scale(self, risk, cross, total_sq):
+        """Maior x em [0, 1] com total² + 2·x·risk·cross + (x·risk)² <= orçamento²"""
+        limit = self.budget ** 2
+        if total_sq + 2 * risk * cross + risk ** 2 <= limit:
+            return 1.0
+
+        disc = (risk * cross) ** 2 - risk ** 2 * (total_sq - limit)
+        if disc < 0:
+            return 0.0
+        return min(1.0, max(0.0, (-risk * cross + disc ** 0.5) / risk ** 2))
+
+    def _currency_scale(self, moves, exposure):
+        scale = 1.0
+        for currency, move in moves.items():
+            current = exposure.get(currency, 0.0)
+            room = self.currency_cap - current if move > 0 else self.currency_cap + current
+            scale = min(scale, max(0.0, room / abs(move)))
+        return scale
+
+    @staticmethod
+    def _scale_signal(signal, scale):
+        position = signal['position']
+        signal['position'] = dict(
+            position,
+            position_size=round(position['position_size'] * scale, 4),
+            position_value=round(position['position_value'] * scale, 2),
+            risk_amount=round(position['risk_amount'] * scale, 2),
+            risk_percentage=round(position['risk_percentage'] * scale, 2)
+        )
+        signal['portfolio_scale'] = round(scale, 2)
+
+    def apply(self, signals, open_positions=()):
+        """
+        Reduz ou veta sinais para caber no orçamento
+
+        Args:
+            signals: sinais da execução (alterados in-place quando reduzidos)
+            open_positions: posições já abertas ({'pair', 'direction'}),
+                contadas com RISK_PER_TRADE e nunca reduzidas
+
+        Returns:
+            (aceitos, vetados), na ordem original
+        """
+        open_positions = list(open_positions)
+        entries = [(p['pair'], p['direction'], config.RISK_PER_TRADE) for p in open_positions]
+        entries += [(s['pair'], s['direction'], s['position']['risk_percentage']) for s in signals]
+
+        corr = self.covariance.correlation([entry[0] for entry in entries])
+        exposure_vector = np.zeros(len(entries))
+        exposure = {}
+
+        for i, (pair, direction, risk) in enumerate(entries[:len(open_positions)]):
+            exposure_vector[i] = risk if direction == 'BUY' else -risk
+            for currency, move in self._currency_moves(pair, direction, risk).items():
+                exposure[currency] = exposure.get(currency, 0.0) + move
+
+        total_sq = float(exposure_vector @ corr @ exposure_vector)
+        order = sorted(range(len(signals)), key=lambda j: self._priority(signals[j]), reverse=True)
+        vetoed = set()
+
+        for j in order:
+            i = len(open_positions) + j
+            pair, direction, risk = entries[i]
+            if risk <= 0:
+                continue
+
+            signed = risk if direction == 'BUY' else -risk
+            cross = float(corr[i] @ exposure_vector)
+            moves = self._currency_moves(pair, direction, risk)
+            scale = min(self._budget_scale(signed, cross, total_sq), self._currency_scale(moves, exposure))
+
+            if scale < self.min_scale:
+                vetoed.add(j)
+                print(f"  🚫 {pair} {direction}: vetado pelo risco do portfólio")
+                continue
+
+            total_sq += 2 * scale * signed * cross + (scale * signed) ** 2
+            exposure_vector[i] = scale * signed
+            for currency, move in moves.items():
+                exposure[currency] = exposure.get(currency, 0.0) + scale * move
+
+            if scale < 1.0:
+                self._scale_signal(signals[j], scale)
+                print(f"  📉 {pair} {direction}: reduzido a {scale:.0%} pelo risco do portfólio")
+
+        self.last_risk = total_sq ** 0.5
+        self.last_exposure = exposure
+
+        accepted = [signal for j, signal in enumerate(signals) if j not in vetoed]
+        rejected = [signal for j, signal in enumerate(signals) if j in vetoed]
+        return accepted, rejected
@@ -0,0 +1,295 @@
+import bisect
+import itertools
+import json
+import os
+import threading
+from datetime import datetime
+import config
+
+class PriceLevelBook:
+    """
+    Níveis de preço de um símbolo em duas listas ordenadas
+
+    'up' guarda os níveis acima do preço de abertura (TPs de BUY, SLs de
+    SELL) e 'down' os abaixo. Um tick que sobe até p dispara exatamente
+    o prefixo de 'up' com nível <= p; um que desce dispara o sufixo de
+    'down' com nível >= p. Os dois cortes saem por busca binária, então
+    cada tick custa O(log n + disparados), não importa quantos níveis
+    estejam abertos.
+    """
+
+    def __init__(self):
+        self.up = []
+        self.down = []
+        self.stale = 0
+
+    def add(self, side, price, seq, position_id, kind):
+        bisect.insort(self.up if side == 'up' else self.down, (price, seq, position_id, kind))
+
+    def triggered(self, price):
+        """Remove e devolve os níveis atingidos pelo preço"""
+        cut = bisect.bisect_right(self.up, (price, float('inf')))
+        hits = self.up[:cut]
+        del self.up[:cut]
+
+        cut = bisect.bisect_left(self.down, (price,))
+        hits.extend(reversed(self.down[cut:]))
+        del self.down[cut:]
+
+        return hits
+
+    def compact(self, is_live):
+        """Descarta níveis de posições já encerradas (remoção preguiçosa)"""
+        self.up = [level for level in self.up if is_live(level)]
+        self.down = [level for level in self.down if is_live(level)]
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.up) + len(self.down)
+
+
+class PositionTracker:
+    """
+    Acompanha os sinais abertos contra SL/TP a cada cotação
+
+    Cada posição é dividida entre TP1/TP2/TP3 (config.TP_WEIGHTS, como
+    no backtest); o stop encerra a fração restante em -1R e uma reversão
+    do sinal a encerra a mercado (close com preço). Posições
+    encerradas deixam seus níveis no livro e são ignoradas quando
+    disparam (remoção preguiçosa), com compactação quando os níveis
+    mortos passam da metade.
+    """
+
+    def __init__(self, on_event=None, closed_file=None):
+        """
+        Args:
+            on_event: callback chamado com cada evento (TP/SL atingido)
+            closed_file: JSONL das posições encerradas (padrão: config.POSITIONS_CLOSED_FILE)
+        """
+        self.on_event = on_event
+        self.closed_file = closed_file if closed_file is not None else config.POSITIONS_CLOSED_FILE
+        self.books = {}
+        self.positions = {}
+        self.realized = []
+        self.lock = threading.Lock()
+        self._seq = itertools.count()
+
+    @staticmethod
+    def position_id(pair, direction):
+        return f"{pair}:{direction}"
+
+    def open(self, pair, direction, entry, stop_loss, take_profits, opened_at=None, position_id=None):
+        """
+        Abre (ou substitui) uma posição
+
+        Args:
+            take_profits: (tp1, tp2, tp3)
+            position_id: identificador (padrão: 'par:direção', uma posição por sinal ativo)
+        """
+        position_id = position_id or self.position_id(pair, direction)
+        levels = dict(zip(('tp1', 'tp2', 'tp3'), take_profits), sl=stop_loss)
+
+        with self.lock:
+            if position_id in self.positions:
+                self._discard(position_id)
+
+            seq = next(self._seq)
+            self.positions[position_id] = {
+                'id': position_id,
+                'seq': seq,
+                'pair': pair,
+                'direction': direction,
+                'entry': entry,
+                'risk': abs(entry - stop_loss),
+                'levels': levels,
+                'hits': [],
+                'remaining': 1.0,
+                'r_multiple': 0.0,
+                'opened_at': opened_at or datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+            book = self.books.setdefault(pair, PriceLevelBook())
+            for kind, price in levels.items():
+                if kind == 'sl':
+                    side = 'down' if direction == 'BUY' else 'up'
+                else:
+                    side = 'up' if direction == 'BUY' else 'down'
+                book.add(side, price, seq, position_id, kind)
+
+        return position_id
+
+    def open_signal(self, signal):
+        """Abre a posição de um sinal do SignalGenerator"""
+        tps = signal['take_profits']
+        return self.open(
+            signal['pair'], signal['direction'], signal['current_price'],
+            signal['stop_loss'], (tps['tp1'], tps['tp2'], tps['tp3'])
+        )
+
+    def is_open(self, pair, direction=None):
+        """Há posição aberta do par (na direção, se informada)?"""
+        directions = (direction,) if direction else ('BUY', 'SELL')
+        return any(self.position_id(pair, d) in self.positions for d in directions)
+
+    def close(self, pair, direction, price=None, timestamp=None, position_id=None):
+        """
+        Encerra a posição
+
+        Com price, a fração restante sai a mercado e o resultado (R) é
+        registrado como qualquer outro encerramento (ex: reversão do
+        sinal); sem price, a posição é só descartada.
+
+        Returns:
+            Evento 'exit' (com price e posição aberta) ou None
+        """
+        position_id = position_id or self.position_id(pair, direction)
+
+        with self.lock:
+            position = self.positions.get(position_id)
+            if position is None:
+                return None
+
+            self._discard(position_id)
+            if price is None:
+                return None
+
+            sign = 1 if position['direction'] == 'BUY' else -1
+            r = position['remaining'] * sign * (price - position['entry']) / position['risk'] if position['risk'] else 0.0
+            position['hits'].append('exit')
+            position['remaining'] = 0.0
+            position['r_multiple'] += r
+            position['closed_at'] = (timestamp or datetime.utcnow()).strftime('%Y-%m-%d %H:%M:%S')
+
+        self._record(position)
+        return {
+            'type': 'exit',
+            'position': position,
+            'level': price,
+            'price': price,
+            'timestamp': timestamp,
+            'r': r,
+            'closed': True
+        }
+
+    def _discard(self, position_id):
+        position = self.positions.pop(position_id, None)
+        if position is not None:
+            book = self.books[position['pair']]
+            book.stale += 4 - len(position['hits'])
+
+    def _is_live(self, level):
+        position = self.positions.get(level[2])
+        return position is not None and position['seq'] == level[1] and level[3] not in position['hits']
+
+    def on_price(self, pair, price, timestamp=None):
+        """
+        Processa uma cotação
+
+        Returns:
+            Lista de eventos disparados
+        """
+        book = self.books.get(pair)
+        if book is None:
+            return []
+
+        events = []
+
+        with self.lock:
+            # Caminho comum: preço entre os níveis mais próximos dos dois lados
+            if (not book.up or price < book.up[0][0]) and (not book.down or price > book.down[-1][0]):
+                return events
+
+            for level in book.triggered(price):
+                if not self._is_live(level):
+                    book.stale -= 1
+                    continue
+
+                event = self._hit(self.positions[level[2]], level[3], level[0], price, timestamp)
+                if event is not None:
+                    events.append(event)
+
+            if book.stale > len(book) / 2:
+                book.compact(self._is_live)
+
+        for event in events:
+            if event['closed']:
+                self._record(event['position'])
+            if self.on_event is not None:
+                self.on_event(event)
+
+        return events
+
+    def _hit(self, position, kind, level, price, timestamp):
+        """Aplica um TP/SL atingido à posição (com o lock tomado)"""
+        if position['remaining'] <= 0:
+            return None
+
+        position['hits'].append(kind)
+
+        if kind == 'sl':
+            r = -1.0 * position['remaining']
+            position['remaining'] = 0.0
+        else:
+            weight = config.TP_WEIGHTS[int(kind[2]) - 1]
+            reward = abs(level - position['entry']) / position['risk'] if position['risk'] else 0.0
+            r = weight * reward
+            position['remaining'] = sum(
+                w for tp, w in zip(('tp1', 'tp2', 'tp3'), config.TP_WEIGHTS) if tp not in position['hits']
+            )
+
+        position['r_multiple'] += r
+        closed = position['remaining'] <= 0
+
+        if closed:
+            position['closed_at'] = (timestamp or datetime.utcnow()).strftime('%Y-%m-%d %H:%M:%S')
+            del self.positions[position['id']]
+            self.books[position['pair']].stale += 4 - len(position['hits'])
+
+        return {
+            'type': kind,
+            'position': position,
+            'level': level,
+            'price': price,
+            'timestamp': timestamp,
+            'r': r,
+            'closed': closed
+        }
+
+    def _record(self, position):
+        """Guarda o resultado de uma posição encerrada"""
+        result = {
+            'pair': position['pair'],
+            'direction': position['direction'],
+            'entry': position['entry'],
+            'hits': position['hits'],
+            'r_multiple': round(position['r_multiple'], 4),
+            'opened_at': position['opened_at'],
+            'closed_at': position['closed_at']
+        }
+        self.realized.append(result)
+
+        if self.closed_file:
+            os.makedirs(os.path.dirname(os.path.abspath(self.closed_file)), exist_ok=True)
+            with open(self.closed_file, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+
+    def run(self, source, max_ticks=None):
+        """Consome uma PriceSource (ticks (pair, timestamp, price)) até o fim"""
+        source.subscribe(list(self.books))
+        count = 0
+
+        try:
+            for tick in source.ticks():
+                if tick is None:
+                    continue
+                self.on_price(tick[0], tick[2], tick[1])
+                count += 1
+                if max_ticks is not None and count >= max_ticks:
+                    break
+        finally:
+            source.close()
+
+        return count
+
+    def open_count(self):
+        return len(self.positions)
@@ -0,0 +1,301 @@
+import csv
+import json
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+import pandas as pd
+import config
+
+class PriceSource(ABC):
+    """
+    Interface de fonte de cotações em streaming
+
+    ticks() gera tuplas (symbol, timestamp, price) com timestamp UTC
+    naive, ou None quando a fonte fica ociosa (permite fechar barras
+    por tempo mesmo sem negócios). Fontes que conhecem o volume
+    negociado acrescentam um 4º item (symbol, timestamp, price, volume).
+    """
+
+    def subscribe(self, symbols):
+        """Registra os símbolos de interesse"""
+        self.symbols = list(symbols)
+
+    @abstractmethod
+    def ticks(self):
+        """Gera (symbol, timestamp, price[, volume]) ou None"""
+
+    def close(self):
+        """Libera recursos da fonte"""
+        pass
+
+
+class ReplaySource(PriceSource):
+    """
+    Reproduz ticks gravados (lista ou CSV symbol,timestamp,price[,volume])
+
+    speed=0 reproduz o mais rápido possível; speed=1 respeita o
+    intervalo real entre ticks; speed=60 acelera 60x.
+    """
+
+    def __init__(self, ticks, speed=0):
+        self._ticks = list(ticks)
+        self.speed = speed
+        self.symbols = []
+
+    @classmethod
+    def from_csv(cls, path, speed=0):
+        """Carrega ticks de um CSV com cabeçalho symbol,timestamp,price (volume opcional)"""
+        ticks = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                tick = (
+                    row['symbol'],
+                    pd.Timestamp(row['timestamp']).to_pydatetime(),
+                    float(row['price'])
+                )
+                if row.get('volume'):
+                    tick += (float(row['volume']),)
+                ticks.append(tick)
+        return cls(ticks, speed=speed)
+
+    def ticks(self):
+        previous = None
+
+        for tick in self._ticks:
+            symbol, timestamp = tick[0], tick[1]
+            if self.symbols and symbol not in self.symbols:
+                continue
+
+            if self.speed and previous is not None:
+                delay = (timestamp - previous).total_seconds() / self.speed
+                if delay > 0:
+                    time.sleep(delay)
+            previous = timestamp
+
+            yield tick
+
+
+class RandomWalkSource(PriceSource):
+    """
+    Fonte simulada: passeio aleatório por símbolo (testes e carga)
+
+    Gera ticks intercalados entre os símbolos, com variação relativa
+    normal de desvio volatility por tick e step_seconds entre ticks.
+    """
+
+    def __init__(self, prices, ticks, volatility=0.0002, step_seconds=1, start=None, seed=None):
+        """
+        Args:
+            prices: {symbol: preço inicial}
+            ticks: total de ticks gerados
+        """
+        self.prices = dict(prices)
+        self.total = ticks
+        self.volatility = volatility
+        self.step = timedelta(seconds=step_seconds)
+        self.start = start or datetime.utcnow().replace(microsecond=0)
+        self.rng = random.Random(seed)
+        self.symbols = []
+
+    def ticks(self):
+        symbols = [s for s in self.prices if not self.symbols or s in self.symbols]
+        if not symbols:
+            return
+
+        timestamp = self.start
+        for i in range(self.total):
+            symbol = symbols[i % len(symbols)]
+            self.prices[symbol] *= 1 + self.rng.gauss(0, self.volatility)
+            timestamp += self.step
+            yield symbol, timestamp, self.prices[symbol]
+
+
+class TwelveDataWebSocketSource(PriceSource):
+    """
+    Cotações em tempo real via WebSocket do Twelve Data
+
+    Requer o pacote websocket-client. Reconecta com backoff quando a
+    conexão cai e envia heartbeats periódicos como pede a API. Quando o
+    evento traz day_volume (cripto), o tick leva o volume negociado
+    desde o tick anterior.
+    """
+
+    def __init__(self, api_key=None, symbol_map=None, url=None):
+        self.api_key = api_key or config.TWELVE_DATA_KEY
+        self.url = url or config.STREAM_URL
+        self.symbol_map = symbol_map or {}
+        self.reverse_map = {v: k for k, v in self.symbol_map.items()}
+        self.symbols = []
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._ws = None
+        self._day_volume = {}
+
+    def ticks(self):
+        reader = threading.Thread(target=self._run_forever, daemon=True)
+        reader.start()
+
+        while not self._stop.is_set():
+            try:
+                yield self._queue.get(timeout=config.STREAM_IDLE_SECONDS)
+            except queue.Empty:
+                yield None
+
+    def close(self):
+        self._stop.set()
+        if self._ws is not None:
+            self._ws.close()
+
+    def _run_forever(self):
+        """Loop de conexão com reconexão exponencial"""
+        try:
+            import websocket
+        except ImportError:
+            print("❌ Modo streaming requer: pip install websocket-client")
+            self._stop.set()
+            return
+
+        delay = 1.0
+
+        while not self._stop.is_set():
+            try:
+                self._ws = websocket.create_connection(
+                    f"{self.url}?apikey={self.api_key}",
+                    timeout=config.STREAM_HEARTBEAT_SECONDS
+                )
+                self._send_subscribe()
+                print(f"🔌 Streaming conectado: {len(self.symbols)} símbolos")
+                delay = 1.0
+                self._read_loop(websocket)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print(f"⚠️ Streaming desconectado ({str(e)}), reconectando em {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, config.STREAM_RECONNECT_MAX)
+
+    def _send_subscribe(self):
+        td_symbols = [self.symbol_map.get(s, s) for s in self.symbols]
+        self._ws.send(json.dumps({
+            'action': 'subscribe',
+            'params': {'symbols': ','.join(td_symbols)}
+        }))
+
+    def _read_loop(self, websocket):
+        last_heartbeat = time.monotonic()
+
+        while not self._stop.is_set():
+            if time.monotonic() - last_heartbeat >= config.STREAM_HEARTBEAT_SECONDS:
+                self._ws.send(json.dumps({'action': 'heartbeat'}))
+                last_heartbeat = time.monotonic()
+
+            try:
+                raw = self._ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+
+            if not raw:
+                raise ConnectionError('conexão encerrada pelo servidor')
+
+            event = json.loads(raw)
+            if event.get('event') != 'price':
+                continue
+
+            symbol = self.reverse_map.get(event.get('symbol'), event.get('symbol'))
+            timestamp = datetime.utcfromtimestamp(event['timestamp'])
+            tick = (symbol, timestamp, float(event['price']))
+
+            volume = self._traded_volume(symbol, event.get('day_volume'))
+            self._queue.put(tick if volume is None else tick + (volume,))
+
+    def _traded_volume(self, symbol, day_volume):
+        """Volume desde o tick anterior a partir do acumulado do dia (None se desconhecido)"""
+        if day_volume is None:
+            return None
+
+        day_volume = float(day_volume)
+        previous = self._day_volume.get(symbol)
+        self._day_volume[symbol] = day_volume
+
+        if previous is None:
+            return None
+        # Acumulado zerou: virada do dia
+        return day_volume - previous if day_volume >= previous else day_volume
+
+
+class BarBuilder:
+    """
+    Monta barras OHLC a partir de ticks, por símbolo e timeframe
+
+    Bordas dos buckets seguem o mesmo alinhamento do resampling
+    (00:00 UTC + config.RESAMPLE_OFFSET). Uma barra fecha quando chega
+    um tick do bucket seguinte ou via close_due(). Volume só entra na
+    barra se algum tick o trouxer.
+    """
+
+    def __init__(self, interval_minutes):
+        self.interval_seconds = {tf: minutes * 60 for tf, minutes in interval_minutes.items()}
+        self.offset = pd.Timedelta(config.RESAMPLE_OFFSET).total_seconds()
+        self.open_bars = {}
+        self.last_closed = {}
+
+    def _bucket_start(self, timestamp, seconds):
+        epoch = (timestamp - datetime(1970, 1, 1)).total_seconds() - self.offset
+        return datetime.utcfromtimestamp((epoch // seconds) * seconds + self.offset)
+
+    def on_tick(self, symbol, timestamp, price, volume=None):
+        """
+        Atualiza as barras do símbolo
+
+        Returns:
+            Lista de (symbol, timeframe, bar) fechadas por este tick
+        """
+        closed = []
+
+        for tf, seconds in self.interval_seconds.items():
+            start = self._bucket_start(timestamp, seconds)
+            key = (symbol, tf)
+            bar = self.open_bars.get(key)
+
+            # Tick atrasado de um bucket que já foi fechado
+            if key in self.last_closed and start <= self.last_closed[key]:
+                continue
+
+            if bar is not None and start > bar['datetime']:
+                closed.append((symbol, tf, bar))
+                self.last_closed[key] = bar['datetime']
+                bar = None
+
+            if bar is None:
+                self.open_bars[key] = {
+                    'datetime': start,
+                    'Open': price,
+                    'High': price,
+                    'Low': price,
+                    'Close': price
+                }
+                if volume is not None:
+                    self.open_bars[key]['Volume'] = volume
+            elif start == bar['datetime']:
+                bar['High'] = max(bar['High'], price)
+                bar['Low'] = min(bar['Low'], price)
+                bar['Close'] = price
+                if volume is not None:
+                    bar['Volume'] = bar.get('Volume', 0.0) + volume
+
+        return closed
+
+    def close_due(self, now):
+        """Fecha barras cujo intervalo já terminou (sem ticks novos)"""
+        closed = []
+
+        for (symbol, tf), bar in list(self.open_bars.items()):
+            if (now - bar['datetime']).total_seconds() >= self.interval_seconds[tf]:
+                closed.append((symbol, tf, bar))
+                self.last_closed[(symbol, tf)] = bar['datetime']
+                del self.open_bars[(symbol, tf)]
+
+        return closed
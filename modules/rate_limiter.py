@@ -0,0 +1,62 @@
+import threading
+import time
+from modules.metrics import get_metrics
+
+class TokenBucket:
+    """
+    Rate limiter token bucket (thread-safe)
+    Repõe rate_per_minute tokens por minuto, acumulando até burst
+    """
+
+    def __init__(self, rate_per_minute, burst=None, name=None):
+        self.name = name or 'default'
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or rate_per_minute)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+        self.metrics = get_metrics()
+
+    def _refill(self):
+        """Repõe tokens pelo tempo decorrido"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self, tokens=1):
+        """
+        Bloqueia até haver tokens disponíveis
+
+        Pedidos maiores que o burst são aceitos quando o bucket está
+        cheio e deixam saldo negativo, atrasando os próximos.
+
+        Returns:
+            Segundos esperados
+        """
+        waited = 0.0
+
+        while True:
+            with self.lock:
+                self._refill()
+                needed = min(tokens, self.capacity)
+
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    self.metrics.observe('rate_limit_wait_seconds', waited, limiter=self.name)
+                    return waited
+
+                wait = (needed - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(name, rate_per_minute, burst=None):
+    """Retorna o limiter compartilhado de um serviço (criado na 1ª chamada)"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(rate_per_minute, burst, name=name)
+        return _limiters[name]
@@ -21,8 +21,8 @@ class RiskManager:
             if supports:
                 stop_loss = supports[0] * 0.998  # 0.2% abaixo do suporte
             else:
-                # Fallback: 1.5 ATR abaixo
-                stop_loss = self.current_price - (1.5 * self.atr)
+                # Fallback: ATR_STOP_MULT ATRs abaixo
+                stop_loss = self.current_price - (config.ATR_STOP_MULT * self.atr)
         
         elif direction == 'SELL':
             # Stop acima da resistência mais próxima
@@ -30,8 +30,8 @@ class RiskManager:
             if resistances:
                 stop_loss = resistances[0] * 1.002  # 0.2% acima da resistência
             else:
-                # Fallback: 1.5 ATR acima
-                stop_loss = self.current_price + (1.5 * self.atr)
+                # Fallback: ATR_STOP_MULT ATRs acima
+                stop_loss = self.current_price + (config.ATR_STOP_MULT * self.atr)
         
         else:
             stop_loss = self.current_price
@@ -70,14 +70,15 @@ class RiskManager:
             'rr3': 4.0
         }
     
-    def calculate_position_size(self, stop_loss, account_size=10000):
+    def calculate_position_size(self, stop_loss, account_size=None):
         """
         Calcula tamanho de posição baseado em risco
         
         Args:
             stop_loss: nível do SL
-            account_size: tamanho da conta (default: $10k)
+            account_size: tamanho da conta (padrão: config.ACCOUNT_SIZE)
         """
+        account_size = account_size or config.ACCOUNT_SIZE
         risk_amount = account_size * (config.RISK_PER_TRADE / 100)
         
         risk_per_unit = abs(self.current_price - stop_loss)
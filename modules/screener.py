@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+import config
+from modules.calendar_store import get_calendar_store
+from modules.compact_candles import column_values
+from modules.indicators_numpy import compute_indicators, ema
+
+SCREEN_COLUMNS = [
+    'symbol', 'bars', 'price', 'trend', 'rsi', 'macd_diff', 'volatility',
+    'trend_15m', 'trend_1h', 'trend_4h', 'volume_ratio',
+    'vti1', 'vti2', 'vti3', 'vti_score', 'direction', 'candidate'
+]
+
+def _stack(frames, columns):
+    """
+    Matrizes tempo x símbolo das colunas, alinhadas pela última vela
+
+    A linha -1 é a última vela de cada símbolo. O alinhamento é por
+    posição (todos os frames têm o mesmo tamanho): preencher buracos de
+    horário (fim de semana do forex vs cripto) mudaria as EMAs em
+    relação à análise por par.
+    """
+    return [
+        np.column_stack([column_values(frame, column) for frame in frames])
+        for column in columns
+    ]
+
+def _groups(frames):
+    """Índices dos frames agrupados por tamanho (normalmente um grupo só)"""
+    groups = {}
+    for i, frame in enumerate(frames):
+        groups.setdefault(len(frame), []).append(i)
+    return groups
+
+def _vti_trend(frames):
+    """
+    _get_trend_for_tf de cada símbolo: EMA20 vs EMA50 (±0.1%) na última
+    vela, 'INDEFINIDO' com menos de 50 velas ou sem dados
+    """
+    labels = np.array(['INDEFINIDO'] * len(frames), dtype=object)
+    valid = [i for i, frame in enumerate(frames) if frame is not None and len(frame) >= 50]
+
+    for size, members in _groups([frames[i] for i in valid]).items():
+        idx = [valid[m] for m in members]
+        close, = _stack([frames[i] for i in idx], ['Close'])
+        fast = ema(close, 2.0 / 21)[-1]
+        slow = ema(close, 2.0 / 51)[-1]
+        labels[idx] = np.where(fast > slow * 1.001, 'ALTA', np.where(fast < slow * 0.999, 'BAIXA', 'LATERAL'))
+
+    return labels
+
+def _screen_group(frames):
+    """Indicadores e regras da última vela de frames M15 do mesmo tamanho"""
+    high, low, close, volume = _stack(frames, ['High', 'Low', 'Close', 'Volume'])
+    n = close.shape[0]
+    ind = compute_indicators(high, low, close, volume)
+    last_close = close[-1]
+
+    # detect_trend: preço e EMAs 20/50/200 empilhados (exige 200 velas)
+    ema20, ema50, ema200 = ind.ema_20[-1], ind.ema_50[-1], ind.ema_200[-1]
+    with np.errstate(invalid='ignore'):
+        trend = np.where(
+            (last_close > ema20) & (ema20 > ema50) & (ema50 > ema200), 'ALTA',
+            np.where((last_close < ema20) & (ema20 < ema50) & (ema50 < ema200), 'BAIXA', 'LATERAL')
+        ).astype(object)
+    if n < 200:
+        trend[:] = 'INDEFINIDA'
+    trend[np.isnan(ema200)] = 'INDEFINIDA'
+
+    # calculate_volatility: ATR atual vs média das últimas 20 velas
+    atr = ind.atr[-1]
+    atr_avg = ind.atr[-20:].mean(axis=0)
+    volatility = np.where(atr > atr_avg * 1.5, 'ALTA', np.where(atr < atr_avg * 0.7, 'BAIXA', 'MÉDIA')).astype(object)
+    volatility[np.isnan(atr) | np.isnan(atr_avg)] = 'MÉDIA'
+
+    # Fluxo do VTI-2: volume atual vs média das últimas 20 velas
+    volume_avg = volume[-20:].mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volume_ratio = np.where(volume_avg > 0, volume[-1] / volume_avg, 1.0)
+
+    return {
+        'bars': np.full(close.shape[1], n),
+        'price': last_close,
+        'trend': trend,
+        'rsi': ind.rsi[-1],
+        'macd_diff': ind.macd_diff[-1],
+        'volatility': volatility,
+        'volume_ratio': volume_ratio
+    }
+
+def screen_universe(universe, pairs=None, pair_names=None):
+    """
+    Triagem de todo o universo de uma vez
+
+    Em vez de um SignalGenerator por par, os candles de todos os pares
+    viram matrizes tempo x símbolo e indicadores, tendências e os três
+    pilares do VTI são calculados para todos os símbolos numa passada
+    NumPy. Só os candidatos (VTI >= VTI_THRESHOLD e direção BUY/SELL)
+    precisam da montagem completa do sinal; S/R, SL/TP e R:R ficam
+    para ela.
+
+    Args:
+        universe: {símbolo: {'15m': df, '1h': df, '4h': df}} (fetch_universe)
+        pairs / pair_names: símbolos e nomes (padrão: config.PAIRS / PAIR_NAMES)
+
+    Returns:
+        DataFrame indexado pelo nome do par (SCREEN_COLUMNS)
+    """
+    pairs = list(pairs or config.PAIRS)
+    pair_names = list(pair_names or config.PAIR_NAMES)
+
+    data = [universe.get(symbol) or {} for symbol in pairs]
+    frames = [d.get('15m') for d in data]
+    present = [i for i, frame in enumerate(frames) if frame is not None and not frame.empty]
+
+    rows = pd.DataFrame(index=pd.Index(pair_names, name='pair'), columns=SCREEN_COLUMNS, dtype=object)
+    rows['symbol'] = pairs
+    if not present:
+        return rows.iloc[0:0]
+
+    for size, members in _groups([frames[i] for i in present]).items():
+        idx = [present[m] for m in members]
+        for column, values in _screen_group([frames[i] for i in idx]).items():
+            rows.iloc[idx, rows.columns.get_loc(column)] = values
+
+    rows = rows.iloc[present].copy()
+    for tf in ('15m', '1h', '4h'):
+        rows[f'trend_{tf}'] = _vti_trend([data[i].get(tf) for i in present])
+
+    trend = rows['trend'].to_numpy()
+    trend_15m = rows['trend_15m'].to_numpy()
+    trend_1h = rows['trend_1h'].to_numpy()
+    trend_4h = rows['trend_4h'].to_numpy()
+    names = rows.index
+
+    # VTI-1: USD/ouro/BTC exigem tendência definida; demais, não lateral
+    strict = np.array([('USD' in name) or name in ('XAUUSD', 'BTCUSD') for name in names])
+    vti1 = np.where(strict, np.isin(trend, ['ALTA', 'BAIXA']), trend != 'LATERAL')
+
+    # VTI-2: estrutura alinhada + volume acima da média
+    volume_ratio = rows['volume_ratio'].to_numpy(dtype=np.float64)
+    vti2 = ((trend_15m == trend_1h) | (trend_15m == trend_4h)) & (volume_ratio > 1.0)
+
+    # VTI-3: 15m e 1h alinhados, sem evento de alto impacto, volatilidade aceitável
+    calendar = get_calendar_store()
+    no_event = np.array([not calendar.has_high_impact_event(name) for name in names])
+    vti3 = (trend_15m == trend_1h) & (trend_15m != 'LATERAL') & no_event & np.isin(rows['volatility'].to_numpy(), ['BAIXA', 'MÉDIA'])
+
+    score = vti1.astype(int) + vti2 + vti3
+
+    # _determine_direction
+    rsi = rows['rsi'].to_numpy(dtype=np.float64)
+    macd_diff = rows['macd_diff'].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        buy = (trend == 'ALTA') & (rsi < 70) & (macd_diff > 0)
+        sell = (trend == 'BAIXA') & (rsi > 30) & (macd_diff < 0)
+    direction = np.where(buy, 'BUY', np.where(sell, 'SELL', 'OUT')).astype(object)
+    direction[rows['bars'].to_numpy(dtype=np.int64) < 50] = 'OUT'
+
+    rows['vti1'] = vti1
+    rows['vti2'] = vti2
+    rows['vti3'] = vti3
+    rows['vti_score'] = score
+    rows['direction'] = direction
+    rows['candidate'] = (score >= config.VTI_THRESHOLD) & (direction != 'OUT')
+
+    return rows
+
+def print_screen(rows):
+    """Resumo da triagem (candidatos primeiro)"""
+    candidates = rows[rows['candidate'].astype(bool)]
+    print(f"🧮 Triagem: {len(rows)} pares | {len(candidates)} candidato(s)")
+    for name, row in candidates.iterrows():
+        print(f"  • {name}: {row['direction']} | VTI {row['vti_score']}/3 | {row['trend']} | RSI {row['rsi']:.1f}")
@@ -1,5 +1,6 @@
 from datetime import datetime
 import config
+from modules.compact_candles import expand_frames
 from modules.technical_analysis import TechnicalAnalyzer
 from modules.vti_analyzer import VTIAnalyzer
 from modules.risk_manager import RiskManager
@@ -10,8 +11,9 @@ class SignalGenerator:
     def __init__(self, pair_name, pair_symbol, data_multi_tf):
         self.pair_name = pair_name
         self.pair_symbol = pair_symbol
-        self.data = data_multi_tf
-        self.df_primary = data_multi_tf.get('15m')
+        # Velas compactas voltam a float64 exato só durante a análise do par
+        self.data = expand_frames(data_multi_tf)
+        self.df_primary = self.data.get('15m')
         
         # FIX: Validação correta de DataFrame
         if self.df_primary is None:
@@ -24,11 +26,12 @@ class SignalGenerator:
             return
         
         self.valid = True
-        self.tech = TechnicalAnalyzer(self.df_primary)
-        self.vti = VTIAnalyzer(pair_name, data_multi_tf, self.tech)
+        self.tech = TechnicalAnalyzer(self.df_primary, pair=pair_symbol, timeframe='15m')
+        self.vti = VTIAnalyzer(pair_name, self.data, self.tech)
         
+        # Indicadores vivem no df do TechnicalAnalyzer, não no df bruto
         self.current_price = self.df_primary['Close'].iloc[-1]
-        self.atr = self.df_primary['ATR'].iloc[-1] if 'ATR' in self.df_primary.columns else 0.001
+        self.atr = self.tech.df['ATR'].iloc[-1] if 'ATR' in self.tech.df.columns else 0.001
     
     def generate_signal(self):
         """Gera sinal completo de trading"""
@@ -95,7 +98,7 @@ class SignalGenerator:
         if self.df_primary is None or len(self.df_primary) < 50:
             return 'OUT'
         
-        last = self.df_primary.iloc[-1]
+        last = self.tech.df.iloc[-1]
         
         # Critérios combinados
         trend = self.tech.detect_trend()
@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import config
+
+# Status devolvidos por SignalStore.update
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+DIRECTIONS = ('BUY', 'SELL')
+
+class SignalStore:
+    """
+    Estado persistente dos sinais (SQLite), chave (par, direção)
+
+    Um sinal ativo só é encerrado por reversão, por SL/TP cruzado ou
+    depois de config.SIGNAL_STALE_BARS análises seguidas sem
+    reconfirmação (contador persistido entre execuções).
+
+    Os sinais ativos ficam também num dict em memória, carregado na
+    abertura: a comparação de cada sinal novo com o ativo é um lookup
+    O(1), sem consulta ao banco. As gravações acumulam numa transação
+    até commit().
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.SIGNAL_STORE_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS signals (
+                pair TEXT NOT NULL,
+                direction TEXT NOT NULL,
+                active INTEGER NOT NULL,
+                vti_score INTEGER,
+                entry REAL,
+                stop_loss REAL,
+                tp1 REAL,
+                tp2 REAL,
+                tp3 REAL,
+                opened_at TEXT,
+                updated_at TEXT,
+                closed_at TEXT,
+                close_reason TEXT,
+                payload TEXT,
+                misses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (pair, direction)
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_signals_active ON signals (active, pair)')
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+        self.active = {}
+        for row in self.conn.execute(
+            'SELECT pair, direction, vti_score, entry, stop_loss, tp1, tp2, tp3, opened_at, misses '
+            'FROM signals WHERE active = 1'
+        ):
+            self.active[(row[0], row[1])] = {
+                'pair': row[0],
+                'direction': row[1],
+                'vti_score': row[2],
+                'entry': row[3],
+                'stop_loss': row[4],
+                'levels': (row[5], row[6], row[7]),
+                'opened_at': row[8],
+                'misses': row[9]
+            }
+
+    @staticmethod
+    def _now():
+        return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+    @staticmethod
+    def _record(signal, opened_at):
+        tps = signal['take_profits']
+        return {
+            'pair': signal['pair'],
+            'direction': signal['direction'],
+            'vti_score': signal['vti_score'],
+            'entry': signal['current_price'],
+            'stop_loss': signal['stop_loss'],
+            'levels': (tps['tp1'], tps['tp2'], tps['tp3']),
+            'opened_at': opened_at,
+            'misses': 0
+        }
+
+    @staticmethod
+    def is_material_change(previous, signal):
+        """
+        VTI diferente ou SL/TP deslocado mais que SIGNAL_LEVEL_TOLERANCE_R
+        vezes o risco (entrada - stop) do sinal enviado
+        """
+        if previous['vti_score'] != signal['vti_score']:
+            return True
+
+        tolerance = config.SIGNAL_LEVEL_TOLERANCE_R * abs(previous['entry'] - previous['stop_loss'])
+        tps = signal['take_profits']
+        new_levels = (signal['stop_loss'], tps['tp1'], tps['tp2'], tps['tp3'])
+        old_levels = (previous['stop_loss'],) + tuple(previous['levels'])
+
+        return any(old is None or abs(new - old) > tolerance for new, old in zip(new_levels, old_levels))
+
+    def get(self, pair, direction):
+        return self.active.get((pair, direction))
+
+    def _pair_keys(self, pair):
+        return [(pair, direction) for direction in DIRECTIONS if (pair, direction) in self.active]
+
+    def update(self, signal):
+        """
+        Compara o sinal com o ativo do par e grava o estado
+
+        Um sinal na direção oposta encerra o ativo anterior.
+
+        Returns:
+            (status, encerrados): status NEW / CHANGED / UNCHANGED e lista
+            de registros encerrados pela reversão
+        """
+        key = (signal['pair'], signal['direction'])
+        now = self._now()
+
+        with self.lock:
+            closed = [self._close(other, 'reversão', now) for other in self._pair_keys(signal['pair']) if other != key]
+
+            previous = self.active.get(key)
+            if previous is None:
+                status = NEW
+            elif self.is_material_change(previous, signal):
+                status = CHANGED
+            else:
+                status = UNCHANGED
+
+            if status == UNCHANGED:
+                # Mantém os níveis enviados: desvios pequenos não se acumulam sem aviso
+                previous['misses'] = 0
+                self.conn.execute(
+                    'UPDATE signals SET updated_at = ?, misses = 0 WHERE pair = ? AND direction = ?', (now, *key)
+                )
+                return status, closed
+
+            opened_at = previous['opened_at'] if previous else now
+            record = self._record(signal, opened_at)
+            self.active[key] = record
+
+            self.conn.execute("""
+                INSERT OR REPLACE INTO signals
+                (pair, direction, active, vti_score, entry, stop_loss, tp1, tp2, tp3,
+                 opened_at, updated_at, closed_at, close_reason, payload, misses)
+                VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, ?, 0)
+            """, (
+                record['pair'], record['direction'], record['vti_score'], record['entry'],
+                record['stop_loss'], *record['levels'], opened_at, now,
+                json.dumps(signal, default=str)
+            ))
+
+        return status, closed
+
+    def invalidate(self, pair, reason='sem confirmação'):
+        """Encerra os sinais ativos de um par; devolve os registros encerrados"""
+        now = self._now()
+        with self.lock:
+            return [self._close(key, reason, now) for key in self._pair_keys(pair)]
+
+    @staticmethod
+    def crossed(record, low, high):
+        """'stop' / 'tp3' se a faixa de preço [low, high] cruzou o nível (None se não)"""
+        if record['direction'] == 'BUY':
+            hit_stop, hit_target = low <= record['stop_loss'], high >= record['levels'][2]
+        else:
+            hit_stop, hit_target = high >= record['stop_loss'], low <= record['levels'][2]
+
+        # Os dois na mesma faixa: sem saber a ordem, vale o stop
+        if hit_stop:
+            return 'stop'
+        return 'tp3' if hit_target else None
+
+    def sweep(self, analyzed, signaled, ranges=None):
+        """
+        Avalia os sinais ativos dos pares analisados que não foram reconfirmados
+
+        Encerra os que tiveram SL/TP3 cruzado e os que chegaram a
+        config.SIGNAL_STALE_BARS análises seguidas sem reconfirmação; nos
+        demais só incrementa o contador.
+
+        Args:
+            analyzed: nomes dos pares que tinham dados nesta análise
+            signaled: nomes dos pares que geraram sinal
+            ranges: {par: (mínima, máxima)} desde a abertura do sinal ativo
+
+        Returns:
+            Registros encerrados
+        """
+        ranges = ranges or {}
+        now = self._now()
+        closed = []
+
+        with self.lock:
+            for pair in sorted(set(analyzed) - set(signaled)):
+                for key in self._pair_keys(pair):
+                    record = self.active[key]
+                    reason = self.crossed(record, *ranges[pair]) if pair in ranges else None
+
+                    if reason is None:
+                        record['misses'] += 1
+                        if record['misses'] < config.SIGNAL_STALE_BARS:
+                            self.conn.execute(
+                                'UPDATE signals SET misses = ? WHERE pair = ? AND direction = ?',
+                                (record['misses'], *key)
+                            )
+                            continue
+                        reason = 'sem confirmação'
+
+                    closed.append(self._close(key, reason, now))
+
+        return closed
+
+    def _close(self, key, reason, now):
+        record = self.active.pop(key)
+        self.conn.execute(
+            'UPDATE signals SET active = 0, closed_at = ?, close_reason = ? WHERE pair = ? AND direction = ?',
+            (now, reason, key[0], key[1])
+        )
+        return dict(record, close_reason=reason)
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
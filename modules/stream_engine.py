@@ -0,0 +1,220 @@
+from datetime import datetime
+import pandas as pd
+import config
+from modules.incremental_indicators import NAN, IncrementalIndicators, IndicatorStateStore
+from modules.metrics import get_metrics
+from modules.compact_candles import expand_frames
+from modules.ohlcv_decoder import SYNTHETIC_VOLUME
+from modules.price_feed import BarBuilder
+from modules.technical_analysis import INDICATOR_COLUMNS
+
+class StreamingEngine:
+    """
+    Modo daemon: barras em tempo real + reavaliação incremental
+
+    Parte do histórico buscado via REST, anexa as barras M15/H1/H4 à
+    medida que fecham e reavalia apenas o par cuja barra fechou. Os
+    indicadores do timeframe primário são mantidos por um motor
+    incremental (custo constante por barra), persistido entre reinícios.
+    """
+
+    def __init__(self, source, pairs, pair_names, analyze, interval_minutes, on_signal=None, on_tick=None):
+        """
+        Args:
+            source: PriceSource (WebSocket, replay, mock...)
+            pairs / pair_names: símbolos e nomes (mesma ordem de config.PAIRS)
+            analyze: função (pair_symbol, pair_name, data_multi_tf) -> signal ou None
+            interval_minutes: dict {timeframe: minutos}
+            on_signal: callback chamado com cada sinal gerado
+            on_tick: callback (pair_name, price, timestamp) chamado a cada cotação
+        """
+        self.source = source
+        self.pairs = list(pairs)
+        self.names = dict(zip(pairs, pair_names))
+        self.analyze = analyze
+        self.on_signal = on_signal
+        self.on_tick = on_tick
+        self.timeframes = list(config.TIMEFRAMES.values())
+        self.builder = BarBuilder({tf: interval_minutes[tf] for tf in self.timeframes})
+        self.history = {}
+        self.synthetic_volume = {}
+        self.placeholder_volume = {}
+        self.indicators = {}
+        self.state_store = IndicatorStateStore()
+        self.bars_closed = 0
+        self.metrics = get_metrics()
+
+    def seed(self, universe):
+        """Carrega o histórico inicial {symbol: {tf: df}}"""
+        primary = config.TIMEFRAMES['primary']
+
+        for symbol in self.pairs:
+            # Barras ao vivo são anexadas em float64: o histórico sai do modo compacto
+            data = expand_frames(universe.get(symbol) or {})
+            self.history[symbol] = {tf: data.get(tf) for tf in self.timeframes}
+
+            base = data.get(primary)
+            if base is not None and not base.empty:
+                self.synthetic_volume[symbol] = bool((base['Volume'] == SYNTHETIC_VOLUME).all())
+                if self.synthetic_volume[symbol]:
+                    # Fixo do REST ou somado no resample (H1 = 4 x M15): cada timeframe mantém o seu
+                    self.placeholder_volume[symbol] = {
+                        tf: float(df['Volume'].mode().iloc[0])
+                        for tf, df in self.history[symbol].items() if df is not None and not df.empty
+                    }
+
+            if data.get(primary) is not None and not data[primary].empty:
+                self.history[symbol][primary] = self._attach_indicators(symbol, data[primary])
+
+    def _attach_indicators(self, symbol, df):
+        """
+        Prepara o motor incremental do par e anexa os indicadores ao df
+
+        Com estado salvo que alcança o histórico, só as velas posteriores
+        a ele são processadas; senão o motor é aquecido com todo o df. A
+        última vela (em formação) é calculada sem alterar o estado.
+        """
+        primary = config.TIMEFRAMES['primary']
+        df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+        closed = df.iloc[:-1]
+
+        engine = self.state_store.load(symbol, primary)
+
+        if engine is not None and engine.last_timestamp in closed.index:
+            engine.warm_up(closed[closed.index > engine.last_timestamp])
+            frame = engine.recent_frame().reindex(closed.index)
+            print(f"  ♻️ {symbol}: estado de indicadores retomado ({engine.count} velas)")
+        else:
+            engine = IncrementalIndicators()
+            frame = engine.warm_up(closed)
+
+        self.indicators[symbol] = engine
+        self.state_store.save(symbol, primary, engine)
+
+        forming = df.iloc[-1]
+        values = engine.peek(df.index[-1], forming['High'], forming['Low'], forming['Close'], forming['Volume'])
+        frame.loc[df.index[-1]] = [values[col] for col in INDICATOR_COLUMNS]
+
+        return pd.concat([df, frame], axis=1)
+
+    def run(self, max_bars=None):
+        """
+        Consome a fonte até ela terminar (ou max_bars barras M15 fecharem)
+
+        Returns:
+            Lista de sinais gerados
+        """
+        signals = []
+        primary = config.TIMEFRAMES['primary']
+
+        self.source.subscribe(self.pairs)
+        print(f"📡 Streaming iniciado: {len(self.pairs)} pares | {', '.join(self.timeframes)}")
+
+        try:
+            for tick in self.source.ticks():
+                if tick is None:
+                    closed = self.builder.close_due(datetime.utcnow())
+                else:
+                    closed = self.builder.on_tick(*tick)
+                    if self.on_tick is not None:
+                        self.on_tick(self.names.get(tick[0], tick[0]), tick[2], tick[1])
+
+                touched = []
+                for symbol, tf, bar in closed:
+                    self._append_bar(symbol, tf, bar)
+                    self.metrics.inc('stream_bars_closed', timeframe=tf)
+                    if symbol not in touched:
+                        touched.append(symbol)
+                    if tf == primary:
+                        self.bars_closed += 1
+
+                for symbol in touched:
+                    signal = self.evaluate(symbol)
+                    if signal:
+                        signals.append(signal)
+
+                if max_bars is not None and self.bars_closed >= max_bars:
+                    break
+        finally:
+            self.source.close()
+
+        return signals
+
+    def evaluate(self, symbol):
+        """Reavalia um único par com o histórico atualizado"""
+        data = self.history.get(symbol)
+        if not data or data.get(config.TIMEFRAMES['primary']) is None:
+            return None
+
+        signal = self.analyze(symbol, self.names.get(symbol, symbol), data)
+
+        if signal and self.on_signal:
+            self.on_signal(signal)
+
+        return signal
+
+    def _live_volume(self, symbol, tf, bar):
+        """
+        Volume de uma barra ao vivo
+
+        Par de volume sintético (M15 semeado todo em SYNTHETIC_VOLUME)
+        recebe o mesmo placeholder do histórico; par de volume real
+        recebe o volume dos ticks, ou NaN se a fonte não o informa.
+        """
+        if self.synthetic_volume.get(symbol, 'Volume' not in bar):
+            return self.placeholder_volume.get(symbol, {}).get(tf, SYNTHETIC_VOLUME)
+        return bar.get('Volume', NAN)
+
+    def _append_bar(self, symbol, tf, bar):
+        """
+        Anexa uma barra fechada ao histórico (janela de tamanho fixo)
+
+        Se a barra já existe (vela em formação vinda do REST), as duas
+        versões são combinadas.
+        """
+        if symbol not in self.history:
+            return
+
+        df = self.history[symbol].get(tf)
+        ts = pd.Timestamp(bar['datetime'])
+
+        if df is not None and ts in df.index:
+            row = df.loc[ts]
+            df = df.copy()
+            df.loc[ts, 'High'] = max(row['High'], bar['High'])
+            df.loc[ts, 'Low'] = min(row['Low'], bar['Low'])
+            df.loc[ts, 'Close'] = bar['Close']
+        else:
+            new_row = pd.DataFrame(
+                [[bar['Open'], bar['High'], bar['Low'], bar['Close'], self._live_volume(symbol, tf, bar)]],
+                index=pd.DatetimeIndex([ts], name='datetime'),
+                columns=['Open', 'High', 'Low', 'Close', 'Volume']
+            )
+
+            if df is None:
+                df = new_row
+            else:
+                # Janela fixa: sai a barra mais antiga, entra a nova
+                df = pd.concat([df.iloc[1:], new_row])
+
+        if tf == config.TIMEFRAMES['primary'] and symbol in self.indicators:
+            df = self._update_indicators(symbol, df, ts)
+
+        self.history[symbol][tf] = df
+
+    def _update_indicators(self, symbol, df, ts):
+        """Avança o motor incremental até a barra ts (inclusive) e grava as colunas"""
+        engine = self.indicators[symbol]
+
+        # Velas anteriores ainda não consolidadas (ex: vela REST em formação)
+        pending = df[(df.index <= ts)]
+        if engine.last_timestamp is not None:
+            pending = pending[pending.index > engine.last_timestamp]
+
+        for row_ts, row in pending.iterrows():
+            values = engine.update(row_ts, row['High'], row['Low'], row['Close'], row['Volume'])
+            df.loc[row_ts, INDICATOR_COLUMNS] = [values[col] for col in INDICATOR_COLUMNS]
+
+        self.state_store.save(symbol, config.TIMEFRAMES['primary'], engine)
+
+        return df
@@ -1,23 +1,74 @@
 import pandas as pd
 import numpy as np
-from ta.trend import MACD, EMAIndicator, SMAIndicator
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
 import config
+from modules.compact_candles import expand_frame
+from modules.feature_cache import get_feature_cache
+from modules.indicators_numpy import compute_indicators, shared_block
+from modules.metrics import get_metrics
+
+# Colunas adicionadas por calculate_indicators
+INDICATOR_COLUMNS = [
+    'RSI', 'MACD', 'MACD_signal', 'MACD_diff',
+    'BB_upper', 'BB_middle', 'BB_lower',
+    'ATR', 'EMA_20', 'EMA_50', 'EMA_200', 'Volume_MA'
+]
 
 class TechnicalAnalyzer:
-    """Análise técnica completa"""
+    """
+    Análise técnica completa
+    
+    No modo compacto (config.COMPACT_CANDLES) o backend NumPy escreve os
+    indicadores no bloco compartilhado da thread (shared_block): nada fica
+    retido por par, mas as colunas valem só até o próximo TechnicalAnalyzer
+    da mesma thread, e o cache de features recebe apenas a última vela.
+    """
+    
+    def __init__(self, df, pair=None, timeframe=None):
+        """
+        Args:
+            pair / timeframe: se informados, os indicadores calculados são
+                publicados no cache de features para os demais analisadores
+        """
+        self.pair = pair
+        self.timeframe = timeframe
+        self.shared = False
+        self.df = expand_frame(df)
+        
+        # Indicadores já presentes (ex: motor incremental do modo daemon) não são recalculados
+        if self.df is None or not all(col in self.df.columns for col in INDICATOR_COLUMNS):
+            with get_metrics().timer('indicator_seconds', pair=pair or '-', backend=config.INDICATOR_BACKEND):
+                self.calculate_indicators()
+        
+        self._publish_features()
     
-    def __init__(self, df):
-        self.df = df.copy()
-        self.calculate_indicators()
+    def _publish_features(self):
+        """Registra as colunas de indicadores no cache (sem cópia)"""
+        if self.pair is None or self.df is None or self.df.empty:
+            return
+        
+        cache = get_feature_cache()
+        for col in INDICATOR_COLUMNS:
+            if col in self.df.columns:
+                # Bloco compartilhado será sobrescrito: o cache guarda uma cópia da última vela
+                cache.put(self.pair, self.timeframe, self.df, col,
+                          self.df[col].iloc[-1:].copy() if self.shared else self.df[col])
     
     def calculate_indicators(self):
         """Calcula todos os indicadores técnicos"""
         if self.df is None or self.df.empty:
             return
         
+        if config.INDICATOR_BACKEND == 'numpy':
+            self._calculate_indicators_numpy()
+            return
+        
+        # Backend ta: o pacote só é importado quando usado
+        from ta.momentum import RSIIndicator
+        from ta.trend import MACD, EMAIndicator, SMAIndicator
+        from ta.volatility import AverageTrueRange, BollingerBands
+        
+        # Colunas são adicionadas in-place: não altera o df de quem chamou
+        self.df = self.df.copy()
         close = self.df['Close']
         high = self.df['High']
         low = self.df['Low']
@@ -54,6 +105,28 @@ class TechnicalAnalyzer:
         # Volume
         self.df['Volume_MA'] = SMAIndicator(volume, window=config.VOLUME_MA_PERIOD).sma_indicator()
     
+    def _calculate_indicators_numpy(self):
+        """
+        Backend NumPy: todos os indicadores numa passada, escritos num
+        bloco pré-alocado (o compartilhado da thread no modo compacto) e
+        anexados sem cópia das colunas OHLCV
+        """
+        self.shared = config.COMPACT_CANDLES
+        if self.shared:
+            block = shared_block(len(self.df))
+        else:
+            block = np.empty((len(self.df), len(INDICATOR_COLUMNS)))
+        compute_indicators(
+            self.df['High'].to_numpy(dtype=np.float64),
+            self.df['Low'].to_numpy(dtype=np.float64),
+            self.df['Close'].to_numpy(dtype=np.float64),
+            self.df['Volume'].to_numpy(dtype=np.float64),
+            out=block
+        )
+        
+        indicators = pd.DataFrame(block, index=self.df.index, columns=INDICATOR_COLUMNS, copy=False)
+        self.df = pd.concat([self.df, indicators], axis=1, copy=False)
+    
     def detect_trend(self):
         """Detecta tendência com base em EMAs"""
         if self.df is None or len(self.df) < 200:
@@ -111,10 +184,10 @@ class TechnicalAnalyzer:
         lows = recent['Low'].values
         
         # Resistências (top 3 máximas)
-        resistance_levels = sorted(np.unique(highs), reverse=True)[:3]
+        resistance_levels = np.unique(highs)[::-1][:3]
         
         # Suportes (top 3 mínimas)
-        support_levels = sorted(np.unique(lows))[:3]
+        support_levels = np.unique(lows)[:3]
         
         return {
             'resistances': resistance_levels.tolist(),
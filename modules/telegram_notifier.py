@@ -1,13 +1,42 @@
-import requests
 import config
+from modules.http_client import get_http_client
+from modules.metrics import get_metrics
 
 class TelegramNotifier:
-    """Envia notificações formatadas para o Telegram"""
+    """
+    Envia notificações formatadas para o Telegram
+    
+    Depois de start(), as mensagens entram numa fila assíncrona com
+    spool em disco (TelegramOutbox) e os métodos send_* só enfileiram;
+    flush() espera a entrega no fim da execução.
+    """
     
     def __init__(self):
         self.bot_token = config.TELEGRAM_BOT_TOKEN
         self.chat_id = config.TELEGRAM_CHAT_ID
+        self.chat_ids = [c.strip() for c in (self.chat_id or '').split(',') if c.strip()]
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.http = get_http_client()
+        self.metrics = get_metrics()
+        self.outbox = None
+    
+    def start(self):
+        """Liga a fila assíncrona (sem credenciais, segue no envio direto)"""
+        if self.bot_token and self.chat_ids and self.outbox is None:
+            from modules.telegram_outbox import TelegramOutbox
+            self.outbox = TelegramOutbox(self._post)
+        return self
+    
+    def flush(self, timeout=None):
+        """Espera a fila assíncrona esvaziar e exibe o balanço da entrega"""
+        if self.outbox is None:
+            return True
+        
+        done = self.outbox.close(config.TELEGRAM_FLUSH_TIMEOUT if timeout is None else timeout)
+        stats = self.outbox.stats
+        print(f"📬 Telegram: {stats['sent']} enviada(s) | {stats['failed']} com erro | "
+              f"{stats['deferred'] + self.outbox.pending} no spool para a próxima execução")
+        return done
     
     def send_signal(self, signal):
         """Envia sinal de trading formatado"""
@@ -15,7 +44,7 @@ class TelegramNotifier:
             return False
         
         message = self._format_signal_message(signal)
-        return self._send_message(message)
+        return self._send_message(message, kind='signal')
     
     def send_analysis_summary(self, analysis_count, signals_count):
         """Envia resumo da análise"""
@@ -32,6 +61,41 @@ class TelegramNotifier:
         
         return self._send_message(message)
     
+    def send_invalidation(self, record):
+        """Avisa que um sinal ativo foi encerrado (não reconfirmado, revertido ou SL/TP cruzado)"""
+        return self._send_message(self._format_invalidation_message(record))
+    
+    def _format_invalidation_message(self, record):
+        """Formata o aviso de sinal encerrado"""
+        return f"""
+⚪ **{record['direction']} {record['pair']} ENCERRADO**
+
+Motivo: {record['close_reason']}
+Entrada: ${record['entry']:.5f} | Stop: ${record['stop_loss']:.5f}
+Aberto em: {record['opened_at']} UTC
+⏰ {self._get_timestamp()}
+        """.strip()
+    
+    def send_position_event(self, event):
+        """Avisa TP/SL atingido numa posição acompanhada"""
+        position = event['position']
+        if event['type'] == 'sl':
+            title = f"🛑 **STOP {position['direction']} {position['pair']}**"
+        else:
+            title = f"🎯 **{event['type'].upper()} {position['direction']} {position['pair']}**"
+        
+        status = f"Encerrada: {position['r_multiple']:+.2f}R" if event['closed'] else f"Parcial: {event['r']:+.2f}R"
+        message = f"""
+{title}
+
+Nível: ${event['level']:.5f} | Preço: ${event['price']:.5f}
+Entrada: ${position['entry']:.5f}
+{status}
+⏰ {self._get_timestamp()}
+        """.strip()
+        
+        return self._send_message(message)
+    
     def send_error(self, error_msg):
         """Envia notificação de erro"""
         message = f"⚠️ ERRO: {error_msg}"
@@ -40,6 +104,8 @@ class TelegramNotifier:
     def _format_signal_message(self, signal):
         """Formata mensagem do sinal"""
         direction_emoji = '🟢' if signal['direction'] == 'BUY' else '🔴'
+        update_text = '🔄 **ATUALIZAÇÃO** (SL/TP ou VTI mudaram)\n' if signal.get('status') == 'changed' else ''
+        scale_text = f"\n📉 Reduzido a {signal['portfolio_scale']:.0%} pelo risco do portfólio" if signal.get('portfolio_scale', 1) < 1 else ''
         
         # Confirmações
         confirmations_text = '\n'.join([f"  • {c}" for c in signal['confirmations']]) if signal['confirmations'] else '  • Análise técnica padrão'
@@ -53,7 +119,7 @@ class TelegramNotifier:
             sr_text += f"📉 S: {', '.join([f'${s:.5f}' for s in sr['supports'][:2]])}\n"
         
         message = f"""
-{direction_emoji} **{signal['direction']} {signal['pair']}**
+{update_text}{direction_emoji} **{signal['direction']} {signal['pair']}**
 
 ━━━━━━━━━━━━━━━━━━━━
 📊 **EXECUTIVE DASHBOARD**
@@ -79,7 +145,7 @@ class TelegramNotifier:
 
 💼 Tamanho Sugerido: **{signal['position']['position_size']} unidades**
 💵 Valor: ${signal['position']['position_value']}
-⚠️ Risco: ${signal['position']['risk_amount']} ({signal['position']['risk_percentage']}%)
+⚠️ Risco: ${signal['position']['risk_amount']} ({signal['position']['risk_percentage']}%){scale_text}
 
 ━━━━━━━━━━━━━━━━━━━━
 📍 **NÍVEIS ESTRUTURAIS**
@@ -99,32 +165,48 @@ class TelegramNotifier:
         
         return message
     
-    def _send_message(self, text):
-        """Envia mensagem via Telegram API"""
-        if not self.bot_token or not self.chat_id:
+    def _post(self, chat_id, text, max_retries=0):
+        """POST sendMessage para um chat (sem retries: a fila trata 429 e erros de conexão)"""
+        url = f"{self.base_url}/sendMessage"
+        payload = {
+            'chat_id': chat_id,
+            'text': text,
+            'parse_mode': 'Markdown'
+        }
+        return self.http.post(url, json=payload, max_retries=max_retries)
+    
+    def _send_message(self, text, kind='text', chat_ids=None):
+        """Envia mensagem via Telegram API (ou enfileira, com a fila ligada)"""
+        chat_ids = chat_ids or self.chat_ids
+        if not self.bot_token or not chat_ids:
             print("⚠️ Credenciais Telegram não configuradas")
+            self.metrics.inc('telegram_messages', status='skipped')
             return False
         
-        try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                'chat_id': self.chat_id,
-                'text': text,
-                'parse_mode': 'Markdown'
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
+        if self.outbox is not None:
+            for chat_id in chat_ids:
+                self.outbox.put(chat_id, text, kind)
+            return True
+        
+        success = True
+        for chat_id in chat_ids:
+            try:
+                response = self._post(chat_id, text, max_retries=None)
+                
+                if response.status_code == 200:
+                    print("✅ Mensagem enviada ao Telegram")
+                    self.metrics.inc('telegram_messages', status='sent')
+                else:
+                    print(f"❌ Erro Telegram: {response.status_code}")
+                    self.metrics.inc('telegram_messages', status='failed', reason=response.status_code)
+                    success = False
             
-            if response.status_code == 200:
-                print("✅ Mensagem enviada ao Telegram")
-                return True
-            else:
-                print(f"❌ Erro Telegram: {response.status_code}")
-                return False
+            except Exception as e:
+                print(f"❌ Exceção ao enviar mensagem: {str(e)}")
+                self.metrics.inc('telegram_messages', status='failed', reason=type(e).__name__)
+                success = False
         
-        except Exception as e:
-            print(f"❌ Exceção ao enviar mensagem: {str(e)}")
-            return False
+        return success
     
     def _get_timestamp(self):
         """Retorna timestamp formatado"""
@@ -0,0 +1,248 @@
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+import config
+from modules.http_client import is_connect_error
+from modules.metrics import get_metrics
+from modules.rate_limiter import TokenBucket, get_rate_limiter
+
+# Separador entre sinais agrupados numa mesma mensagem
+MERGE_SEPARATOR = '\n\n〰️〰️〰️〰️〰️〰️〰️〰️〰️〰️\n\n'
+
+class TelegramOutbox:
+    """
+    Fila de saída do Telegram com spool em disco
+
+    Cada chat tem sua fila e sua thread de envio (a ordem das mensagens
+    de um chat é preservada), limitada por um token bucket do chat e
+    pelo bucket global do bot. Toda mensagem é gravada no spool antes
+    de entrar na fila e só sai de lá quando o Telegram confirma; o que
+    sobrar (falhas, execução interrompida) é reenviado na próxima
+    execução. Um 429 pausa só o chat afetado pelo retry_after informado.
+    """
+
+    def __init__(self, post, spool_dir=None, merge=None):
+        """
+        Args:
+            post: função (chat_id, text) -> response (sem retries próprios)
+            spool_dir: diretório do spool (padrão: config.TELEGRAM_SPOOL_DIR)
+            merge: máximo de sinais por mensagem (padrão: config.TELEGRAM_MERGE_SIGNALS)
+        """
+        self.post = post
+        self.spool_dir = spool_dir or config.TELEGRAM_SPOOL_DIR
+        self.merge = max(1, merge or config.TELEGRAM_MERGE_SIGNALS)
+        self.global_limiter = get_rate_limiter('telegram', config.TELEGRAM_GLOBAL_RATE)
+        self.metrics = get_metrics()
+
+        self.queues = {}
+        self.threads = {}
+        self.cond = threading.Condition()
+        self.pending = 0
+        self.closing = False
+        self.stats = {'sent': 0, 'failed': 0, 'deferred': 0}
+        self._seq = itertools.count()
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._restore()
+
+    def put(self, chat_id, text, kind='text'):
+        """Grava a mensagem no spool e enfileira (kind='signal' pode ser agrupada)"""
+        item = {
+            'id': f"{time.time_ns()}-{next(self._seq):06d}",
+            'chat_id': str(chat_id),
+            'kind': kind,
+            'text': text,
+            'attempts': 0
+        }
+        self._spool(item)
+        self._enqueue(item)
+
+    def _enqueue(self, item):
+        with self.cond:
+            self.queues.setdefault(item['chat_id'], deque()).append(item)
+            self.pending += 1
+
+            if item['chat_id'] not in self.threads:
+                thread = threading.Thread(target=self._worker, args=(item['chat_id'],), daemon=True)
+                self.threads[item['chat_id']] = thread
+                thread.start()
+
+            self.cond.notify_all()
+
+    def _restore(self):
+        """Reenfileira o que ficou no spool de execuções anteriores"""
+        restored = 0
+
+        for filename in sorted(os.listdir(self.spool_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, filename)) as f:
+                    item = json.load(f)
+            except (OSError, ValueError):
+                continue
+            item['attempts'] = 0
+            self._enqueue(item)
+            restored += 1
+
+        if restored:
+            print(f"📬 Telegram: {restored} mensagem(ns) pendente(s) recuperada(s) do spool")
+
+    def _spool_path(self, item):
+        return os.path.join(self.spool_dir, f"{item['id']}.json")
+
+    def _spool(self, item):
+        path = self._spool_path(item)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(item, f)
+        os.replace(tmp_path, path)
+
+    def _unspool(self, items):
+        for item in items:
+            try:
+                os.remove(self._spool_path(item))
+            except FileNotFoundError:
+                pass
+
+    def _take(self, queue):
+        """Retira a próxima mensagem da fila, agrupando sinais consecutivos"""
+        batch = [queue.popleft()]
+
+        if batch[0]['kind'] == 'signal':
+            length = len(batch[0]['text'])
+            while (len(batch) < self.merge and queue and queue[0]['kind'] == 'signal'
+                   and length + len(MERGE_SEPARATOR) + len(queue[0]['text']) <= config.TELEGRAM_MAX_MESSAGE):
+                length += len(MERGE_SEPARATOR) + len(queue[0]['text'])
+                batch.append(queue.popleft())
+
+        return batch
+
+    def _worker(self, chat_id):
+        limiter = TokenBucket(config.TELEGRAM_CHAT_RATE, config.TELEGRAM_CHAT_BURST, name='telegram_chat')
+        queue = self.queues[chat_id]
+
+        while True:
+            with self.cond:
+                while not queue and not self.closing:
+                    self.cond.wait()
+                if not queue:
+                    return
+                batch = self._take(queue)
+
+            limiter.acquire()
+            self.global_limiter.acquire()
+            text = MERGE_SEPARATOR.join(item['text'] for item in batch)
+            outcome, delay = self._deliver(chat_id, text, batch[0]['attempts'])
+
+            with self.cond:
+                if outcome == 'retry':
+                    for item in batch:
+                        item['attempts'] += 1
+
+                    if batch[0]['attempts'] < config.TELEGRAM_MAX_ATTEMPTS:
+                        for item in reversed(batch):
+                            queue.appendleft(item)
+                    else:
+                        # Fica no spool para a próxima execução
+                        self._finish(batch, 'deferred')
+                else:
+                    self._unspool(batch)
+                    self._finish(batch, outcome)
+
+            if outcome == 'retry':
+                time.sleep(delay)
+
+    def _finish(self, batch, status):
+        """Contabiliza mensagens encerradas nesta execução (com o lock tomado)"""
+        self.pending -= len(batch)
+        self.stats[status] += len(batch)
+        self.metrics.inc('telegram_messages', len(batch), status=status)
+        self.cond.notify_all()
+
+    def _deliver(self, chat_id, text, attempt):
+        """
+        Envia uma mensagem
+
+        Returns:
+            ('sent' | 'failed' | 'retry', segundos até a nova tentativa)
+        """
+        try:
+            response = self.post(chat_id, text)
+        except Exception as e:
+            if not is_connect_error(e):
+                # Timeout/queda no meio: o Telegram pode já ter entregue, repetir duplicaria o alerta
+                print(f"❌ Telegram: {type(e).__name__} após o envio, mensagem não repetida")
+                return 'failed', 0
+            print(f"  🔁 Telegram: {type(e).__name__}, nova tentativa")
+            return 'retry', self._backoff(attempt)
+
+        if response.status_code == 200:
+            return 'sent', 0
+
+        if response.status_code == 429:
+            delay = self._retry_after(response)
+            print(f"  ⏸️ Telegram: limite atingido no chat {chat_id}, pausa de {delay:.0f}s")
+            return 'retry', delay
+
+        # 4xx (ex: Markdown inválido) não melhora; 5xx pode ter sido entregue e duplicaria
+        print(f"❌ Erro Telegram: {response.status_code} {response.text[:200]}")
+        return 'failed', 0
+
+    @staticmethod
+    def _retry_after(response):
+        """retry_after do corpo JSON do Telegram (ou do header), limitado a HTTP_RETRY_AFTER_MAX"""
+        delay = None
+        try:
+            delay = response.json().get('parameters', {}).get('retry_after')
+        except ValueError:
+            pass
+
+        if delay is None:
+            delay = response.headers.get('Retry-After', 1)
+
+        try:
+            return min(max(float(delay), 0.0), config.HTTP_RETRY_AFTER_MAX)
+        except (TypeError, ValueError):
+            return 1.0
+
+    @staticmethod
+    def _backoff(attempt):
+        ceiling = min(config.HTTP_BACKOFF_MAX, config.HTTP_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def flush(self, timeout=None):
+        """
+        Espera a fila esvaziar (até timeout segundos)
+
+        Returns:
+            True se tudo foi entregue ou encerrado
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self.cond:
+            while self.pending > 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+
+        return True
+
+    def close(self, timeout=None):
+        """Esvazia a fila e encerra as threads; o que não saiu continua no spool"""
+        done = self.flush(timeout)
+
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+
+        if done:
+            for thread in self.threads.values():
+                thread.join()
+
+        return done
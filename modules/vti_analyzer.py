@@ -1,6 +1,7 @@
-import pandas as pd
 from datetime import datetime
 import config
+from modules.calendar_store import get_calendar_store
+from modules.feature_cache import get_feature_cache
 
 class VTIAnalyzer:
     """
@@ -13,6 +14,10 @@ class VTIAnalyzer:
         self.data = data_multi_tf
         self.tech = technical_analysis
         self.vti_results = {}
+        
+        # Mesma chave usada pelo TechnicalAnalyzer ao publicar os indicadores
+        self.cache_key = getattr(technical_analysis, 'pair', None) or pair_name
+        self.features = get_feature_cache()
     
     def validate_vti1_macro(self):
         """
@@ -122,9 +127,10 @@ class VTIAnalyzer:
         
         temporal_alignment = (trend_15m == trend_1h) and (trend_15m != 'LATERAL')
         
-        # Fundamentos imediatos (calendário econômico simulado)
-        # Em produção: integrar API real
-        has_high_impact_event = False  # Assumindo sem eventos críticos
+        # Fundamentos imediatos: eventos de alto impacto das moedas do par
+        calendar = get_calendar_store()
+        has_high_impact_event = calendar.has_high_impact_event(self.pair_name)
+        events = calendar.upcoming(self.pair_name, config.CALENDAR_EVENT_WINDOW_HOURS, high_only=True) if has_high_impact_event else []
         
         # Volatilidade aceitável
         volatility = self.tech.calculate_volatility()
@@ -136,6 +142,7 @@ class VTIAnalyzer:
             'status': harmony,
             'temporal_alignment': temporal_alignment,
             'high_impact_events': has_high_impact_event,
+            'events': [f"{e['time'][11:16]} {e['currency']} {e['title']}" for e in events],
             'volatility': volatility,
             'analysis': f"{'Harmonia temporal confirmada' if harmony else 'Desalinhamento temporal ou alta volatilidade'}"
         }
@@ -184,17 +191,24 @@ class VTIAnalyzer:
         if df is None or len(df) < 50:
             return 'INDEFINIDO'
         
-        # Usa EMAs para detectar trend
-        close = df['Close'].values
-        
+        # Usa EMAs para detectar trend (calculadas 1x por vela, via cache)
         # EMA 20 vs 50
-        if len(close) >= 50:
-            ema20 = pd.Series(close).ewm(span=20, adjust=False).mean().iloc[-1]
-            ema50 = pd.Series(close).ewm(span=50, adjust=False).mean().iloc[-1]
-            
-            if ema20 > ema50 * 1.001:  # 0.1% acima
-                return 'ALTA'
-            elif ema20 < ema50 * 0.999:  # 0.1% abaixo
-                return 'BAIXA'
+        ema20 = self._get_ema(timeframe, df, 20)
+        ema50 = self._get_ema(timeframe, df, 50)
+        
+        if ema20 > ema50 * 1.001:  # 0.1% acima
+            return 'ALTA'
+        elif ema20 < ema50 * 0.999:  # 0.1% abaixo
+            return 'BAIXA'
         
         return 'LATERAL'
+    
+    def _get_ema(self, timeframe, df, span):
+        """Último valor da EMA; reaproveita EMA_<span> já calculada no cache"""
+        def compute():
+            ema = df['Close'].ewm(span=span, adjust=False).mean()
+            # Modo compacto: nada da série fica retido por par, só a última vela
+            return ema.iloc[-1:].copy() if config.COMPACT_CANDLES else ema
+        
+        series = self.features.get(self.cache_key, timeframe, df, f'EMA_{span}', compute)
+        return series.iloc[-1]